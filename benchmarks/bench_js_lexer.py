@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+JavaScript / CSS 注释移除引擎基准测试
+
+对比基线实现（先 re.sub 移除块注释、再逐字符扫描单行注释的两遍处理）
+与 engine.strip_js / strip_css 单遍扫描的吞吐量（MB/s）。
+
+基线对字符串中的 /* */、正则表达式字面量等处理有误，JavaScript 的输出不要求一致；
+这里校验的是单遍扫描器分块输入与整体输入的输出一致。CSS 只删除注释本身、保留行结构，
+合成语料（字符串中没有 /*）上的输出应与基线完全相同，同样校验。
+
+用法:
+    python benchmarks/bench_js_lexer.py
+    python benchmarks/bench_js_lexer.py --size huge --density high --repeat 5
+    python benchmarks/bench_js_lexer.py --file some_script.js
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus import DENSITIES, SIZES, generate_source
+from engine import strip_css, strip_js
+from engine.js_lexer import CodeCommentFilter
+from legacy import remove_comments_pro
+
+
+def measure(func, code, repeat):
+    """
+    返回多次运行中最快的一次耗时（秒）
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(code)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def strip_chunked(code, language, chunk_size):
+    out = []
+    lexer = CodeCommentFilter(language, out.append)
+    for i in range(0, len(code), chunk_size):
+        lexer.feed(code[i:i + chunk_size])
+    lexer.close()
+    return ''.join(out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='JavaScript / CSS 注释移除引擎基准测试')
+    parser.add_argument('--size', choices=sorted(SIZES), default='medium', help='合成文件大小 (默认: %(default)s)')
+    parser.add_argument('--density', choices=sorted(DENSITIES), default='high', help='注释密度 (默认: %(default)s)')
+    parser.add_argument('--repeat', type=int, default=3, help='每个实现的运行次数，取最快一次')
+    parser.add_argument('--file', help='使用指定的 .js 或 .css 文件代替合成语料')
+    args = parser.parse_args()
+
+    if args.file:
+        with open(args.file, 'r', encoding='utf-8') as f:
+            inputs = [('css' if args.file.lower().endswith('.css') else 'js', f.read())]
+    else:
+        inputs = [(t, generate_source(t, SIZES[args.size], DENSITIES[args.density])) for t in ('js', 'css')]
+
+    new = {'js': strip_js, 'css': strip_css}
+    for file_type, code in inputs:
+        expected = new[file_type](code)
+        for chunk_size in (7, 4096):
+            assert strip_chunked(code, file_type, chunk_size) == expected, f'{file_type} 分块输出不一致'
+        if file_type == 'css' and not args.file:
+            assert expected == remove_comments_pro(code, 'css'), 'css 输出与基线不一致'
+        size_mb = len(code.encode('utf-8')) / (1024 * 1024)
+        print(f'{file_type}: 输入大小 {size_mb:.2f} MB，分块输出一致性校验通过')
+        cases = [
+            ('两遍处理基线', lambda c, t=file_type: remove_comments_pro(c, t)),
+            (f'strip_{file_type}', new[file_type]),
+        ]
+        for name, func in cases:
+            elapsed = measure(func, code, args.repeat)
+            print(f'  {name:<18} {elapsed * 1000:9.1f} ms  {size_mb / elapsed:8.2f} MB/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Python 注释移除引擎基准测试
+
+对比基线实现（逐字符循环）与 engine.strip_python 的吞吐量（MB/s），
+并校验两者在同一份输入上的输出一致。
+
+用法:
+    python benchmarks/bench_py_lexer.py
+    python benchmarks/bench_py_lexer.py --lines 50000 --repeat 5
+    python benchmarks/bench_py_lexer.py --file some_module.py
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine import strip_python
+from legacy import remove_comments_pro, remove_comments_pro_plus
+
+
+def generate_module(lines, seed=0):
+    """
+    生成一个包含注释、文档字符串和各类字符串的合成Python模块
+
+    生成的代码避开了基线实现已知的缺陷（如字符串末尾的反斜杠），
+    以便两种实现的输出可以逐字节比较。
+    """
+    rng = random.Random(seed)
+    out = ['#!/usr/bin/env python3', '# -*- coding: utf-8 -*-', '"""模块文档字符串"""', 'import os', '']
+    i = 0
+    while len(out) < lines:
+        i += 1
+        out.append(f'# 第 {i} 个函数的说明注释')
+        out.append(f'def func_{i}(a, b=None):')
+        out.append('    """')
+        out.append(f'    函数 {i} 的文档字符串，其中的 # 不是注释')
+        out.append('    """')
+        for _ in range(rng.randint(3, 12)):
+            choice = rng.random()
+            if choice < 0.25:
+                out.append(f'    a = a + {rng.randint(0, 999)}  # 行尾注释 {rng.random():.6f}')
+            elif choice < 0.45:
+                out.append(f'    s = "value # {rng.randint(0, 99)}" + \'x#y\'')
+            elif choice < 0.6:
+                out.append(f'    t = f"{{a}} # {{b!r:>{rng.randint(1, 9)}}}"')
+            elif choice < 0.75:
+                out.append('    # 独立的注释行')
+            elif choice < 0.82:
+                out.append('')
+            elif choice < 0.88:
+                # 字符串中不配对的括号不影响之后的文档字符串识别
+                out.append('    p = "(" + \'{{\' + "[x"')
+            else:
+                out.append(f'    b = [a, {rng.randint(0, 9)}, os.sep]')
+        out.append('    return a')
+        out.append('')
+    return '\n'.join(out) + '\n'
+
+
+def measure(func, code, repeat):
+    """
+    返回多次运行中最快的一次耗时（秒）
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(code)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Python 注释移除引擎基准测试')
+    parser.add_argument('--lines', type=int, default=50000, help='合成模块的行数')
+    parser.add_argument('--repeat', type=int, default=3, help='每个实现的运行次数，取最快一次')
+    parser.add_argument('--file', help='使用指定的Python文件代替合成模块（不校验输出一致性）')
+    args = parser.parse_args()
+
+    if args.file:
+        with open(args.file, 'r', encoding='utf-8') as f:
+            code = f.read()
+    else:
+        code = generate_module(args.lines)
+        assert strip_python(code) == remove_comments_pro(code), 'pro.py 输出不一致'
+        assert strip_python(code, drop_blank_lines=True) == remove_comments_pro_plus(code), 'pro+.py 输出不一致'
+        print('输出一致性校验通过')
+
+    size_mb = len(code.encode('utf-8')) / (1024 * 1024)
+    cases = [
+        ('pro.py 基线', remove_comments_pro),
+        ('strip_python', strip_python),
+        ('pro+.py 基线', remove_comments_pro_plus),
+        ('strip_python(drop_blank_lines)', lambda c: strip_python(c, drop_blank_lines=True)),
+    ]
+    print(f'输入大小: {size_mb:.2f} MB')
+    for name, func in cases:
+        elapsed = measure(func, code, args.repeat)
+        print(f'{name:<34} {elapsed * 1000:9.1f} ms  {size_mb / elapsed:8.2f} MB/s')
+
+
+if __name__ == '__main__':
+    main()
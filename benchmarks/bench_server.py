@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+去注释服务的压力测试
+
+启动一个服务（或连接 --address 指定的已有服务），由 --clients 个并发客户端各自保持一个连接，
+每个请求发送 --batch 个文件，持续 --duration 秒，统计每秒请求数、每秒文件数和请求延迟的分位数。
+--mode content 在请求中直接发送代码并返回结果，path 则发送文件路径并由服务写入输出文件。
+--spawn N 另外以每个文件启动一次命令行（python -m engine）的方式处理 N 个文件作为对照，
+即构建系统逐个文件调用时的开销。
+
+用法:
+    python benchmarks/bench_server.py
+    python benchmarks/bench_server.py --clients 8 --batch 10 --workers 4 --duration 10
+    python benchmarks/bench_server.py --mode path --spawn 20
+    python benchmarks/bench_server.py --address 127.0.0.1:8765
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus import DENSITIES, EXTENSIONS, SIZES, generate_source  # noqa: E402
+from engine.client import StripClient  # noqa: E402
+from engine.strip import strip_source  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(sorted_values, fraction):
+    """
+    最近秩法求分位数
+    """
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def make_items(root, file_types, files, size, density, mode):
+    """
+    生成请求项，path 模式下同时写出源文件
+
+    Returns:
+        tuple: (请求项列表, 与之对应的期望输出, 源文件的平均字节数)
+    """
+    items = []
+    expected = []
+    total = 0
+    for i in range(files):
+        file_type = file_types[i % len(file_types)]
+        code = generate_source(file_type, size, density, seed=i)
+        expected.append(strip_source(code, file_type))
+        total += len(code.encode('utf-8'))
+        if mode == 'content':
+            items.append({'content': code, 'type': file_type})
+            continue
+        path = os.path.join(root, f'src{i}{EXTENSIONS[file_type]}')
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            f.write(code)
+        items.append({'path': path, 'output': os.path.join(root, 'out', os.path.basename(path))})
+    return items, expected, total / files
+
+
+def check(address, items, expected):
+    """
+    校验服务的输出与直接调用 strip_source 一致
+
+    Returns:
+        int: 不一致的文件数
+    """
+    with StripClient(address) as client:
+        results = client.strip(items)
+    mismatched = 0
+    for item, result, want in zip(items, results, expected):
+        if not result['ok']:
+            mismatched += 1
+            continue
+        if 'content' in result:
+            got = result['content']
+        else:
+            with open(item['output'], 'r', encoding='utf-8', newline='') as f:
+                got = f.read()
+        mismatched += got != want
+    return mismatched
+
+
+def load(address, items, clients, batch, duration):
+    """
+    多个客户端并发发送请求
+
+    Returns:
+        tuple: (每个请求的延迟列表（秒）, 处理失败的文件数, 实际耗时)
+    """
+    latencies = []
+    failures = []
+    lock = threading.Lock()
+    start_event = threading.Event()
+
+    def worker(index):
+        local = []
+        failed = 0
+        offset = index * batch
+        with StripClient(address) as client:
+            start_event.wait()
+            deadline = time.perf_counter() + duration
+            while time.perf_counter() < deadline:
+                chunk = [items[(offset + k) % len(items)] for k in range(batch)]
+                offset += batch * clients
+                begin = time.perf_counter()
+                results = client.strip(chunk)
+                local.append(time.perf_counter() - begin)
+                failed += sum(not result['ok'] for result in results)
+        with lock:
+            latencies.extend(local)
+            failures.append(failed)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    begin = time.perf_counter()
+    start_event.set()
+    for thread in threads:
+        thread.join()
+    return latencies, sum(failures), time.perf_counter() - begin
+
+
+def spawn(items, count, root):
+    """
+    每个文件启动一次命令行处理，返回平均每个文件的耗时（秒）
+    """
+    paths = []
+    for i, item in enumerate(items[:count]):
+        if 'path' in item:
+            paths.append(item['path'])
+            continue
+        path = os.path.join(root, f'spawn{i}{EXTENSIONS[item["type"]]}')
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            f.write(item['content'])
+        paths.append(path)
+    output_dir = os.path.join(root, 'spawn-out')
+    begin = time.perf_counter()
+    for path in paths:
+        subprocess.run([sys.executable, '-m', 'engine', path, '-o', output_dir], cwd=ROOT, check=True,
+                       stdout=subprocess.DEVNULL)
+    return (time.perf_counter() - begin) / len(paths)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='去注释服务的压力测试')
+    parser.add_argument('--address', default=None, help='已启动的服务地址，默认在临时目录中启动一个服务')
+    parser.add_argument('--workers', type=int, default=1, help='启动的服务的工作进程数 (默认: %(default)s)')
+    parser.add_argument('--clients', type=int, default=4, help='并发客户端数 (默认: %(default)s)')
+    parser.add_argument('--batch', type=int, default=1, help='每个请求的文件数 (默认: %(default)s)')
+    parser.add_argument('--duration', type=float, default=5.0, help='持续时间（秒） (默认: %(default)s)')
+    parser.add_argument('--mode', choices=('content', 'path'), default='content',
+                        help='发送代码还是文件路径 (默认: %(default)s)')
+    parser.add_argument('--types', default='py,js', help='文件类型，逗号分隔 (默认: %(default)s)')
+    parser.add_argument('--size', choices=sorted(SIZES), default='small', help='文件大小 (默认: %(default)s)')
+    parser.add_argument('--density', choices=sorted(DENSITIES), default='low', help='注释密度 (默认: %(default)s)')
+    parser.add_argument('--files', type=int, default=64, help='不同的文件数 (默认: %(default)s)')
+    parser.add_argument('--spawn', type=int, default=0, metavar='N',
+                        help='另外以每个文件启动一次命令行的方式处理 N 个文件作为对照 (默认: 不运行)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        os.makedirs(os.path.join(root, 'out'))
+        items, expected, average = make_items(root, args.types.split(','), args.files, SIZES[args.size],
+                                              DENSITIES[args.density], args.mode)
+        server = None
+        address = args.address
+        if address is None:
+            address = 'unix:' + os.path.join(root, 'server.sock') if os.name == 'posix' else '127.0.0.1:0'
+            command = [sys.executable, '-m', 'engine.server', '--address', address, '--workers', str(args.workers)]
+            if args.mode == 'path':
+                # TCP 上默认不读写请求中的路径
+                command.append('--allow-paths')
+            server = subprocess.Popen(command, cwd=ROOT, stdout=subprocess.PIPE, text=True)
+            # 从启动信息中取得实际地址（端口为0时由系统分配）
+            line = server.stdout.readline()
+            if line.startswith('正在监听 '):
+                address = line.split()[1].split('（')[0]
+        try:
+            StripClient(address, wait=10).close()
+            mismatched = check(address, items, expected)
+            latencies, failed, elapsed = load(address, items, args.clients, args.batch, args.duration)
+            with StripClient(address) as client:
+                status = client.ping()
+        finally:
+            if server is not None:
+                try:
+                    with StripClient(address) as client:
+                        client.shutdown()
+                except OSError:
+                    server.terminate()
+                server.wait()
+
+        latencies.sort()
+        requests = len(latencies)
+        files = requests * args.batch
+        print(f'服务 {address}: 引擎版本 {status["engine_version"]}，工作进程 {status["workers"]}')
+        print(f'客户端 {args.clients}，每个请求 {args.batch} 个文件，模式 {args.mode}，'
+              f'文件类型 {args.types}，大小 {args.size}')
+        print(f'输出校验: {"一致" if not mismatched else f"{mismatched} 个文件不一致"}'
+              + (f'，处理失败 {failed} 个文件' if failed else ''))
+        print(f'请求 {requests} 个，耗时 {elapsed:.2f} s')
+        print(f'吞吐量: {requests / elapsed:10.1f} 请求/秒  {files / elapsed:10.1f} 文件/秒  '
+              f'{files * average / elapsed / (1024 * 1024):8.2f} MB/s')
+        print(f'延迟:   p50 {percentile(latencies, 0.50) * 1000:7.2f} ms  '
+              f'p90 {percentile(latencies, 0.90) * 1000:7.2f} ms  '
+              f'p99 {percentile(latencies, 0.99) * 1000:7.2f} ms  '
+              f'最大 {latencies[-1] * 1000 if latencies else 0:7.2f} ms')
+        if args.spawn:
+            per_file = spawn(items, args.spawn, root)
+            print(f'对照: 每个文件启动一次命令行，平均 {per_file * 1000:.1f} ms/文件（{1 / per_file:.1f} 文件/秒）')
+        return 1 if mismatched or failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+启动耗时测量
+
+在全新的解释器进程中分别测量以下场景的导入耗时（已扣除空解释器的启动时间）：
+只导入引擎、以命令行模式导入 pro.py / pro+.py，以及额外加载图形界面依赖。
+
+用法:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --repeat 20
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_LOAD_PRO_PLUS = (
+    "import importlib.util; "
+    "spec = importlib.util.spec_from_file_location('pro_plus', 'pro+.py'); "
+    "m = importlib.util.module_from_spec(spec); spec.loader.exec_module(m)"
+)
+
+CASES = [
+    ('空解释器', 'pass'),
+    ('import engine', 'import engine'),
+    ('import pro (命令行)', 'import pro'),
+    ('pro+.py (命令行)', _LOAD_PRO_PLUS),
+    ('import tkinter (对照)', 'import tkinter, tkinter.ttk, tkinter.filedialog, tkinter.messagebox'),
+    ('import pro + 图形界面', 'import pro; pro.load_gui()'),
+    ('pro+.py + 图形界面', _LOAD_PRO_PLUS + '; m.load_gui()'),
+]
+
+
+def measure(statement, repeat):
+    """
+    返回多次运行中最快的一次耗时（秒），语句执行失败时返回None
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, '-c', statement], cwd=ROOT,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        elapsed = time.perf_counter() - start
+        if result.returncode != 0:
+            return None
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='启动耗时测量')
+    parser.add_argument('--repeat', type=int, default=10, help='每个场景的运行次数，取最快一次')
+    args = parser.parse_args()
+
+    baseline = None
+    for name, statement in CASES:
+        elapsed = measure(statement, args.repeat)
+        if elapsed is None:
+            print(f'{name:<24} 不可用（缺少依赖或没有显示环境）')
+            continue
+        if baseline is None:
+            baseline = elapsed
+            print(f'{name:<24} {elapsed * 1000:8.1f} ms')
+        else:
+            print(f'{name:<24} {elapsed * 1000:8.1f} ms  (导入耗时 {(elapsed - baseline) * 1000:7.1f} ms)')
+
+
+if __name__ == '__main__':
+    main()
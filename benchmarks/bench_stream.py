@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流式处理与整文件处理的内存、耗时对比
+
+生成指定大小的 JS / CSS / HTML 文件，分别用整文件读入（strip_source）和
+流式处理（stream_file）移除注释，校验两者输出一致，并用 tracemalloc 记录峰值内存。
+流式处理的峰值内存应与文件大小无关。
+
+用法:
+    python benchmarks/bench_stream.py
+    python benchmarks/bench_stream.py --size 200 --types js
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine.strip import strip_source  # noqa: E402
+from engine.stream import build_pipeline, stream_file  # noqa: E402
+
+_SNIPPETS = {
+    'js': [
+        "var s{n} = 'a // not a comment';\n",
+        "/* block\n   comment {n} */\n",
+        "function f{n}(x) {{ return x + {n}; }} // trailing\n",
+        "// line comment {n}\n",
+        "const t{n} = `template ${{x}} {n}`;\n",
+    ],
+    'css': [
+        ".c{n} {{ color: #{n:03x}; }}\n",
+        "/* rule {n} */\n",
+        "a.l{n}:hover {{ margin: {n}px; /* inline */ }}\n",
+    ],
+    'html': [
+        "<div class=\"d{n}\">text {n}</div>\n",
+        "<!-- comment {n} -->\n",
+        "<p>para <!-- inline --> {n}</p>\n",
+    ],
+}
+
+
+def generate_file(path, file_type, size_mb, seed=0):
+    rnd = random.Random(seed)
+    snippets = _SNIPPETS[file_type]
+    target = size_mb * 1024 * 1024
+    written = 0
+    n = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        while written < target:
+            piece = ''.join(rnd.choice(snippets).format(n=n + i) for i in range(1000))
+            f.write(piece)
+            written += len(piece)
+            n += 1000
+
+
+# 逐个位置切分输入时容易出错的片段：跨块的记号、正则表达式与除法、注释边界
+_SPLIT_CASES = {
+    'js': "x = a++ / 2; // c\ny = b-- / 3 /* d */;\nr = s.replace(/\\/\\//g, '`'); t = `${u /* e */}`;\n",
+    'css': "a { color: red; /* c */ }\n/* d */\nb::after { content: '/*'; }\n",
+    'html': "<p>x<!-- c --></p><script>var a = b++ / 2; // d\n</script><style>/* e */ p {}</style>\n",
+}
+
+
+def check_splits():
+    """
+    在每个位置把输入切成两块分别输入，输出都应与一次性处理相同
+
+    Returns:
+        list: 输出不一致的 (文件类型, 切分位置)
+    """
+    failures = []
+    for file_type, code in _SPLIT_CASES.items():
+        expected = strip_source(code, file_type)
+        for i in range(len(code) + 1):
+            out = []
+            pipeline = build_pipeline(file_type, out.append)
+            pipeline.feed(code[:i])
+            pipeline.feed(code[i:])
+            pipeline.close()
+            if ''.join(out) != expected:
+                failures.append((file_type, i))
+    return failures
+
+
+def measure(func):
+    # tracemalloc 会显著拖慢大量小对象的分配，耗时和峰值内存分两次测量
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def run_in_memory(src, dst, file_type):
+    with open(src, 'r', encoding='utf-8') as f:
+        code = f.read()
+    with open(dst, 'w', encoding='utf-8') as f:
+        f.write(strip_source(code, file_type))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="流式处理基准测试")
+    parser.add_argument('--size', type=int, default=32, help="生成文件大小(MB) (默认: %(default)s)")
+    parser.add_argument('--types', default='js,css,html', help="文件类型，逗号分隔 (默认: %(default)s)")
+    args = parser.parse_args()
+
+    failures = check_splits()
+    if failures:
+        for file_type, i in failures:
+            print(f"{file_type}: 在位置 {i} 切分时输出与一次性处理不一致")
+        return 1
+    print("分块切分校验通过")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'类型':<6}{'模式':<8}{'耗时(s)':>10}{'峰值内存(MB)':>16}")
+        for file_type in args.types.split(','):
+            src = os.path.join(tmp, 'input.' + file_type)
+            generate_file(src, file_type, args.size)
+            memory_out = os.path.join(tmp, 'memory.out')
+            stream_out = os.path.join(tmp, 'stream.out')
+
+            for label, func in (('整文件', lambda: run_in_memory(src, memory_out, file_type)),
+                                ('流式', lambda: stream_file(src, stream_out, file_type))):
+                elapsed, peak = measure(func)
+                print(f"{file_type:<6}{label:<8}{elapsed:>10.2f}{peak / 1024 / 1024:>16.1f}")
+
+            with open(memory_out, 'rb') as a, open(stream_out, 'rb') as b:
+                if a.read() != b.read():
+                    print(f"{file_type}: 流式输出与整文件输出不一致")
+                    return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+可复现的合成语料生成器
+
+按文件类型（py / js / html / css）、目标大小和注释密度生成源文件，
+同一组参数和随机种子总是生成完全相同的内容，便于在不同版本之间比较基准测试结果。
+
+用法:
+    python benchmarks/corpus.py out/ --types py,js --size medium --density high --files 20
+"""
+
+import argparse
+import os
+import random
+
+# 预设的文件大小（字节）
+SIZES = {
+    'small': 4 * 1024,
+    'medium': 256 * 1024,
+    'huge': 8 * 1024 * 1024,
+}
+
+# 预设的注释密度：生成的每个片段是注释的概率
+DENSITIES = {
+    'low': 0.1,
+    'high': 0.5,
+}
+
+FILE_TYPES = ('py', 'js', 'html', 'css')
+
+EXTENSIONS = {'py': '.py', 'js': '.js', 'html': '.html', 'css': '.css'}
+
+# pro+.py 的 keep_header 会保留的头部
+PY_HEADER = (
+    '#!/usr/bin/env python3\n'
+    '# -*- coding: utf-8 -*-\n'
+    "'''\n"
+    'Author: bench\n'
+    'Code function: 合成基准测试模块\n'
+    "'''\n"
+)
+
+
+def _py_code(rng, n):
+    return rng.choice((
+        f'def func_{n}(a, b=None):\n    return a + {rng.randint(0, 999)}\n',
+        f's_{n} = "value # {n}" + \'x#y\'\n',
+        f't_{n} = f"{{s_{n}}} # {{{n}!r:>{rng.randint(1, 9)}}}"\n',
+        f'items_{n} = [\n    {n},\n    "a # b",\n]\n',
+        f'class C{n}:\n    x = {n}\n\n',
+        '\n',
+    ))
+
+
+def _py_comment(rng, n):
+    return rng.choice((
+        f'# 独立注释 {n}\n',
+        f'x_{n} = {n}  # 行尾注释 {rng.random():.6f}\n',
+        f'def doc_{n}():\n    """\n    函数 {n} 的文档字符串，其中的 # 不是注释\n    """\n    return {n}\n',
+        f'    # 缩进的注释 {n}\n',
+    ))
+
+
+def _js_code(rng, n):
+    return rng.choice((
+        f"var s{n} = 'a // not a comment';\n",
+        f'function f{n}(x) {{ return x + {n}; }}\n',
+        f'const t{n} = "b /* not */ c" + {n};\n',
+        f'if (x > {n}) {{\n    y = x / {rng.randint(1, 9)};\n}}\n',
+        '\n',
+    ))
+
+
+def _js_comment(rng, n):
+    return rng.choice((
+        f'// 单行注释 {n}\n',
+        f'/* 块注释\n   第 {n} 个 */\n',
+        f'let v{n} = {n}; // 行尾注释\n',
+        f'/**\n * JSDoc {n}\n * @param {{number}} x\n */\n',
+    ))
+
+
+def _html_code(rng, n):
+    return rng.choice((
+        f'<div class="d{n}">文本 {n}</div>\n',
+        f'<p>段落 <a href="/p/{n}">链接</a></p>\n',
+        f'<ul><li>{n}</li><li>{n + 1}</li></ul>\n',
+        '\n',
+    ))
+
+
+def _html_comment(rng, n):
+    return rng.choice((
+        f'<!-- 注释 {n} -->\n',
+        f'<span>{n}</span><!-- 行内注释 -->\n',
+        f'<!--\n  多行注释 {n}\n-->\n',
+    ))
+
+
+def _css_code(rng, n):
+    return rng.choice((
+        f'.c{n} {{ color: #{n % 4096:03x}; }}\n',
+        f'a.l{n}:hover {{\n    margin: {n % 100}px;\n    padding: 0;\n}}\n',
+        f'#id{n} > span {{ content: "{n}"; }}\n',
+        '\n',
+    ))
+
+
+def _css_comment(rng, n):
+    return rng.choice((
+        f'/* 规则 {n} */\n',
+        f'.k{n} {{ width: {n % 50}%; /* 行内注释 */ }}\n',
+        f'/*\n * 多行注释 {n}\n */\n',
+    ))
+
+
+_GENERATORS = {
+    'py': (_py_code, _py_comment),
+    'js': (_js_code, _js_comment),
+    'html': (_html_code, _html_comment),
+    'css': (_css_code, _css_comment),
+}
+
+
+def generate_source(file_type, size, density=0.3, seed=0, header=False):
+    """
+    生成指定类型、大小和注释密度的源代码
+
+    Args:
+        file_type (str): 文件类型，'py', 'js', 'html' 或 'css'
+        size (int): 目标大小（字符数），实际大小会略微超过
+        density (float): 每个片段是注释的概率，0~1
+        seed (int): 随机种子
+        header (bool): Python文件是否带上 shebang、编码声明和文件信息注释
+
+    Returns:
+        str: 生成的源代码
+    """
+    code_piece, comment_piece = _GENERATORS[file_type]
+    rng = random.Random(f'{file_type}:{size}:{density}:{seed}')
+    parts = []
+    length = 0
+    if header and file_type == 'py':
+        parts.append(PY_HEADER)
+        length += len(PY_HEADER)
+    n = 0
+    while length < size:
+        piece = comment_piece(rng, n) if rng.random() < density else code_piece(rng, n)
+        parts.append(piece)
+        length += len(piece)
+        n += 1
+    return ''.join(parts)
+
+
+def write_tree(root, file_type, files, size, density=0.3, seed=0, header=False, fanout=8):
+    """
+    生成一个包含多个源文件的目录树，每 fanout 个文件放在一个子目录中
+
+    Returns:
+        list: 生成的文件路径列表
+    """
+    paths = []
+    for i in range(files):
+        directory = os.path.join(root, f'pkg{i // fanout}')
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'mod{i}{EXTENSIONS[file_type]}')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(generate_source(file_type, size, density, seed + i, header))
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成合成语料")
+    parser.add_argument('output_dir', help="输出目录")
+    parser.add_argument('--types', default=','.join(FILE_TYPES), help="文件类型，逗号分隔 (默认: %(default)s)")
+    parser.add_argument('--size', choices=sorted(SIZES), default='medium', help="文件大小 (默认: %(default)s)")
+    parser.add_argument('--density', choices=sorted(DENSITIES), default='low', help="注释密度 (默认: %(default)s)")
+    parser.add_argument('--files', type=int, default=1, help="每种类型的文件数 (默认: %(default)s)")
+    parser.add_argument('--header', action='store_true', help="Python文件带上头部注释")
+    parser.add_argument('--seed', type=int, default=0, help="随机种子 (默认: %(default)s)")
+    args = parser.parse_args()
+
+    for file_type in args.types.split(','):
+        paths = write_tree(os.path.join(args.output_dir, file_type), file_type, args.files,
+                           SIZES[args.size], DENSITIES[args.density], args.seed, args.header)
+        print(f"{file_type}: 生成 {len(paths)} 个文件")
+
+
+if __name__ == '__main__':
+    main()
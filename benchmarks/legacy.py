@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""
+基线实现的原样拷贝，仅供基准测试做对比和输出一致性校验使用
+
+remove_comments_pro 对应 pro.py 中的 remove_comments_from_code，
+remove_comments_pro_plus 对应 pro+.py 中的 remove_comments_from_code。
+请勿修改，新引擎的改动应当与这里的行为进行比较。
+"""
+
+import re
+
+
+def remove_comments_pro(code, file_type='py'):
+    """
+    从代码中移除注释
+    
+    Args:
+        code (str): 原始代码
+        file_type (str): 文件类型，支持 'py', 'js', 'html', 'css'
+        
+    Returns:
+        str: 移除注释后的代码
+    """
+    if file_type == 'py':
+        # 处理Python多行注释 (''' 或 """)
+        pattern = r'("""|\'\'\').*?\1'
+        # re.DOTALL 使 . 匹配包括换行符在内的所有字符
+        code = re.sub(pattern, '', code, flags=re.DOTALL)
+        
+        # 处理Python单行注释 (#)
+        result = []
+        lines = code.split('\n')
+        in_string = False
+        string_char = None
+        
+        for line in lines:
+            new_line = ''
+            i = 0
+            while i < len(line):
+                # 检查是否在字符串内
+                if not in_string and (line[i] == '"' or line[i] == "'"):
+                    in_string = True
+                    string_char = line[i]
+                    new_line += line[i]
+                elif in_string and line[i] == string_char and (i == 0 or line[i-1] != '\\'):
+                    in_string = False
+                    new_line += line[i]
+                elif not in_string and line[i] == '#':
+                    # 遇到注释符号且不在字符串内，忽略后面的内容
+                    break
+                else:
+                    new_line += line[i]
+                i += 1
+            
+            # 添加非空行或包含代码的行
+            if new_line.strip() or not line.lstrip().startswith('#'):
+                result.append(new_line)
+        
+        return '\n'.join(result)
+    
+    elif file_type == 'js':
+        # 处理JS多行注释 /* */
+        pattern_multiline = r'/\*[\s\S]*?\*/'
+        code = re.sub(pattern_multiline, '', code)
+        
+        # 处理JS单行注释 //
+        result = []
+        lines = code.split('\n')
+        in_string = False
+        string_char = None
+        
+        for line in lines:
+            new_line = ''
+            i = 0
+            while i < len(line):
+                # 检查是否在字符串内
+                if not in_string and (line[i] == '"' or line[i] == "'" or line[i] == '`'):
+                    in_string = True
+                    string_char = line[i]
+                    new_line += line[i]
+                elif in_string and line[i] == string_char and (i == 0 or line[i-1] != '\\'):
+                    in_string = False
+                    new_line += line[i]
+                elif not in_string and i < len(line) - 1 and line[i] == '/' and line[i+1] == '/':
+                    # 遇到注释符号且不在字符串内，忽略后面的内容
+                    break
+                else:
+                    new_line += line[i]
+                i += 1
+            
+            # 添加非空行或包含代码的行
+            if new_line.strip() or not (line.lstrip().startswith('//') or line.lstrip().startswith('/*')):
+                result.append(new_line)
+        
+        return '\n'.join(result)
+    
+    elif file_type == 'html':
+        # 处理HTML注释 <!-- -->
+        pattern = r'<!--[\s\S]*?-->'
+        code = re.sub(pattern, '', code)
+        return code
+    
+    elif file_type == 'css':
+        # 处理CSS注释 /* */
+        pattern = r'/\*[\s\S]*?\*/'
+        code = re.sub(pattern, '', code)
+        return code
+    
+    else:
+        # 默认情况下不做处理
+        return code
+
+
+def remove_comments_pro_plus(code, keep_header=False):
+    """
+    从Python代码中移除单行注释和多行注释，但保留文件头部注释
+    
+    Args:
+        code (str): 原始Python代码
+        keep_header (bool): 是否保留头部注释（包括标准Python头部注释和文件信息注释）
+        
+    Returns:
+        str: 移除注释后的代码
+    """
+
+    header_comments = []
+    if keep_header:
+        lines = code.split('\n')
+        i = 0
+        while i < len(lines) and lines[i].strip().startswith('#'):
+            line_stripped = lines[i].strip()
+            if line_stripped.startswith('#!') or \
+               line_stripped.startswith('# -*-') or \
+               line_stripped.startswith('# coding=') or \
+               line_stripped.startswith('# encoding='):
+                header_comments.append(lines[i])
+            i += 1
+        
+        remaining_code = '\n'.join(lines)
+        file_info_pattern = r"'''[\s\S]*?Author:[\s\S]*?Code function:[\s\S]*?'''"
+        file_info_match = re.search(file_info_pattern, remaining_code, re.MULTILINE)
+        if file_info_match:
+            if header_comments:
+                header_comments.append('')
+            header_comments.append(file_info_match.group(0))
+    
+    if keep_header and len(header_comments) > 0:
+        code_parts = code.split(header_comments[-1], 1)
+        if len(code_parts) > 1:
+            code = code_parts[1]
+    
+    pattern = r'("""|\'\'\')[\s\S]*?\1'
+    code = re.sub(pattern, '', code, flags=re.DOTALL)
+
+    result = []
+    lines = code.split('\n')
+    in_string = False
+    string_char = None
+    
+    for line in lines:
+        new_line = ''
+        i = 0
+        while i < len(line):
+            if not in_string and (line[i] == '"' or line[i] == "'"):
+                in_string = True
+                string_char = line[i]
+                new_line += line[i]
+            elif in_string and line[i] == string_char and (i == 0 or line[i-1] != '\\'):
+                in_string = False
+                new_line += line[i]
+            elif not in_string and line[i] == '#':
+                break
+            else:
+                new_line += line[i]
+            i += 1
+        
+        if new_line.strip() or not line.lstrip().startswith('#'):
+            result.append(new_line)
+    
+    if keep_header and header_comments:
+        return '\n'.join(header_comments + [''] + [line for line in result if line.strip()])
+    else:
+        return '\n'.join([line for line in result if line.strip()])
+
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+注释移除基准测试套件
+
+对 pro.py 的每种文件类型，以及 pro+.py 在保留/不保留头部注释两种设置下，
+用 corpus.py 生成的不同大小、不同注释密度的语料测量：
+
+- remove_comments_from_code：纯内存处理
+- process_file：单个文件读、处理、写
+- process_directory：由多个小文件组成的目录树
+
+记录耗时、吞吐量和峰值内存（tracemalloc），写入 JSON 结果文件。
+指定 --compare 时与之前的结果比较，吞吐量下降或峰值内存上升超过容差即视为退化，退出码为1。
+
+用法:
+    python benchmarks/suite.py -o results.json
+    python benchmarks/suite.py --sizes small,medium --repeat 5
+    python benchmarks/suite.py -o new.json --compare old.json --tolerance 0.2
+"""
+
+import argparse
+import datetime
+import importlib.util
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from corpus import DENSITIES, EXTENSIONS, FILE_TYPES, SIZES, generate_source, write_tree  # noqa: E402
+
+import pro  # noqa: E402
+from engine import ENGINE_VERSION  # noqa: E402
+
+
+# 每个计时样本的最短时长（秒）
+_MIN_SAMPLE = 0.05
+
+
+def load_pro_plus():
+    spec = importlib.util.spec_from_file_location('pro_plus', os.path.join(ROOT, 'pro+.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def profiles(pro_plus):
+    """
+    返回要测量的配置：(配置名, 文件类型, keep_header, 三个被测函数)
+    """
+    result = []
+    for file_type in FILE_TYPES:
+        extensions = pro.extensions_for([file_type])
+        result.append(('pro', file_type, False, {
+            'remove_comments_from_code': lambda code, t=file_type: pro.remove_comments_from_code(code, t),
+            'process_file': lambda path, out, e=extensions: pro.process_file(path, out, e),
+            'process_directory': lambda d, out, t=file_type: pro.process_directory(d, out, True, [t]),
+        }))
+    for keep_header in (False, True):
+        result.append(('pro+', 'py', keep_header, {
+            'remove_comments_from_code': lambda code, k=keep_header: pro_plus.remove_comments_from_code(code, k),
+            'process_file': lambda path, out, k=keep_header: pro_plus.process_file(path, out, k),
+            'process_directory': lambda d, out, k=keep_header: pro_plus.process_directory(d, out, True, k),
+        }))
+    return result
+
+
+def measure(func, repeat):
+    """
+    返回 (最快一次的耗时秒数, 峰值内存字节数)
+
+    小输入单次耗时过短、噪声大，每个样本重复运行到至少 _MIN_SAMPLE 秒再取平均。
+    tracemalloc 会显著拖慢大量小对象的分配，耗时和峰值内存分开测量。
+    """
+    start = time.perf_counter()
+    func()
+    loops = max(1, int(_MIN_SAMPLE / max(time.perf_counter() - start, 1e-9)))
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        best = min(best, (time.perf_counter() - start) / loops)
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def record(target, profile, file_type, keep_header, size, density, nbytes, files, seconds, peak):
+    return {
+        'target': target,
+        'profile': profile,
+        'file_type': file_type,
+        'keep_header': keep_header,
+        'size': size,
+        'density': density,
+        'bytes': nbytes,
+        'files': files,
+        'seconds': round(seconds, 6),
+        'mb_per_s': round(nbytes / (1024 * 1024) / seconds, 3) if seconds else None,
+        'files_per_s': round(files / seconds, 1) if seconds else None,
+        'peak_mb': round(peak / (1024 * 1024), 3),
+    }
+
+
+def run_suite(sizes, densities, repeat, tree_files, work_dir):
+    pro_plus = load_pro_plus()
+    results = []
+    for profile, file_type, keep_header, funcs in profiles(pro_plus):
+        label = f"{profile}/{file_type}" + ('/keep_header' if keep_header else '')
+        for density in densities:
+            for size in sizes:
+                code = generate_source(file_type, SIZES[size], DENSITIES[density], header=keep_header)
+                nbytes = len(code.encode('utf-8'))
+
+                seconds, peak = measure(lambda: funcs['remove_comments_from_code'](code), repeat)
+                results.append(record('remove_comments_from_code', profile, file_type, keep_header,
+                                      size, density, nbytes, 1, seconds, peak))
+
+                path = os.path.join(work_dir, 'input' + EXTENSIONS[file_type])
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write(code)
+                out_dir = os.path.join(work_dir, 'out')
+                seconds, peak = measure(lambda: funcs['process_file'](path, out_dir), repeat)
+                results.append(record('process_file', profile, file_type, keep_header,
+                                      size, density, nbytes, 1, seconds, peak))
+                print(f"{label:<22}{density:<6}{size:<8}"
+                      f"{results[-2]['mb_per_s']:>10.2f} MB/s (内存){results[-1]['mb_per_s']:>10.2f} MB/s (文件)")
+
+            # 目录树：多个小文件，主要反映遍历和逐文件开销
+            tree = os.path.join(work_dir, 'tree')
+            paths = write_tree(tree, file_type, tree_files, SIZES['small'], DENSITIES[density], header=keep_header)
+            nbytes = sum(os.path.getsize(p) for p in paths)
+            out_dir = os.path.join(work_dir, 'tree_out')
+            seconds, peak = measure(lambda: funcs['process_directory'](tree, out_dir), repeat)
+            results.append(record('process_directory', profile, file_type, keep_header,
+                                  'small', density, nbytes, tree_files, seconds, peak))
+            print(f"{label:<22}{density:<6}{'tree':<8}{results[-1]['files_per_s']:>10.1f} 文件/s")
+            shutil.rmtree(tree)
+            shutil.rmtree(out_dir)
+    return results
+
+
+def _key(item):
+    return (item['target'], item['profile'], item['file_type'], item['keep_header'], item['size'], item['density'])
+
+
+def compare(old_results, new_results, tolerance):
+    """
+    比较两次结果，返回退化项的描述列表
+    """
+    old = {_key(item): item for item in old_results}
+    regressions = []
+    for item in new_results:
+        before = old.get(_key(item))
+        if before is None:
+            continue
+        name = '/'.join(str(part) for part in _key(item))
+        if before['mb_per_s'] and item['mb_per_s'] < before['mb_per_s'] * (1 - tolerance):
+            regressions.append(f"{name}: 吞吐量 {before['mb_per_s']} -> {item['mb_per_s']} MB/s")
+        # 峰值内存很小时波动占比大，忽略 1 MB 以内的变化
+        if item['peak_mb'] > before['peak_mb'] * (1 + tolerance) and item['peak_mb'] - before['peak_mb'] > 1:
+            regressions.append(f"{name}: 峰值内存 {before['peak_mb']} -> {item['peak_mb']} MB")
+    return regressions
+
+
+def _parse_choices(value, choices):
+    items = [v.strip() for v in value.split(',') if v.strip()]
+    for item in items:
+        if item not in choices:
+            raise argparse.ArgumentTypeError(f"无效的取值: {item}，可选: {', '.join(choices)}")
+    return items
+
+
+def main():
+    parser = argparse.ArgumentParser(description="注释移除基准测试套件")
+    parser.add_argument('-o', '--output', default='bench_results.json', help="结果文件 (默认: %(default)s)")
+    parser.add_argument('--sizes', type=lambda v: _parse_choices(v, list(SIZES)),
+                        default='small,medium,huge', help="文件大小，逗号分隔 (默认: %(default)s)")
+    parser.add_argument('--densities', type=lambda v: _parse_choices(v, list(DENSITIES)),
+                        default='low,high', help="注释密度，逗号分隔 (默认: %(default)s)")
+    parser.add_argument('--repeat', type=int, default=3, help="每项的运行次数，取最快一次 (默认: %(default)s)")
+    parser.add_argument('--tree-files', type=int, default=200, help="目录测试的文件数 (默认: %(default)s)")
+    parser.add_argument('--compare', help="与之前的结果文件比较")
+    parser.add_argument('--tolerance', type=float, default=0.15, help="退化判定容差 (默认: %(default)s)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        results = run_suite(args.sizes, args.densities, args.repeat, args.tree_files, work_dir)
+
+    data = {
+        'meta': {
+            'engine_version': ENGINE_VERSION,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+            'repeat': args.repeat,
+        },
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=1)
+    print(f"结果已写入 {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            old = json.load(f)
+        regressions = compare(old['results'], results, args.tolerance)
+        for line in regressions:
+            print(f"退化: {line}")
+        if regressions:
+            return 1
+        print("未发现性能退化")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
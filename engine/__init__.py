@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+注释移除引擎
+
+不依赖 tkinter，可以在无界面的环境中直接导入使用。
+结果缓存（sqlite3）、变更检测（subprocess）、分析和监视等较重的模块在首次访问对应名称时才导入，
+只调用 strip_source 或 process_tree 的程序不必承担它们的导入开销。
+"""
+
+import importlib
+
+from .py_lexer import strip_python
+from .js_lexer import strip_css, strip_js
+from .html_lexer import strip_html
+from .header import LICENSE_PATTERNS, split_header
+from .strip import DEFAULT_EXTENSIONS, ENGINE_VERSION, extensions_for, strip_bytes, strip_source
+from .manifest import MANIFEST_NAME, Manifest, options_fingerprint
+from .stream import STREAM_THRESHOLD, STREAMABLE_TYPES, stream_file
+from .walk import DEFAULT_EXCLUDES, IgnoreRules, scan_tree
+from .sniff import SkipRules, sniff
+from .report import REPORT_NAME, Report, profiling
+from .runner import RunStats, collect_changed_tasks, collect_tasks, make_task, process_tree, run_tasks, strip_file
+
+# 延迟导入的名称及其所在的子模块
+_LAZY = {
+    'ResultCache': 'cache', 'default_cache_path': 'cache',
+    'ANALYSIS_NAME': 'analyze', 'Analysis': 'analyze', 'analyze_file': 'analyze', 'analyze_tree': 'analyze',
+    'changed_files': 'gitdiff',
+    'watch_tree': 'watch',
+}
+
+__all__ = [
+    'strip_python',
+    'strip_css', 'strip_js',
+    'strip_html',
+    'LICENSE_PATTERNS', 'split_header',
+    'DEFAULT_EXTENSIONS', 'ENGINE_VERSION', 'extensions_for', 'strip_bytes', 'strip_source',
+    'MANIFEST_NAME', 'Manifest', 'options_fingerprint',
+    'ResultCache', 'default_cache_path',
+    'STREAM_THRESHOLD', 'STREAMABLE_TYPES', 'stream_file',
+    'DEFAULT_EXCLUDES', 'IgnoreRules', 'scan_tree',
+    'SkipRules', 'sniff',
+    'REPORT_NAME', 'Report', 'profiling',
+    'ANALYSIS_NAME', 'Analysis', 'analyze_file', 'analyze_tree',
+    'changed_files',
+    'RunStats', 'collect_changed_tasks', 'collect_tasks', 'make_task', 'process_tree', 'run_tasks', 'strip_file',
+    'watch_tree',
+]
+
+
+def __getattr__(name):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{module}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
@@ -0,0 +1,11 @@
+# -*- coding: utf-8 -*-
+"""
+python -m engine 命令行入口
+"""
+
+import sys
+
+from .cli import main
+
+if __name__ == '__main__':
+    sys.exit(main(prog='python -m engine'))
@@ -0,0 +1,458 @@
+# -*- coding: utf-8 -*-
+"""
+分析模式（dry run）：统计将被移除的注释并找出有风险的文件，不写入任何文件
+
+与 process_tree 使用同一次目录遍历和同一个去注释引擎（可以多进程并行，大文件按块流式处理），
+只是把输出丢弃，只记录：
+
+- 每个文件和每种语言删除的注释行数和字节数（drop_blank_lines 删除的空行也计入行数）
+- 可疑的记号变化：
+    tokens    Python 去注释前后的代码记号（不含注释和文档字符串）不一致
+    syntax    Python 源文件可以编译，去注释后无法编译
+    brackets  JS / CSS / HTML 去注释前后 () [] {} 的配对差不一致，可能删掉了代码
+    unstable  对输出再去一次注释结果还会变化，说明扫描器对某处的判断前后不一致
+- 读取和去注释的耗时，用于估计实际处理一遍的时间
+
+流式处理的大文件只统计行数、字节数并检查括号。
+"""
+
+import csv
+import json
+import os
+import re
+import time
+import warnings
+from functools import partial
+
+from .encoding import decode_source, detect_file_encoding, open_source
+from .report import Timer
+from .runner import RunStats, collect_tasks, run_tasks
+from .strip import DEFAULT_EXTENSIONS, strip_source
+from .stream import CHUNK_SIZE, build_pipeline, should_stream
+
+# 默认的分析结果文件名
+ANALYSIS_NAME = 'strip_analysis.json'
+
+# 每个文件记录的字段，也是 CSV 的列
+FIELDS = ('path', 'file_type', 'status', 'lines_in', 'lines_out', 'comment_lines', 'bytes_in', 'bytes_out',
+          'comment_bytes', 'tokens_in', 'tokens_out', 'read', 'strip', 'check', 'flags', 'error')
+
+# 各标记的说明
+FLAGS = {
+    'tokens': "代码记号变化",
+    'syntax': "去注释后无法编译",
+    'brackets': "括号配对变化",
+    'unstable': "再次去注释结果不同",
+}
+
+# Python 的字符串（含前缀和三引号）和注释，其间的代码按空白切分
+_PY_STOP = re.compile(r'''
+    (?P<string>(?:(?<!\w)[rRbBuUfF]{1,2})?(?:
+        \'\'\'(?:[^\\]|\\[\s\S])*?\'\'\'
+      | """(?:[^\\]|\\[\s\S])*?"""
+      | '(?:[^'\\\n]|\\[\s\S])*'?
+      | "(?:[^"\\\n]|\\[\s\S])*"?
+    ))
+  | (?P<comment>\#[^\n]*)
+''', re.VERBOSE)
+
+# 三引号字符串之后到行尾只有空白或注释时才可能是文档字符串
+_DOCSTRING_TAIL = re.compile(r'[ \t\f]*(?:\#[^\n]*)?(?:\n|\Z)')
+
+_BRACKETS = '()[]{}'
+
+
+def _line_count(text):
+    return text.count('\n') + (1 if text and not text.endswith('\n') else 0)
+
+
+def _brackets(text):
+    # 各类括号的 开 - 闭 之差
+    counts = [text.count(ch) for ch in _BRACKETS]
+    return counts[0] - counts[1], counts[2] - counts[3], counts[4] - counts[5]
+
+
+def _python_tokens(code, drop_docstrings):
+    """
+    返回 Python 代码中注释以外的记号：字符串整体作为一个记号，其余代码按空白切分
+
+    与 py_lexer 相互独立的另一种切分，两者的判断不一致（例如把字符串的一部分当成注释）时记号会不同。
+    drop_docstrings 为True时去掉行首、括号外、其后只有注释的三引号字符串，与 strip_python 删除文档字符串的规则一致
+
+    Returns:
+        tuple: (记号列表, 是否有代码块因去掉文档字符串而变空)
+    """
+    tokens = []
+    depth = 0
+    pos = 0
+    # 紧跟在 : 之后被去掉的文档字符串的缩进，下一行代码缩进更少时这个代码块就空了
+    block = None
+    emptied = False
+    for m in _PY_STOP.finditer(code):
+        start = m.start()
+        run = code[pos:start]
+        pos = m.end()
+        words = run.split()
+        if block is not None and (words or m.lastgroup == 'string'):
+            first = start - len(run.lstrip()) if words else start
+            if first - code.rfind('\n', 0, first) - 1 < block:
+                emptied = True
+            block = None
+        if words:
+            tokens.extend(words)
+            depth = max(depth + run.count('(') + run.count('[') + run.count('{')
+                        - run.count(')') - run.count(']') - run.count('}'), 0)
+        if m.lastgroup == 'comment':
+            continue
+        text = m.group()
+        if drop_docstrings and depth == 0 and text.lstrip('rRbBuUfF')[:3] in ('"""', "\'\'\'"):
+            line = code.rfind('\n', 0, start) + 1
+            if not code[line:start].strip() and not code.endswith('\\\n', 0, line) \
+                    and _DOCSTRING_TAIL.match(code, pos):
+                if tokens and tokens[-1].endswith(':'):
+                    block = start - line
+                continue
+        tokens.append(text)
+    run = code[pos:]
+    words = run.split()
+    if block is not None and words:
+        first = len(code) - len(run.lstrip())
+        emptied = emptied or first - code.rfind('\n', 0, first) - 1 < block
+        block = None
+    tokens.extend(words)
+    return tokens, emptied or block is not None
+
+
+def _compiles(code):
+    # 无效转义等警告与去注释无关，不输出
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        try:
+            compile(code, '<analyze>', 'exec', dont_inherit=True)
+        except (SyntaxError, ValueError):
+            return False
+    return True
+
+
+def analyze_file(file_path, file_type='py', options=None, metrics=None):
+    """
+    分析单个文件：去注释但不写出，统计删除量并检查可疑的记号变化
+
+    Args:
+        file_path (str): 源文件路径
+        file_type (str): 文件类型
+        options (dict, optional): 传给 strip_source 的选项
+        metrics (dict, optional): 记录各阶段耗时（read / strip / check）
+
+    Returns:
+        dict: lines_in / lines_out、bytes_in / bytes_out、tokens_in / tokens_out（仅 Python）和 flags
+
+    Raises:
+        Exception: 读取或处理失败时抛出
+    """
+    options = options or {}
+    if should_stream(file_path, file_type):
+        return _analyze_stream(file_path, file_type, options, metrics)
+    timer = Timer(metrics)
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    timer.lap('read')
+
+    code, encoding = decode_source(data, file_type)
+    cleaned = strip_source(code, file_type, **options)
+    bytes_out = len(encoding.encode(cleaned))
+    timer.lap('strip')
+
+    flags = []
+    tokens_in = tokens_out = None
+    if file_type == 'py':
+        before, emptied = _python_tokens(code, drop_docstrings=True)
+        after, _ = _python_tokens(cleaned, drop_docstrings=False)
+        tokens_in, tokens_out = len(before), len(after)
+        if after != before:
+            flags.append('tokens')
+        # 记号相同时只有变空的代码块会导致无法编译；源文件本身就无法编译时不算去注释引起的
+        if emptied and not _compiles(cleaned) and _compiles(code):
+            flags.append('syntax')
+    elif _brackets(code) != _brackets(cleaned):
+        flags.append('brackets')
+    if strip_source(cleaned, file_type, **options) != cleaned:
+        flags.append('unstable')
+    timer.lap('check')
+
+    return {
+        'lines_in': _line_count(code), 'lines_out': _line_count(cleaned),
+        'bytes_in': len(data), 'bytes_out': bytes_out,
+        'tokens_in': tokens_in, 'tokens_out': tokens_out,
+        'flags': flags,
+    }
+
+
+def _analyze_stream(file_path, file_type, options, metrics):
+    timer = Timer(metrics)
+    encoding = detect_file_encoding(file_path, file_type)
+    counts = {'lines': 0, 'bytes': len(encoding.bom), 'last': ''}
+    balance = [0, 0, 0]
+
+    def sink(text):
+        if text:
+            counts['lines'] += text.count('\n')
+            counts['bytes'] += len(encoding.encode(text, bom=False))
+            counts['last'] = text
+            for i, delta in enumerate(_brackets(text)):
+                balance[i] -= delta
+
+    lines_in = 0
+    last = ''
+    pipeline = build_pipeline(file_type, sink, options)
+    with open_source(file_path, encoding) as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), ''):
+            lines_in += chunk.count('\n')
+            last = chunk
+            for i, delta in enumerate(_brackets(chunk)):
+                balance[i] += delta
+            pipeline.feed(chunk)
+        pipeline.close()
+    timer.lap('strip')
+
+    return {
+        'lines_in': lines_in + (1 if last and not last.endswith('\n') else 0),
+        'lines_out': counts['lines'] + (1 if counts['last'] and not counts['last'].endswith('\n') else 0),
+        'bytes_in': os.path.getsize(file_path), 'bytes_out': counts['bytes'],
+        'tokens_in': None, 'tokens_out': None,
+        'flags': ['brackets'] if any(balance) else [],
+    }
+
+
+def _analyze_task(task, previous=None, options=None):
+    """
+    在（工作进程中）分析单个任务，作为 run_tasks 的 task_func，不使用增量清单条目 previous
+
+    Returns:
+        tuple: (错误信息或None, analyze_file 的结果或None, 耗时)
+    """
+    file_path, _, file_type, _ = task
+    metrics = {}
+    try:
+        return None, analyze_file(file_path, file_type, options, metrics), metrics
+    except Exception as e:
+        return str(e), None, metrics
+
+
+class Analysis:
+    """
+    一次分析的结果
+
+    records 中每个文件一条记录，字段见 FIELDS；status 为 'ok' 或 'failed'，
+    flags 为 FLAGS 中的标记列表。
+    """
+
+    def __init__(self):
+        self.records = []
+        # 整体阶段的耗时（秒），如 walk: 遍历目录，analyze: 分析文件
+        self.stages = {}
+        self.cancelled = False
+
+    def add_stage(self, name, seconds):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def add(self, path, file_type, result=None, metrics=None, error=None):
+        """
+        添加一个文件的记录
+
+        Args:
+            path (str): 文件路径
+            file_type (str): 文件类型
+            result (dict, optional): analyze_file 的结果，失败时为None
+            metrics (dict, optional): read / strip / check 耗时
+            error (str, optional): 错误信息
+        """
+        result = result or {}
+        metrics = metrics or {}
+        lines_in = result.get('lines_in', 0)
+        lines_out = result.get('lines_out', 0)
+        bytes_in = result.get('bytes_in', 0)
+        bytes_out = result.get('bytes_out', 0)
+        self.records.append({
+            'path': path,
+            'file_type': file_type,
+            'status': 'failed' if error is not None else 'ok',
+            'lines_in': lines_in,
+            'lines_out': lines_out,
+            'comment_lines': lines_in - lines_out,
+            'bytes_in': bytes_in,
+            'bytes_out': bytes_out,
+            'comment_bytes': bytes_in - bytes_out,
+            'tokens_in': result.get('tokens_in'),
+            'tokens_out': result.get('tokens_out'),
+            'read': round(metrics.get('read', 0.0), 6),
+            'strip': round(metrics.get('strip', 0.0), 6),
+            'check': round(metrics.get('check', 0.0), 6),
+            'flags': list(result.get('flags', ())),
+            'error': error,
+        })
+
+    def flagged(self):
+        """
+        返回有可疑标记的文件的记录
+        """
+        return [r for r in self.records if r['flags']]
+
+    def failed(self):
+        return [r for r in self.records if r['status'] == 'failed']
+
+    def by_language(self):
+        """
+        按文件类型汇总
+
+        Returns:
+            dict: {文件类型: {files, lines_in, comment_lines, bytes_in, comment_bytes, read, strip, flagged}}
+        """
+        groups = {}
+        for record in self.records:
+            group = groups.setdefault(record['file_type'], {
+                'files': 0, 'lines_in': 0, 'comment_lines': 0, 'bytes_in': 0, 'comment_bytes': 0,
+                'read': 0.0, 'strip': 0.0, 'flagged': 0,
+            })
+            group['files'] += 1
+            for key in ('lines_in', 'comment_lines', 'bytes_in', 'comment_bytes', 'read', 'strip'):
+                group[key] += record[key]
+            if record['flags']:
+                group['flagged'] += 1
+        return groups
+
+    def estimate(self, workers=1):
+        """
+        估计实际处理一遍的耗时（秒）：读取和去注释的实测耗时之和，不含写入
+
+        Args:
+            workers (int): 并行进程数，按均匀分配估计，但不少于最慢的单个文件
+        """
+        seconds = [r['read'] + r['strip'] for r in self.records]
+        if not seconds:
+            return 0.0
+        return max(sum(seconds) / max(workers, 1), max(seconds))
+
+    def to_dict(self, workers=1):
+        return {
+            'totals': {
+                'files': len(self.records),
+                'flagged': len(self.flagged()),
+                'failed': len(self.failed()),
+                'lines_in': sum(r['lines_in'] for r in self.records),
+                'comment_lines': sum(r['comment_lines'] for r in self.records),
+                'bytes_in': sum(r['bytes_in'] for r in self.records),
+                'comment_bytes': sum(r['comment_bytes'] for r in self.records),
+                'estimate': self.estimate(workers),
+            },
+            'stages': dict(self.stages),
+            'languages': self.by_language(),
+            'files': self.records,
+        }
+
+    def summary(self, workers=1, count=20):
+        """
+        返回适合直接显示给用户的多行摘要
+
+        Args:
+            workers (int): 估计耗时时使用的并行进程数
+            count (int): 最多列出的可疑文件数
+        """
+        totals = self.to_dict(workers)['totals']
+        lines = [f"共 {totals['files']} 个文件，将删除 {totals['comment_lines']} 行"
+                 f"（共 {totals['lines_in']} 行）、{totals['comment_bytes'] / 1024:.1f} KB，"
+                 f"可疑 {totals['flagged']} 个，失败 {totals['failed']} 个"]
+        for file_type, group in sorted(self.by_language().items()):
+            ratio = group['comment_bytes'] / group['bytes_in'] if group['bytes_in'] else 0
+            lines.append(f"  {file_type}: {group['files']} 个文件，删除 {group['comment_lines']} 行、"
+                         f"{group['comment_bytes'] / 1024:.1f} KB（{ratio:.1%}）"
+                         + (f"，可疑 {group['flagged']} 个" if group['flagged'] else ""))
+        estimate = f"预计处理耗时约 {totals['estimate']:.2f} 秒（读取和去注释"
+        if workers > 1:
+            estimate += f"，{workers} 个进程"
+        lines.append(estimate + "，不含写入）")
+        flagged = self.flagged()
+        if flagged:
+            lines.append("可疑的文件:")
+            for record in flagged[:count]:
+                reasons = '，'.join(FLAGS[flag] for flag in record['flags'])
+                if record['tokens_in'] is not None and record['tokens_out'] != record['tokens_in']:
+                    reasons += f"（记号 {record['tokens_in']} -> {record['tokens_out']}）"
+                lines.append(f"  {record['path']}: {reasons}")
+            if len(flagged) > count:
+                lines.append(f"  ……另有 {len(flagged) - count} 个")
+        for record in self.failed()[:count]:
+            lines.append(f"  失败 {record['path']}: {record['error']}")
+        if self.cancelled:
+            lines.append("已取消，结果不完整")
+        return '\n'.join(lines)
+
+    def save(self, path, workers=1):
+        """
+        按扩展名写出结果：.csv 为每个文件一行的 CSV，其他为 JSON
+        """
+        if path.lower().endswith('.csv'):
+            with open(path, 'w', encoding='utf-8', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=FIELDS)
+                writer.writeheader()
+                for record in self.records:
+                    writer.writerow(dict(record, flags=';'.join(record['flags'])))
+        else:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(self.to_dict(workers), f, ensure_ascii=False, indent=1)
+
+
+def analyze_tasks(tasks, options=None, workers=None, chunksize=None, analysis=None, progress=None, cancel=None):
+    """
+    分析任务列表，参数与 run_tasks 相同，但不写入任何文件
+
+    Returns:
+        Analysis: 分析结果
+    """
+    start = time.perf_counter()
+    if analysis is None:
+        analysis = Analysis()
+
+    def record(task, result):
+        error, file_result, metrics = result
+        analysis.add(task[0], task[2], file_result, metrics, error)
+
+    stats = RunStats()
+    try:
+        # 与 run_tasks 使用同样的串行 / 进程池调度，只是每个任务改为分析并把结果记入 analysis
+        run_tasks(tasks, workers=workers, chunksize=chunksize, stats=stats, progress=progress, cancel=cancel,
+                  task_func=partial(_analyze_task, options=options), record=record)
+    finally:
+        analysis.cancelled = stats.cancelled
+        analysis.add_stage('analyze', time.perf_counter() - start)
+    return analysis
+
+
+def analyze_tree(dir_path, recursive=True, extensions=None, options=None, workers=None, ignore=None,
+                 progress=None, cancel=None, analysis=None):
+    """
+    分析目录中的所有支持的文件，遍历方式与 process_tree 相同，不写入任何文件
+
+    Args:
+        dir_path (str): 要分析的目录路径
+        recursive (bool): 是否递归处理子目录
+        extensions (dict, optional): 扩展名到处理类型的映射，默认全部类型
+        options (dict, optional): 传给 strip_source 的选项
+        workers (int, optional): 并行进程数，None或1为串行，0表示使用全部CPU核心
+        ignore (IgnoreRules, optional): 目录遍历的排除规则
+        progress (callable, optional): 进度回调，见 run_tasks
+        cancel (threading.Event, optional): 取消标志，见 run_tasks
+        analysis (Analysis, optional): 追加结果的对象
+
+    Returns:
+        Analysis: 分析结果
+    """
+    if extensions is None:
+        extensions = DEFAULT_EXTENSIONS
+    if analysis is None:
+        analysis = Analysis()
+    start = time.perf_counter()
+    # 不指定输出目录，collect_tasks 不会创建任何目录
+    tasks = collect_tasks(dir_path, None, recursive, extensions, ignore)
+    analysis.add_stage('walk', time.perf_counter() - start)
+    return analyze_tasks(tasks, options, workers, analysis=analysis, progress=progress, cancel=cancel)
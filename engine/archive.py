@@ -0,0 +1,299 @@
+# -*- coding: utf-8 -*-
+"""
+归档文件的处理
+
+直接读取 .zip / .tar / .tar.gz / .tar.bz2 / .tar.xz 中的成员，去掉源文件中的注释后写入新的归档文件，
+中间不解压到磁盘。目录结构和成员的元数据（修改时间、权限、属主、注释等）保持不变，
+不支持的文件类型、被排除的成员、目录和链接原样复制；处理失败的源文件计入错误列表，也原样复制。
+
+zip 的成员按名称排序写出，tar 的成员按在输入中的存储顺序边解压边写出；gzip 头中的时间戳固定为0，
+相同的输入和选项总是得到逐字节相同的归档文件。
+输出与已有文件完全相同时不会重写。输入和输出的格式可以不同（如 .tar.gz 转为 .zip），
+此时元数据尽量对应转换，zip 无法表示的硬链接、设备文件等成员会记为失败。
+"""
+
+import copy
+import gzip
+import io
+import os
+import stat
+import tarfile
+import time
+import zipfile
+
+from .atomic import commit_temp, temp_path_for
+from .runner import RunStats, record_result
+from .strip import DEFAULT_EXTENSIONS, strip_bytes
+
+# 后缀到归档格式的映射，较长的后缀在前
+ARCHIVE_FORMATS = (
+    ('.tar.gz', 'gz'), ('.tgz', 'gz'),
+    ('.tar.bz2', 'bz2'), ('.tbz2', 'bz2'),
+    ('.tar.xz', 'xz'), ('.txz', 'xz'),
+    ('.tar', 'tar'),
+    ('.zip', 'zip'),
+)
+
+# zip 能表示的最早时间
+_ZIP_EPOCH = (1980, 1, 1, 0, 0, 0)
+
+
+def archive_format(path):
+    """
+    按后缀判断归档格式
+
+    Returns:
+        str: 'zip'、'tar'、'gz'、'bz2'、'xz'，不是归档文件时为None
+    """
+    lower = path.lower()
+    for suffix, fmt in ARCHIVE_FORMATS:
+        if lower.endswith(suffix):
+            return fmt
+    return None
+
+
+class _Member:
+    """
+    归档文件中的一个成员
+
+    kind 为 'file'、'dir'、'link'（符号链接，data 为链接目标）或 'other'（硬链接、设备文件等，只有 tar 中会出现）
+    """
+
+    def __init__(self, name, kind, info, data=None):
+        self.name = name
+        self.kind = kind
+        self.info = info
+        self.data = data
+
+    @property
+    def mode(self):
+        # 包含文件类型位的 st_mode
+        info = self.info
+        if isinstance(info, zipfile.ZipInfo):
+            mode = info.external_attr >> 16
+            if mode:
+                return mode
+            return stat.S_IFDIR | 0o755 if self.kind == 'dir' else stat.S_IFREG | 0o644
+        if self.kind == 'dir':
+            return stat.S_IFDIR | info.mode
+        if self.kind == 'link':
+            return stat.S_IFLNK | info.mode
+        return stat.S_IFREG | info.mode
+
+    @property
+    def mtime(self):
+        if isinstance(self.info, zipfile.ZipInfo):
+            return int(time.mktime(self.info.date_time + (0, 0, -1)))
+        return int(self.info.mtime)
+
+
+def _read_zip(path):
+    # zip 可以随机访问，按名称排序后逐个读取，同时只有一个成员在内存中
+    with zipfile.ZipFile(path) as zf:
+        for info in sorted(zf.infolist(), key=lambda i: i.filename):
+            if info.is_dir():
+                yield _Member(info.filename, 'dir', info)
+            elif stat.S_ISLNK(info.external_attr >> 16):
+                yield _Member(info.filename, 'link', info, zf.read(info))
+            else:
+                yield _Member(info.filename, 'file', info, zf.read(info))
+
+
+def _read_tar(path):
+    # 压缩的 tar 不能高效地随机访问，以流的方式按存储顺序边解压边读取，不落盘，
+    # 同时只有一个成员在内存中；存储顺序由输入决定，输出同样是确定的
+    with tarfile.open(path, 'r|*') as tar:
+        for info in tar:
+            if info.isfile():
+                yield _Member(info.name, 'file', info, tar.extractfile(info).read())
+            elif info.isdir():
+                yield _Member(info.name, 'dir', info)
+            elif info.issym():
+                yield _Member(info.name, 'link', info, info.linkname.encode('utf-8'))
+            else:
+                yield _Member(info.name, 'other', info)
+
+
+def _strip_zip64(extra):
+    # 去掉 zip64 扩展字段，写入时由 zipfile 按新的大小重新生成
+    out = []
+    i = 0
+    while i + 4 <= len(extra):
+        header_id = int.from_bytes(extra[i:i + 2], 'little')
+        size = int.from_bytes(extra[i + 2:i + 4], 'little')
+        if header_id != 1:
+            out.append(extra[i:i + 4 + size])
+        i += 4 + size
+    return b''.join(out)
+
+
+class _ZipWriter:
+    def __init__(self, fileobj):
+        self._zf = zipfile.ZipFile(fileobj, 'w', zipfile.ZIP_DEFLATED)
+
+    def add(self, member, data):
+        source = member.info
+        if isinstance(source, zipfile.ZipInfo):
+            info = zipfile.ZipInfo(source.filename, source.date_time)
+            info.compress_type = source.compress_type
+            info.comment = source.comment
+            info.create_system = source.create_system
+            info.external_attr = source.external_attr
+            info.internal_attr = source.internal_attr
+            info.extra = _strip_zip64(source.extra)
+        else:
+            if member.kind == 'other':
+                raise ValueError("zip 不支持该类型的成员")
+            name = member.name + '/' if member.kind == 'dir' else member.name
+            info = zipfile.ZipInfo(name, max(time.localtime(member.mtime)[:6], _ZIP_EPOCH))
+            info.create_system = 3
+            info.external_attr = member.mode << 16
+            if member.kind == 'dir':
+                info.external_attr |= 0x10
+            else:
+                info.compress_type = zipfile.ZIP_DEFLATED
+        self._zf.writestr(info, data or b'')
+
+    def close(self, comment=b''):
+        self._zf.comment = comment
+        self._zf.close()
+
+
+class _TarWriter:
+    def __init__(self, fileobj, fmt):
+        self._gzip = None
+        if fmt == 'gz':
+            # tarfile 写入的 gzip 头中带有当前时间，自行创建以固定时间戳和文件名
+            self._gzip = gzip.GzipFile(filename='', mode='wb', fileobj=fileobj, mtime=0)
+            self._tar = tarfile.open(fileobj=self._gzip, mode='w', format=tarfile.PAX_FORMAT)
+        else:
+            mode = 'w' if fmt == 'tar' else 'w:' + fmt
+            self._tar = tarfile.open(fileobj=fileobj, mode=mode, format=tarfile.PAX_FORMAT)
+
+    def add(self, member, data):
+        source = member.info
+        if isinstance(source, tarfile.TarInfo):
+            info = copy.copy(source)
+            info.pax_headers = {k: v for k, v in source.pax_headers.items() if k != 'size'}
+        else:
+            info = tarfile.TarInfo(member.name.rstrip('/'))
+            info.mtime = member.mtime
+            info.mode = stat.S_IMODE(member.mode)
+            if member.kind == 'dir':
+                info.type = tarfile.DIRTYPE
+            elif member.kind == 'link':
+                info.type = tarfile.SYMTYPE
+                info.linkname = data.decode('utf-8')
+        if member.kind == 'file':
+            info.size = len(data)
+            self._tar.addfile(info, io.BytesIO(data))
+        else:
+            self._tar.addfile(info)
+
+    def close(self, comment=b''):
+        self._tar.close()
+        if self._gzip is not None:
+            self._gzip.close()
+
+
+def strip_member(data, file_type, options=None):
+    """
+    去掉一个成员中的注释，编码识别、换行和 BOM 的处理与磁盘上的文件相同
+
+    Args:
+        data (bytes): 成员内容
+        file_type (str): 文件类型
+        options (dict, optional): 传给 strip_source 的选项
+
+    Returns:
+        bytes: 去注释后的内容
+    """
+    return strip_bytes(data, file_type, **(options or {}))
+
+
+def process_archive(src_path, dst_path=None, extensions=None, options=None, stats=None,
+                    ignore=None, report=None):
+    """
+    处理归档文件中的所有支持的文件，写入新的归档文件
+
+    Args:
+        src_path (str): 输入的归档文件
+        dst_path (str, optional): 输出的归档文件，格式由后缀决定，后缀不是归档格式时与输入相同；
+                                  不指定时覆盖输入文件
+        extensions (dict, optional): 扩展名到处理类型的映射，默认全部类型
+        options (dict, optional): 传给 strip_source 的选项
+        stats (RunStats, optional): 用于收集统计信息和错误列表
+        ignore (IgnoreRules, optional): 排除规则，被排除的成员原样复制
+        report (Report, optional): 性能报告，每个处理的成员一条记录
+
+    Returns:
+        tuple: (成功处理的文件数, 处理失败的文件数)
+    """
+    if extensions is None:
+        extensions = DEFAULT_EXTENSIONS
+    if stats is None:
+        stats = RunStats()
+    if dst_path is None:
+        dst_path = src_path
+    start = time.perf_counter()
+
+    if zipfile.is_zipfile(src_path):
+        src_format = 'zip'
+        members = _read_zip(src_path)
+        with zipfile.ZipFile(src_path) as zf:
+            comment = zf.comment
+    elif tarfile.is_tarfile(src_path):
+        src_format = archive_format(src_path) or 'tar'
+        members = _read_tar(src_path)
+        comment = b''
+    else:
+        raise ValueError(f"无法识别的归档文件: {src_path}")
+    fmt = archive_format(dst_path) or src_format
+
+    tmp_path = temp_path_for(dst_path)
+    try:
+        with open(tmp_path, 'wb') as f:
+            writer = _ZipWriter(f) if fmt == 'zip' else _TarWriter(f, fmt)
+            for member in members:
+                data = member.data
+                _, ext = os.path.splitext(member.name)
+                file_type = extensions.get(ext.lower())
+                if member.kind == 'file' and file_type is not None:
+                    if ignore is not None and ignore.is_excluded(member.name):
+                        stats.pruned_count += 1
+                    else:
+                        data = _strip_entry(member, file_type, options, stats, report, src_path)
+                try:
+                    writer.add(member, data)
+                except ValueError as e:
+                    print(f"处理文件 {os.path.join(src_path, member.name)} 时出错: {e}")
+                    stats.add_error(os.path.join(src_path, member.name), str(e))
+            writer.close(comment)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    commit_temp(tmp_path, dst_path)
+    if report is not None:
+        report.add_stage('process', time.perf_counter() - start)
+    return stats.success_count, stats.fail_count
+
+
+def _strip_entry(member, file_type, options, stats, report, src_path):
+    """
+    处理一个源文件成员并计入统计信息，出错时返回原内容
+    """
+    metrics = {'bytes_in': len(member.data)} if report is not None else None
+    start = time.perf_counter()
+    try:
+        data = strip_member(member.data, file_type, options)
+        error = None
+    except Exception as e:
+        data = member.data
+        error = str(e)
+    if metrics is not None:
+        metrics['strip'] = time.perf_counter() - start
+        metrics['bytes_out'] = len(data)
+    task = (os.path.join(src_path, member.name), None, file_type, member.name)
+    record_result(task, (error, False, None, True, metrics), stats, report=report)
+    return data
@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""
+原子写入
+
+先与已有的目标文件比较，内容完全相同时不写入（保留修改时间，下游的增量构建和 rsync
+不会认为文件有变化）；否则写入同目录下的临时文件，再用 os.replace 原子地替换目标文件，
+中途崩溃不会留下截断的文件。
+"""
+
+import functools
+import glob
+import os
+import tempfile
+
+_COMPARE_CHUNK = 1024 * 1024
+
+
+@functools.lru_cache(maxsize=1)
+def _process_umask():
+    # 不修改 umask 就无法用 os.umask 读取（修改会与其他线程中新建的文件竞争），
+    # Linux 上从 /proc 读取，其他平台返回None
+    try:
+        with open('/proc/self/status', 'r', encoding='ascii', errors='replace') as f:
+            for line in f:
+                if line.startswith('Umask:'):
+                    return int(line.split()[1], 8)
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def _new_file_mode(directory):
+    """
+    返回在 directory 中新建文件时与 open(path, 'w') 一致的权限
+    """
+    umask = _process_umask()
+    if umask is not None:
+        return 0o666 & ~umask
+    # 读不到 umask 时新建一个文件，看系统实际给出的权限
+    fd, probe = tempfile.mkstemp(prefix='.mode.', suffix='.tmp', dir=directory)
+    os.close(fd)
+    os.remove(probe)
+    fd = os.open(probe, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        return os.fstat(fd).st_mode & 0o777
+    finally:
+        os.close(fd)
+        os.remove(probe)
+
+
+def encode_text(text):
+    """
+    按文本模式写入时的换行转换和 utf-8 编码，得到实际写入磁盘的字节
+    """
+    if os.linesep != '\n':
+        text = text.replace('\n', os.linesep)
+    return text.encode('utf-8')
+
+
+def same_content(path, data):
+    """
+    判断文件内容是否与 data 完全相同，文件不存在时返回False
+    """
+    try:
+        if os.path.getsize(path) != len(data):
+            return False
+        with open(path, 'rb') as f:
+            return f.read() == data
+    except OSError:
+        return False
+
+
+def same_files(path_a, path_b):
+    """
+    按块比较两个文件的内容
+    """
+    try:
+        if os.path.getsize(path_a) != os.path.getsize(path_b):
+            return False
+        with open(path_a, 'rb') as a, open(path_b, 'rb') as b:
+            while True:
+                chunk_a = a.read(_COMPARE_CHUNK)
+                if chunk_a != b.read(_COMPARE_CHUNK):
+                    return False
+                if not chunk_a:
+                    return True
+    except OSError:
+        return False
+
+
+def temp_path_for(path):
+    """
+    在目标文件所在目录创建一个空的临时文件，返回其路径
+    """
+    directory, name = os.path.split(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=f'.{name}.', suffix='.tmp', dir=directory)
+    os.close(fd)
+    return tmp_path
+
+
+def remove_temp_files(path):
+    """
+    删除写入 path 时留下的临时文件，用于写入中途被强制结束的进程之后
+
+    Returns:
+        int: 删除的文件数
+    """
+    removed = 0
+    for target in {os.path.abspath(path), os.path.realpath(path)}:
+        directory, name = os.path.split(target)
+        for tmp_path in glob.glob(os.path.join(glob.escape(directory), glob.escape(f'.{name}.') + '*.tmp')):
+            try:
+                os.remove(tmp_path)
+                removed += 1
+            except OSError:
+                pass
+    return removed
+
+
+def _replace(tmp_path, path):
+    # 目标文件已存在时沿用其权限
+    try:
+        mode = os.stat(path).st_mode & 0o7777
+    except OSError:
+        mode = _new_file_mode(os.path.dirname(os.path.abspath(path)))
+    os.chmod(tmp_path, mode)
+    os.replace(tmp_path, path)
+
+
+def commit_temp(tmp_path, path):
+    """
+    用临时文件替换目标文件；内容相同时删除临时文件并保留原文件
+
+    Returns:
+        bool: 是否替换了目标文件
+    """
+    try:
+        if same_files(tmp_path, path):
+            os.remove(tmp_path)
+            return False
+        _replace(tmp_path, path)
+        return True
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def write_text(path, text):
+    """
+    以 utf-8 写入文本，内容未变时跳过，否则原子替换
+
+    Args:
+        path (str): 目标文件路径
+        text (str): 要写入的文本
+
+    Returns:
+        bool: 是否写入了文件，内容未变时为False
+    """
+    return write_bytes(path, encode_text(text))
+
+
+def write_bytes(path, data):
+    """
+    写入字节内容，内容未变时跳过，否则原子替换
+
+    Args:
+        path (str): 目标文件路径
+        data (bytes): 要写入的内容
+
+    Returns:
+        bool: 是否写入了文件，内容未变时为False
+    """
+    # 目标是符号链接时与 open(path, 'w') 一样写入链接指向的文件
+    path = os.path.realpath(path)
+    if same_content(path, data):
+        return False
+
+    tmp_path = temp_path_for(path)
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        _replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return True
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+把去注释后的 Python 文件编译为 __pycache__ 中的 .pyc
+
+编译同时起到校验作用：去注释后无法编译的文件作为处理失败报告，而不是被悄悄交付出去。
+每个优化级别对应一个 .pyc：0 为普通运行时加载的 .pyc，1 和 2 分别对应 python -O / -OO
+（2 同时去掉文档字符串），只有以相应参数运行时才会加载。
+.pyc 已与源文件的修改时间和大小对应时跳过。
+"""
+
+import importlib.util
+import os
+import py_compile
+
+# 默认只生成普通运行时加载的 .pyc
+DEFAULT_LEVELS = (0,)
+
+
+def pyc_path(source_path, level=0):
+    """
+    返回源文件在指定优化级别下的 .pyc 路径
+    """
+    return importlib.util.cache_from_source(source_path, optimization=level if level else '')
+
+
+def _is_fresh(source_path, cfile):
+    # 基于时间戳的 .pyc 头部：魔数、标志位(0)、修改时间、大小，见 PEP 552
+    try:
+        st = os.stat(source_path)
+        with open(cfile, 'rb') as f:
+            header = f.read(16)
+    except OSError:
+        return False
+    if len(header) < 16 or header[:4] != importlib.util.MAGIC_NUMBER or header[4:8] != b'\0\0\0\0':
+        return False
+    return (int.from_bytes(header[8:12], 'little') == int(st.st_mtime) & 0xFFFFFFFF
+            and int.from_bytes(header[12:16], 'little') == st.st_size & 0xFFFFFFFF)
+
+
+def _describe(error, source_path, output_path):
+    message = str(error.exc_value)
+    if source_path is None or os.path.abspath(source_path) == os.path.abspath(output_path):
+        return f"无法编译: {message}"
+    try:
+        with open(source_path, 'rb') as f:
+            compile(f.read(), source_path, 'exec', dont_inherit=True)
+    except (SyntaxError, ValueError):
+        return f"源文件本身无法编译: {message}"
+    return f"去注释后无法编译: {message}"
+
+
+def compile_output(output_path, levels=DEFAULT_LEVELS, source_path=None):
+    """
+    编译一个去注释后的 Python 文件，写出各优化级别的 .pyc
+
+    Args:
+        output_path (str): 去注释后的文件
+        levels (iterable): 优化级别，0、1 或 2
+        source_path (str, optional): 原始文件，编译失败时用于判断是否是去注释引起的
+
+    Returns:
+        bool: 是否写入了 .pyc，全部已是最新时为False
+
+    Raises:
+        ValueError: 无法编译
+    """
+    written = False
+    for level in levels:
+        cfile = pyc_path(output_path, level)
+        if _is_fresh(output_path, cfile):
+            continue
+        try:
+            py_compile.compile(output_path, cfile=cfile, doraise=True, optimize=level)
+        except py_compile.PyCompileError as e:
+            raise ValueError(_describe(e, source_path, output_path)) from None
+        written = True
+    return written
@@ -0,0 +1,318 @@
+# -*- coding: utf-8 -*-
+"""
+跨项目、跨次运行共享的去注释结果缓存
+
+很多项目内置了相同的第三方库，同样的文件内容会被反复去注释。缓存以
+“内容哈希 + 文件类型 + 选项（含引擎版本）”为键保存去注释后的字节，
+内容相同的文件无论位于哪个项目、哪个目录，第二次起都直接取出结果。
+
+存储为一个 SQLite 数据库（WAL 模式），多个进程可以同时读写：
+读取互不阻塞，写入在短事务中进行，等待锁的时间超过 timeout 才失败。
+命中不开启写事务：命中次数和最近使用时间先记在本进程的内存中，累计一定次数、
+下一次写入结果、close() 或进程退出时再一起写入。
+总大小超过 max_bytes 时按最近使用时间淘汰（LRU），一次淘汰到上限的 90%。
+命中、未命中和淘汰次数保存在数据库中，可以用 stats() 查看。
+
+缓存出错（数据库损坏、磁盘已满等）时只当作未命中，不影响处理结果。
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from .strip import ENGINE_VERSION, strip_bytes
+
+# 缓存数据库的默认大小上限
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# 最近使用时间的精度（秒），在此时间内再次命中不更新，减少写入
+_TOUCH_INTERVAL = 60
+
+# 内存中累计这么多次命中后写入数据库
+_FLUSH_HITS = 256
+
+# 淘汰后保留的比例
+_LOW_WATER = 0.9
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    data BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    atime REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_atime ON entries (atime);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO counters VALUES ('bytes', 0), ('hits', 0), ('misses', 0), ('evictions', 0);
+'''
+
+
+def default_cache_path():
+    """
+    返回默认的缓存数据库路径：$XDG_CACHE_HOME（默认 ~/.cache）或 Windows 的 %LOCALAPPDATA% 下
+    """
+    base = os.environ.get('XDG_CACHE_HOME') or os.environ.get('LOCALAPPDATA') \
+        or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'strip-comments', 'results.sqlite')
+
+
+def _options_key(file_type, options):
+    # 输出的换行符随系统而不同，也作为键的一部分
+    return json.dumps([file_type, options or {}, ENGINE_VERSION, os.linesep], sort_keys=True)
+
+
+class ResultCache:
+    """
+    去注释结果缓存
+
+    可以传给多进程的工作进程：只传递路径和参数，每个进程（线程）使用自己的连接。
+
+    Args:
+        path (str, optional): 数据库文件路径，默认 default_cache_path()
+        max_bytes (int): 缓存内容的大小上限（字节）
+        timeout (float): 等待其他进程释放写锁的最长时间（秒）
+
+    Attributes:
+        hits (int): 本对象（本进程）的命中次数
+        misses (int): 本对象（本进程）的未命中次数
+        errors (int): 读写缓存出错的次数
+    """
+
+    def __init__(self, path=None, max_bytes=DEFAULT_MAX_BYTES, timeout=30.0):
+        self.path = os.path.abspath(path or default_cache_path())
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._local = threading.local()
+        # 尚未写入数据库的命中次数，以及需要更新最近使用时间的键
+        self._lock = threading.Lock()
+        self._pending_hits = 0
+        self._touched = {}
+        self._finalizer = None
+
+    def __getstate__(self):
+        return {'path': self.path, 'max_bytes': self.max_bytes, 'timeout': self.timeout}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            # 自动提交模式，需要时显式开始事务
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+            if self._finalizer is None:
+                # 工作进程不会调用 close()，退出时写入尚未写入的命中统计
+                from multiprocessing import util
+
+                self._finalizer = util.Finalize(None, self.flush, exitpriority=10)
+        return conn
+
+    def close(self):
+        self.flush()
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @staticmethod
+    def make_key(data, file_type, options=None):
+        """
+        计算缓存键：文件内容的哈希加上文件类型和选项
+        """
+        digest = hashlib.sha256(data)
+        digest.update(b'\0')
+        digest.update(_options_key(file_type, options).encode('utf-8'))
+        return digest.hexdigest()
+
+    def get(self, key):
+        """
+        取出缓存的结果，不存在时返回None
+
+        只读取数据库；命中次数和最近使用时间记在内存中，稍后由 flush() 写入
+        """
+        try:
+            conn = self._connect()
+            row = conn.execute('SELECT data, atime FROM entries WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+        except (sqlite3.Error, OSError):
+            self.errors += 1
+            return None
+        now = time.time()
+        with self._lock:
+            self._pending_hits += 1
+            if now - row[1] > _TOUCH_INTERVAL:
+                self._touched[key] = now
+            full = self._pending_hits >= _FLUSH_HITS
+        if full:
+            self.flush()
+        self.hits += 1
+        return row[0]
+
+    def _take_pending(self):
+        with self._lock:
+            hits, touched = self._pending_hits, self._touched
+            self._pending_hits = 0
+            self._touched = {}
+        return hits, touched
+
+    def flush(self):
+        """
+        把内存中累计的命中次数和最近使用时间写入数据库
+        """
+        hits, touched = self._take_pending()
+        if not (hits or touched):
+            return
+        try:
+            conn = self._connect()
+            with _transaction(conn):
+                _write_pending(conn, hits, touched)
+        except (sqlite3.Error, OSError):
+            self.errors += 1
+
+    def put(self, key, data, missed=True):
+        """
+        保存结果，总大小超过上限时淘汰最久未使用的条目
+
+        Args:
+            key (str): make_key 得到的键
+            data (bytes): 去注释后的内容
+            missed (bool): 是否同时把一次未命中计入数据库中的统计
+        """
+        size = len(data)
+        try:
+            conn = self._connect()
+            hits, touched = self._take_pending()
+            with _transaction(conn):
+                # 顺便写入累计的命中统计
+                _write_pending(conn, hits, touched)
+                if missed:
+                    _count(conn, 'misses', 1)
+                if size > self.max_bytes:
+                    return
+                row = conn.execute('SELECT size FROM entries WHERE key = ?', (key,)).fetchone()
+                conn.execute('INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)',
+                             (key, sqlite3.Binary(data), size, time.time()))
+                total = _count(conn, 'bytes', size - (row[0] if row else 0))
+                if total > self.max_bytes:
+                    _evict(conn, total - int(self.max_bytes * _LOW_WATER))
+        except (sqlite3.Error, OSError):
+            self.errors += 1
+
+    def strip(self, data, file_type='py', options=None, metrics=None):
+        """
+        去注释，结果已在缓存中时直接取出
+
+        Args:
+            data (bytes): 文件内容
+            file_type (str): 文件类型
+            options (dict, optional): 传给 strip_source 的选项
+            metrics (dict, optional): 记录 cache: 'hit' 或 'miss'
+
+        Returns:
+            bytes: 与 strip_bytes 相同的结果
+        """
+        key = self.make_key(data, file_type, options)
+        cleaned = self.get(key)
+        if cleaned is None:
+            cleaned = strip_bytes(data, file_type, **(options or {}))
+            self.put(key, cleaned)
+            status = 'miss'
+        else:
+            status = 'hit'
+        if metrics is not None:
+            metrics['cache'] = status
+        return cleaned
+
+    def stats(self):
+        """
+        返回数据库中累计的统计：条目数、总字节数、命中、未命中和淘汰次数
+
+        Returns:
+            dict: {entries, bytes, max_bytes, hits, misses, evictions, hit_rate}
+        """
+        self.flush()
+        conn = self._connect()
+        counters = dict(conn.execute('SELECT name, value FROM counters'))
+        entries = conn.execute('SELECT count(*) FROM entries').fetchone()[0]
+        lookups = counters['hits'] + counters['misses']
+        return {
+            'entries': entries,
+            'bytes': counters['bytes'],
+            'max_bytes': self.max_bytes,
+            'hits': counters['hits'],
+            'misses': counters['misses'],
+            'evictions': counters['evictions'],
+            'hit_rate': counters['hits'] / lookups if lookups else None,
+        }
+
+    def clear(self):
+        """
+        清空缓存和统计
+        """
+        self._take_pending()
+        conn = self._connect()
+        with _transaction(conn):
+            conn.execute('DELETE FROM entries')
+            conn.execute('UPDATE counters SET value = 0')
+
+
+@contextlib.contextmanager
+def _transaction(conn):
+    # BEGIN IMMEDIATE 立即取得写锁，避免两个进程都先读后写时互相等待而失败
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        yield conn
+    except BaseException:
+        conn.execute('ROLLBACK')
+        raise
+    conn.execute('COMMIT')
+
+
+def _write_pending(conn, hits, touched):
+    if touched:
+        conn.executemany('UPDATE entries SET atime = ? WHERE key = ? AND atime < ?',
+                         [(atime, key, atime) for key, atime in touched.items()])
+    if hits:
+        _count(conn, 'hits', hits)
+
+
+def _count(conn, name, delta):
+    conn.execute('UPDATE counters SET value = value + ? WHERE name = ?', (delta, name))
+    return conn.execute('SELECT value FROM counters WHERE name = ?', (name,)).fetchone()[0]
+
+
+def _evict(conn, excess):
+    # 按最近使用时间从旧到新删除，直到释放 excess 字节
+    keys = []
+    freed = 0
+    for key, size in conn.execute('SELECT key, size FROM entries ORDER BY atime'):
+        keys.append((key,))
+        freed += size
+        if freed >= excess:
+            break
+    conn.executemany('DELETE FROM entries WHERE key = ?', keys)
+    _count(conn, 'bytes', -freed)
+    _count(conn, 'evictions', len(keys))
@@ -0,0 +1,387 @@
+# -*- coding: utf-8 -*-
+"""
+命令行入口
+
+不导入 tkinter / tkinterdnd2，可在无界面的构建机上直接使用：
+
+    python -m engine src/ -o dist/ -t py,js
+    python pro.py src/ -o dist/
+    python pro+.py src/ --keep-header -j 0
+    python pro.py release.tar.gz -o dist/release.tar.gz
+    python pro.py src/ -o dist/ --watch
+    python pro.py src/ --analyze
+    python pro.py src/ -o dist/ --since v1.2
+    python pro.py web/ -o dist/ --skip-generated --max-size 5
+"""
+
+import argparse
+import contextlib
+import os
+import re
+import time
+
+from .header import LICENSE_PATTERNS
+from .report import Report, profiling
+from .runner import RunStats, make_task, process_tree, run_tasks
+from .sniff import SkipRules
+from .strip import extensions_for
+from .walk import DEFAULT_EXCLUDES, IgnoreRules
+
+FILE_TYPES = ('py', 'js', 'html', 'css')
+
+# 各脚本的默认选项：pro.py 处理全部类型；pro+.py 只处理Python、删除空行并保留头部注释
+PROFILES = {
+    'pro': {'file_types': list(FILE_TYPES), 'keep_header': False, 'drop_blank_lines': False},
+    'pro+': {'file_types': ['py'], 'keep_header': True, 'drop_blank_lines': True},
+}
+
+
+def _parse_file_types(value):
+    file_types = [t.strip().lower() for t in value.split(',') if t.strip()]
+    for file_type in file_types:
+        if file_type not in FILE_TYPES:
+            raise argparse.ArgumentTypeError(f"不支持的文件类型: {file_type}")
+    if not file_types:
+        raise argparse.ArgumentTypeError("请至少指定一种文件类型")
+    return file_types
+
+
+def _parse_pattern(value):
+    try:
+        re.compile(value)
+    except re.error as e:
+        raise argparse.ArgumentTypeError(f"无效的正则表达式 {value}: {e}") from None
+    return value
+
+
+def _parse_levels(value):
+    try:
+        levels = sorted({int(level) for level in value.split(',') if level.strip()})
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"无效的优化级别: {value}") from None
+    if not levels or any(level not in (0, 1, 2) for level in levels):
+        raise argparse.ArgumentTypeError(f"优化级别只能是 0、1、2: {value}")
+    return tuple(levels)
+
+
+def build_parser(profile='pro', prog=None):
+    """
+    构建命令行参数解析器
+
+    Args:
+        profile (str): 默认选项集，'pro' 或 'pro+'
+        prog (str, optional): 程序名
+
+    Returns:
+        argparse.ArgumentParser: 参数解析器
+    """
+    defaults = PROFILES[profile]
+    parser = argparse.ArgumentParser(prog=prog, description="移除源代码中的注释")
+    parser.add_argument('paths', nargs='+', help="要处理的文件、目录或归档文件（.zip、.tar.gz 等）")
+    parser.add_argument('-o', '--output-dir',
+                        help="输出目录，保持原始目录结构；处理单个归档文件时也可以是输出的归档文件名；"
+                             "不指定时覆盖原文件")
+    parser.add_argument('--no-recursive', dest='recursive', action='store_false',
+                        help="只处理目录的顶层，不递归子目录")
+    parser.add_argument('-t', '--types', dest='file_types', type=_parse_file_types,
+                        default=','.join(defaults['file_types']),
+                        help="要处理的文件类型，逗号分隔 (默认: %(default)s)")
+    parser.add_argument('--keep-header', action=argparse.BooleanOptionalAction,
+                        default=defaults['keep_header'],
+                        help="保留Python头部注释（shebang、编码声明和文件信息注释）")
+    parser.add_argument('--keep-license', action='store_true',
+                        help="同时保留文件开头的许可证注释块（SPDX-License-Identifier、Copyright、License），"
+                             "隐含 --keep-header")
+    parser.add_argument('--header-pattern', dest='header_patterns', action='append', default=[],
+                        type=_parse_pattern, metavar='REGEX',
+                        help="同时保留文件开头与正则表达式匹配的注释块或文档字符串（如公司横幅），可多次指定，"
+                             "隐含 --keep-header")
+    parser.add_argument('--drop-blank-lines', action=argparse.BooleanOptionalAction,
+                        default=defaults['drop_blank_lines'],
+                        help="删除Python代码中的所有空白行")
+    parser.add_argument('--keep-pre', dest='keep_preformatted', action='store_true',
+                        help="原样保留HTML中 <pre> 和 <textarea> 的内容")
+    parser.add_argument('--keep-conditional-comments', action='store_true',
+                        help="保留HTML中的IE条件注释（<!--[if IE]> ... <![endif]-->）")
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help="并行进程数，0表示使用全部CPU核心 (默认: 串行)")
+    parser.add_argument('--io-concurrency', type=int, default=None, metavar='N',
+                        help="使用异步 I/O 流水线，同时进行 N 个读写，适合 NFS 等高延迟文件系统")
+    parser.add_argument('--mirror', nargs='?', const='copy', choices=('copy', 'link'), default=None,
+                        help="同时把其他文件（图片、JSON 等）镜像到输出目录，已相同的跳过；"
+                             "link 表示同一文件系统上使用硬链接 (默认: copy)")
+    parser.add_argument('--compile', dest='compile_levels', nargs='?', const=(0,), type=_parse_levels,
+                        default=None, metavar='LEVELS',
+                        help="用 compile() 校验去注释后的Python文件并生成 __pycache__ 中的 .pyc，无法编译的计为失败；"
+                             "LEVELS 为逗号分隔的优化级别，1 对应 python -O，2 对应 -OO（同时去掉文档字符串），"
+                             "只有以相应参数运行时才会加载 (默认: 0)")
+    parser.add_argument('-n', '--analyze', action='store_true',
+                        help="只分析不写入：统计将删除的注释行数和字节数，列出去注释前后记号变化可疑的文件，"
+                             "并估计处理耗时；有可疑或失败的文件时退出码为1")
+    parser.add_argument('--watch', action='store_true',
+                        help="同步一次后持续监视目录，只重新处理新建或修改的文件并删除已删除文件的输出，需要指定 -o")
+    parser.add_argument('--poll', dest='poll_interval', type=float, default=None, metavar='SECONDS',
+                        help="监视时不使用 inotify，每隔指定秒数轮询一次（适合网络文件系统）")
+    parser.add_argument('--incremental', action='store_true',
+                        help="增量处理：跳过内容和选项都未变化、输出仍为最新的文件")
+    parser.add_argument('--skip-generated', action='store_true',
+                        help="按文件名和开头几 KB 的内容跳过压缩、打包和生成的文件（*.min.js、含 sourceMappingURL、"
+                             "@generated / DO NOT EDIT 标记、平均行长过长），输出到其他目录时原样复制")
+    parser.add_argument('--max-size', type=float, default=None, metavar='MB',
+                        help="跳过超过该大小的文件，输出到其他目录时原样复制")
+    parser.add_argument('--timeout', type=float, default=None, metavar='SECONDS',
+                        help="每个文件的处理时间上限，每个文件在独立的工作进程中处理，超时的强制结束并计为失败，"
+                             "其余文件照常完成；可与 --max-size 一起限制病态的输入")
+    parser.add_argument('--since', nargs='?', const='', default=None, metavar='REF',
+                        help="只处理本地 git 仓库中自提交 REF（提交、标签或分支）以来新增或修改的文件，"
+                             "并删除已删除文件的输出；不指定 REF 时只处理工作区中尚未提交的修改；"
+                             "目录不是 git 工作区时处理全部文件")
+    parser.add_argument('--cache', dest='cache_path', nargs='?', const='', default=None, metavar='FILE',
+                        help="使用跨项目共享的结果缓存，内容、类型和选项都相同的文件直接取出上次的结果；"
+                             "FILE 为 SQLite 数据库路径 (默认: $XDG_CACHE_HOME 或 %%LOCALAPPDATA%% 下的 strip-comments/results.sqlite)")
+    parser.add_argument('--cache-size', type=int, default=None, metavar='MB',
+                        help="结果缓存的大小上限，超过时淘汰最久未使用的结果 (默认: 512)")
+    parser.add_argument('--manifest', dest='manifest_path', default=None,
+                        help="增量清单文件路径 (默认: 输出目录下的 .strip_manifest.json)")
+    parser.add_argument('--exclude', dest='excludes', action='append', default=[], metavar='PATTERN',
+                        help="排除匹配的文件或目录，.gitignore 风格的模式，可多次指定")
+    parser.add_argument('--exclude-from', action='append', default=[], metavar='FILE',
+                        help="从文件读取排除模式，可多次指定")
+    parser.add_argument('--gitignore', action='store_true',
+                        help="遵循各级目录中的 .gitignore 文件")
+    parser.add_argument('--no-default-excludes', dest='default_excludes', action='store_false',
+                        help="不跳过默认排除的目录 (%s)" % ', '.join(sorted(DEFAULT_EXCLUDES)))
+    parser.add_argument('--report', dest='report_path', metavar='FILE',
+                        help="写出性能报告：每个文件的读取、去注释、写入耗时和字节数，.csv 为 CSV，其他为 JSON；"
+                             "与 --analyze 一起使用时写出分析结果")
+    parser.add_argument('--profile', dest='profile_path', metavar='FILE',
+                        help="用 cProfile 剖析处理过程并保存结果，可用 python -m pstats 查看（建议串行处理）")
+    parser.add_argument('--trace-memory', action='store_true',
+                        help="用 tracemalloc 记录峰值内存（会明显拖慢处理）")
+    return parser
+
+
+def _settings(args):
+    """
+    Returns:
+        tuple: (扩展名映射, strip_source 选项, 排除规则)
+    """
+    extensions = extensions_for(args.file_types)
+    header_patterns = (list(LICENSE_PATTERNS) if args.keep_license else []) + args.header_patterns
+    options = {'keep_header': args.keep_header or bool(header_patterns),
+               'drop_blank_lines': args.drop_blank_lines,
+               'keep_preformatted': args.keep_preformatted,
+               'keep_conditional_comments': args.keep_conditional_comments,
+               'header_patterns': header_patterns}
+    patterns = list(args.excludes)
+    for path in args.exclude_from:
+        with open(path, 'r', encoding='utf-8') as f:
+            patterns.extend(f.read().splitlines())
+    ignore = IgnoreRules(patterns, DEFAULT_EXCLUDES if args.default_excludes else (), args.gitignore)
+    return extensions, options, ignore
+
+
+def _skip_rules(args):
+    if not args.skip_generated and args.max_size is None:
+        return None
+    max_size = int(args.max_size * 1024 * 1024) if args.max_size is not None else None
+    return SkipRules(max_size, generated=args.skip_generated)
+
+
+def _open_cache(args):
+    if args.cache_path is None:
+        return None
+    # cache 模块导入 sqlite3，只在使用 --cache 时才导入
+    from .cache import DEFAULT_MAX_BYTES, ResultCache
+    max_bytes = DEFAULT_MAX_BYTES if args.cache_size is None else args.cache_size * 1024 * 1024
+    return ResultCache(args.cache_path or None, max_bytes)
+
+
+def _archive_format(path):
+    # 归档相关模块（zipfile、tarfile 等）导入较慢，只在输入是文件时才导入
+    from .archive import archive_format
+    return archive_format(path)
+
+
+def run(args, report=None, cache=None):
+    """
+    按解析后的参数执行处理
+
+    Args:
+        args (argparse.Namespace): build_parser 解析得到的参数
+        report (Report, optional): 性能报告，记录每个文件各阶段的耗时和字节数
+        cache (ResultCache, optional): 结果缓存
+
+    Returns:
+        RunStats: 统计信息
+    """
+    extensions, options, ignore = _settings(args)
+    skip = _skip_rules(args)
+    stats = RunStats()
+    since = args.since
+    if since == '':
+        # 不指定 REF 时只处理工作区中尚未提交的修改；gitdiff 模块导入 subprocess，只在使用 --since 时才导入
+        from .gitdiff import WORKING_TREE
+        since = WORKING_TREE
+
+    for path in args.paths:
+        if os.path.isdir(path):
+            try:
+                process_tree(path, args.output_dir, args.recursive, extensions, options,
+                             workers=args.workers, stats=stats,
+                             incremental=args.incremental, manifest_path=args.manifest_path, ignore=ignore,
+                             report=report, io_concurrency=args.io_concurrency, mirror=args.mirror,
+                             compile_levels=args.compile_levels, cache=cache, since=since, skip=skip,
+                             timeout=args.timeout)
+            except ValueError as e:
+                # --since 指定的提交不存在
+                print(f"处理目录 {path} 时出错: {e}")
+                stats.add_error(path, str(e))
+        elif os.path.isfile(path) and _archive_format(path):
+            from .archive import archive_format, process_archive
+            output_path = None
+            if args.output_dir:
+                # -o 为归档文件名时直接写入该文件，格式由其后缀决定；否则写入输出目录下的同名文件
+                if archive_format(args.output_dir):
+                    output_path = args.output_dir
+                else:
+                    output_path = os.path.join(args.output_dir, os.path.basename(path))
+                os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+            try:
+                process_archive(path, output_path, extensions, options, stats, ignore, report)
+            except Exception as e:
+                print(f"处理归档文件 {path} 时出错: {e}")
+                stats.add_error(path, str(e))
+        elif os.path.isfile(path):
+            _, ext = os.path.splitext(path)
+            ext = ext.lower()
+            if ext not in extensions:
+                print(f"不支持的文件类型: {ext or path}")
+                stats.add_error(path, f"不支持的文件类型: {ext}")
+                continue
+            # 与目录中的文件处理方式相同：--skip-generated / --max-size 按内容跳过并记录原因，
+            # 指定 --timeout 时在可以强制结束的独立工作进程中处理
+            task = make_task(path, os.path.basename(path), extensions[ext], args.output_dir)
+            run_tasks([task], options, stats=stats, report=report, compile_levels=args.compile_levels,
+                      cache=cache, skip=skip, timeout=args.timeout)
+        else:
+            print(f"路径不存在: {path}")
+            stats.add_error(path, "路径不存在")
+
+    return stats
+
+
+def analyze(args):
+    """
+    分析模式：按与 run 相同的方式遍历，但不写入任何文件
+
+    Returns:
+        tuple: (Analysis, 无法分析的路径数)
+    """
+    from .analyze import Analysis, analyze_file, analyze_tree
+
+    extensions, options, ignore = _settings(args)
+    analysis = Analysis()
+    invalid = 0
+    for path in args.paths:
+        if os.path.isdir(path):
+            analyze_tree(path, args.recursive, extensions, options, args.workers, ignore, analysis=analysis)
+        elif os.path.isfile(path):
+            file_type = extensions.get(os.path.splitext(path)[1].lower())
+            if file_type is None:
+                print(f"不支持分析的文件: {path}")
+                invalid += 1
+                continue
+            metrics = {}
+            try:
+                analysis.add(path, file_type, analyze_file(path, file_type, options, metrics), metrics)
+            except Exception as e:
+                analysis.add(path, file_type, metrics=metrics, error=str(e))
+        else:
+            print(f"路径不存在: {path}")
+            invalid += 1
+    return analysis, invalid
+
+
+def watch(args):
+    """
+    监视模式，直到按下 Ctrl+C
+
+    Returns:
+        int: 退出码
+    """
+    from .watch import watch_tree
+
+    extensions, options, ignore = _settings(args)
+
+    def on_batch(stats, removed):
+        if stats.processed_count or stats.fail_count or removed:
+            text = stats.summary()
+            if removed:
+                text += f"，删除输出: {len(removed)}"
+            print(f"[{time.strftime('%H:%M:%S')}] {text}")
+
+    path = args.paths[0]
+    print(f"正在监视 {path}，按 Ctrl+C 停止")
+    kwargs = {'use_inotify': False, 'poll_interval': args.poll_interval} if args.poll_interval else {}
+    try:
+        watch_tree(path, args.output_dir, args.recursive, extensions, options, ignore, args.manifest_path,
+                   on_batch, **kwargs)
+    except KeyboardInterrupt:
+        print("已停止监视")
+    return 0
+
+
+def main(argv=None, profile='pro', prog=None):
+    """
+    命令行主函数
+
+    Args:
+        argv (list, optional): 命令行参数，默认取 sys.argv[1:]
+        profile (str): 默认选项集，'pro' 或 'pro+'
+        prog (str, optional): 程序名
+
+    Returns:
+        int: 退出码，全部成功时为0
+    """
+    parser = build_parser(profile, prog)
+    args = parser.parse_args(argv)
+    if args.watch:
+        if len(args.paths) != 1 or not os.path.isdir(args.paths[0]):
+            parser.error("--watch 只能用于一个目录")
+        if not args.output_dir:
+            parser.error("--watch 需要用 -o 指定输出目录")
+        return watch(args)
+    if args.analyze:
+        analysis, invalid = analyze(args)
+        workers = (os.cpu_count() or 1) if args.workers == 0 else (args.workers or 1)
+        print(analysis.summary(workers))
+        if args.report_path:
+            analysis.save(args.report_path, workers)
+            print(f"分析结果已写入 {args.report_path}")
+        return 0 if not (invalid or analysis.flagged() or analysis.failed()) else 1
+    report = None
+    if args.report_path or args.profile_path or args.trace_memory:
+        report = Report()
+        context = profiling(report, args.profile_path, args.trace_memory)
+    else:
+        context = contextlib.nullcontext()
+    cache = _open_cache(args)
+    with context:
+        stats = run(args, report, cache)
+    print(f"处理完成，{stats.summary()}")
+    if stats.sniffed:
+        print("跳过的压缩或生成的文件:")
+        print(stats.sniffed_list())
+    if cache is not None:
+        totals = cache.stats()
+        print(f"结果缓存 {cache.path}: {totals['entries']} 个结果，"
+              f"{totals['bytes'] / (1024 * 1024):.1f}/{totals['max_bytes'] // (1024 * 1024)} MB，"
+              f"累计命中 {totals['hits']}，未命中 {totals['misses']}，淘汰 {totals['evictions']}")
+        cache.close()
+    if report is not None:
+        print(report.summary())
+        if args.report_path:
+            report.save(args.report_path)
+            print(f"性能报告已写入 {args.report_path}")
+    return 0 if stats.fail_count == 0 else 1
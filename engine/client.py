@@ -0,0 +1,372 @@
+# -*- coding: utf-8 -*-
+"""
+去注释服务的客户端
+
+构建系统每个源文件调用一次时，进程启动和导入引擎的开销远大于处理几 KB 代码本身。
+先用 python -m engine.server 启动常驻服务，再由本客户端把请求转发给它：
+
+    python engine/client.py src/a.py -o out/a.py
+    python engine/client.py src/a.py src/b.js -o out/ --keep-header
+    cat a.py | python engine/client.py - -t py > a.stripped.py
+    python engine/client.py --ping
+    python engine/client.py --stop
+
+本模块只依赖标准库、不导入 engine 包的其他模块，作为脚本运行时启动开销最小。
+协议：每条消息是一行 utf-8 编码的 JSON，请求和回复一一对应，一个连接上可以连续发送多个请求：
+
+    {"op": "strip", "options": {...}, "items": [{"path": ..., "output": ..., "content": ..., "type": ...,
+                                                  "options": {...}}, ...]}
+    {"results": [{"ok": true, "written": true} | {"ok": true, "content": "..."} | {"ok": false, "error": "..."}]}
+
+路径必须是绝对路径；给出 output 时由服务写入该文件，否则在回复中返回处理后的内容。
+连接 Unix 套接字前确认套接字文件属于当前用户、其他用户无法访问，避免连到其他用户抢先占用该路径的服务。
+"""
+
+import argparse
+import json
+import os
+import socket
+import stat
+import sys
+import time
+
+# 协议版本，不兼容的修改时递增
+PROTOCOL_VERSION = 1
+
+# 不使用 Unix 套接字时默认监听的本机端口
+DEFAULT_PORT = 8765
+
+# 指定默认服务地址的环境变量
+ADDRESS_ENV = 'STRIP_COMMENTS_SERVER'
+
+# 一条消息的最大字节数
+MAX_MESSAGE = 256 * 1024 * 1024
+
+
+def socket_dir():
+    """
+    默认套接字文件所在的目录：$XDG_RUNTIME_DIR（系统为每个用户创建，只有该用户可以访问）；
+    未设置时为 /tmp 下按用户区分的目录，由服务以 0700 权限创建
+    """
+    return os.environ.get('XDG_RUNTIME_DIR') or os.path.join('/tmp', f'strip-comments-{os.getuid()}')
+
+
+def default_address():
+    """
+    默认的服务地址：环境变量 STRIP_COMMENTS_SERVER；否则在支持 Unix 套接字的平台上为
+    socket_dir() 下的套接字文件，其他平台为 127.0.0.1:DEFAULT_PORT
+    """
+    address = os.environ.get(ADDRESS_ENV)
+    if address:
+        return address
+    if os.name == 'posix':
+        return 'unix:' + os.path.join(socket_dir(), 'strip-comments.sock')
+    return f'127.0.0.1:{DEFAULT_PORT}'
+
+
+def check_socket(path):
+    """
+    确认套接字文件属于当前用户且其他用户无法访问
+
+    Raises:
+        FileNotFoundError: 套接字文件不存在
+        PermissionError: 不是套接字文件、属于其他用户或权限允许其他用户访问
+    """
+    st = os.lstat(path)
+    if not stat.S_ISSOCK(st.st_mode):
+        raise PermissionError(f"{path} 不是套接字文件，拒绝连接")
+    if st.st_uid != os.getuid():
+        raise PermissionError(f"{path} 属于其他用户（uid {st.st_uid}），拒绝连接")
+    if st.st_mode & 0o077:
+        raise PermissionError(f"{path} 的权限 {stat.S_IMODE(st.st_mode):o} 允许其他用户访问，拒绝连接")
+
+
+def parse_address(address):
+    """
+    解析服务地址
+
+    Args:
+        address (str): 'unix:套接字路径'、'主机:端口' 或 '端口'（监听 127.0.0.1）
+
+    Returns:
+        tuple: ('unix', 套接字路径) 或 ('tcp', (主机, 端口))
+
+    Raises:
+        ValueError: 地址格式不正确
+    """
+    if address.startswith('unix:'):
+        path = address[len('unix:'):]
+        if not path:
+            raise ValueError(f"无效的服务地址: {address}")
+        return 'unix', path
+    host, _, port = address.rpartition(':')
+    try:
+        port = int(port)
+    except ValueError:
+        raise ValueError(f"无效的服务地址: {address}") from None
+    if not 0 <= port < 65536:
+        raise ValueError(f"无效的端口: {port}")
+    return 'tcp', (host.strip('[]') or '127.0.0.1', port)
+
+
+def encode_message(message):
+    """
+    编码一条消息；内容中来自 surrogateescape 的孤立代理字符原样传递
+    """
+    return json.dumps(message, ensure_ascii=False).encode('utf-8', 'surrogatepass') + b'\n'
+
+
+def decode_message(line):
+    """
+    解码一条消息
+
+    Raises:
+        ValueError: 不是有效的 JSON 对象
+    """
+    message = json.loads(line.decode('utf-8', 'surrogatepass'))
+    if not isinstance(message, dict):
+        raise ValueError("消息必须是 JSON 对象")
+    return message
+
+
+class StripClient:
+    """
+    去注释服务的连接，一个连接上可以连续发送多个请求，不能在多个线程中同时使用
+
+    Args:
+        address (str, optional): 服务地址，见 parse_address，默认为 default_address()
+        timeout (float, optional): 等待回复的时间上限（秒），None 表示不限制
+        wait (float): 服务尚未启动时重试连接的时间（秒），0 表示不重试
+
+    Raises:
+        OSError: 无法连接到服务
+    """
+
+    def __init__(self, address=None, timeout=None, wait=0):
+        self.address = address or default_address()
+        kind, target = parse_address(self.address)
+        deadline = time.monotonic() + wait
+        self.sock = None
+        while True:
+            try:
+                if kind == 'unix':
+                    check_socket(target)
+                    self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                else:
+                    self.sock = socket.socket(socket.AF_INET6 if ':' in target[0] else socket.AF_INET,
+                                              socket.SOCK_STREAM)
+                    self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                self.sock.connect(target)
+                break
+            except OSError as e:
+                if self.sock is not None:
+                    self.sock.close()
+                    self.sock = None
+                # 套接字文件不可信或没有权限时不再重试
+                if isinstance(e, PermissionError) or time.monotonic() >= deadline:
+                    raise
+                time.sleep(0.05)
+        self.sock.settimeout(timeout)
+        self.reader = self.sock.makefile('rb')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.reader.close()
+        self.sock.close()
+
+    def request(self, message):
+        """
+        发送一条请求并等待回复
+
+        Returns:
+            dict: 回复
+
+        Raises:
+            ConnectionError: 服务关闭了连接
+            RuntimeError: 服务无法处理该请求（格式错误、不支持的操作等）
+        """
+        self.sock.sendall(encode_message(message))
+        line = self.reader.readline(MAX_MESSAGE + 1)
+        if not line.endswith(b'\n'):
+            raise ConnectionError("服务关闭了连接")
+        reply = decode_message(line)
+        if 'error' in reply:
+            raise RuntimeError(reply['error'])
+        return reply
+
+    def strip(self, items, **options):
+        """
+        批量处理
+
+        Args:
+            items (list): 请求项，每项是含 path / output / content / type / options 的字典
+            **options: 所有请求项共用的 strip_source 选项，请求项中的 options 优先
+
+        Returns:
+            list: 与 items 对应的结果字典，ok 为False时 error 为错误信息
+        """
+        return self.request({'op': 'strip', 'options': options, 'items': list(items)})['results']
+
+    def strip_file(self, path, output=None, file_type=None, **options):
+        """
+        处理单个文件
+
+        Returns:
+            dict: 结果，未指定 output 时 content 为处理后的内容
+        """
+        item = {'path': os.path.abspath(path)}
+        if output is not None:
+            item['output'] = os.path.abspath(output)
+        if file_type is not None:
+            item['type'] = file_type
+        return self.strip([item], **options)[0]
+
+    def strip_text(self, content, file_type='py', **options):
+        """
+        处理一段代码
+
+        Returns:
+            str: 移除注释后的代码
+
+        Raises:
+            RuntimeError: 处理失败
+        """
+        result = self.strip([{'content': content, 'type': file_type}], **options)[0]
+        if not result['ok']:
+            raise RuntimeError(result['error'])
+        return result['content']
+
+    def ping(self):
+        """
+        Returns:
+            dict: 服务的版本、进程号、工作进程数和累计处理量
+        """
+        return self.request({'op': 'ping'})
+
+    def shutdown(self):
+        """
+        通知服务退出
+        """
+        return self.request({'op': 'shutdown'})
+
+
+def build_parser(prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="通过常驻服务移除源代码中的注释")
+    parser.add_argument('paths', nargs='*', help="要处理的文件，- 表示从标准输入读取（需要 -t）")
+    parser.add_argument('-o', '--output',
+                        help="输出文件；处理多个文件时为输出目录；- 表示写到标准输出；不指定时覆盖原文件")
+    parser.add_argument('-a', '--address', default=None,
+                        help=f"服务地址，unix:路径 或 主机:端口 (默认: ${ADDRESS_ENV} 或 {default_address()})")
+    parser.add_argument('-t', '--type', dest='file_type', choices=('py', 'js', 'html', 'css'),
+                        help="文件类型，默认按扩展名判断")
+    parser.add_argument('--keep-header', action='store_true', help="保留Python文件的头部注释")
+    parser.add_argument('--keep-license', action='store_true', help="保留许可证和版权注释，隐含 --keep-header")
+    parser.add_argument('--header-pattern', dest='header_patterns', action='append', default=[], metavar='REGEX',
+                        help="额外保留与该正则表达式匹配的头部注释块，隐含 --keep-header，可以重复")
+    parser.add_argument('--drop-blank-lines', action='store_true', help="删除Python代码中的所有空白行")
+    parser.add_argument('--keep-pre', dest='keep_preformatted', action='store_true',
+                        help="原样保留HTML中 <pre> 和 <textarea> 的内容")
+    parser.add_argument('--keep-conditional-comments', action='store_true', help="保留HTML中的 IE 条件注释")
+    parser.add_argument('--wait', type=float, default=0, metavar='SECONDS',
+                        help="服务尚未启动时重试连接的时间 (默认: 不重试)")
+    parser.add_argument('--timeout', type=float, default=None, metavar='SECONDS', help="等待回复的时间上限")
+    parser.add_argument('--ping', action='store_true', help="查看服务状态")
+    parser.add_argument('--stop', action='store_true', help="通知服务退出")
+    return parser
+
+
+def _options(args):
+    options = {}
+    for name in ('keep_header', 'keep_license', 'drop_blank_lines', 'keep_preformatted',
+                 'keep_conditional_comments'):
+        if getattr(args, name):
+            options[name] = True
+    if args.header_patterns:
+        options['header_patterns'] = args.header_patterns
+    return options
+
+
+def _items(parser, args):
+    if '-' in args.paths:
+        if len(args.paths) != 1:
+            parser.error("- 只能单独使用")
+        if not args.file_type:
+            parser.error("从标准输入读取时需要用 -t 指定文件类型")
+        content = sys.stdin.buffer.read().decode('utf-8', 'surrogateescape')
+        item = {'content': content, 'type': args.file_type}
+        if args.output and args.output != '-':
+            item['output'] = os.path.abspath(args.output)
+        return [item]
+    if len(args.paths) > 1 and args.output == '-':
+        parser.error("处理多个文件时不能输出到标准输出")
+    if len(args.paths) > 1 and args.output and not os.path.isdir(args.output):
+        parser.error("处理多个文件时 -o 必须是已存在的目录")
+    items = []
+    for path in args.paths:
+        item = {'path': os.path.abspath(path)}
+        if args.file_type:
+            item['type'] = args.file_type
+        if args.output is None:
+            item['output'] = item['path']
+        elif args.output != '-':
+            output = args.output
+            if len(args.paths) > 1 or os.path.isdir(output):
+                output = os.path.join(output, os.path.basename(path))
+            item['output'] = os.path.abspath(output)
+        items.append(item)
+    return items
+
+
+def main(argv=None, prog=None):
+    """
+    客户端命令行主函数
+
+    Returns:
+        int: 退出码，全部成功时为0，有文件处理失败时为1，无法连接到服务时为2
+    """
+    parser = build_parser(prog)
+    args = parser.parse_args(argv)
+    if not (args.paths or args.ping or args.stop):
+        parser.error("请指定要处理的文件，或使用 --ping / --stop")
+    items = _items(parser, args) if args.paths else []
+    address = args.address or default_address()
+    try:
+        client = StripClient(address, args.timeout, args.wait)
+    except PermissionError as e:
+        print(f"无法连接到服务 {address}: {e}", file=sys.stderr)
+        return 2
+    except (OSError, ValueError) as e:
+        print(f"无法连接到服务 {address}: {e}；请先运行 python -m engine.server", file=sys.stderr)
+        return 2
+    failed = 0
+    with client:
+        try:
+            if args.ping:
+                status = client.ping()
+                print(f"服务 {address}: 引擎版本 {status['engine_version']}，进程号 {status['pid']}，"
+                      f"工作进程 {status['workers']}，已处理请求 {status['requests']}，"
+                      f"文件 {status['files']}，失败 {status['failures']}")
+            if items:
+                results = client.strip(items, **_options(args))
+                for item, result in zip(items, results):
+                    if not result['ok']:
+                        failed += 1
+                        print(f"{item.get('path', '-')}: {result['error']}", file=sys.stderr)
+                    elif 'content' in result:
+                        sys.stdout.buffer.write(result['content'].encode('utf-8', 'surrogateescape'))
+                        sys.stdout.buffer.flush()
+            if args.stop:
+                client.shutdown()
+        except (OSError, RuntimeError, ValueError) as e:
+            print(f"服务 {address} 出错: {e}", file=sys.stderr)
+            return 2
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(prog='client.py'))
@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+"""
+源文件编码的识别，以及不经过 utf-8 解码/编码的按字节处理
+
+注释分隔符、引号、反斜杠等都是 ASCII 字符。对于多字节字符的每个字节都不小于 0x80 的编码
+（utf-8、EUC-JP/KR、GB2312 以及各种单字节编码），把字节按 latin-1 一对一映射为字符后直接扫描，
+输出再按 latin-1 映射回原来的字节：没有真正的解码和编码，原文件中的字节原样保留，
+也不会因为文件不是 utf-8 而失败。
+
+GBK / GB18030、Big5、Shift-JIS 等编码的多字节字符的第二个字节可能是 0x5C（反斜杠）等 ASCII 字符，
+按字节扫描会把它误认为字符串中的转义符，这些编码仍然用对应的编解码器解码后处理，再编码回原编码。
+GBK / GB18030 是有意不按字节处理的：即使先扫描一遍首字节和尾字节、确认没有 ASCII 尾字节，
+每个汉字在按字节的视图中也变成两个字符，词法分析要扫描的字符数随之增加，对注释和字符串中汉字较多的源文件，
+增加的扫描时间与省下的解码和编码（C 实现，约 10 ms/MB）相当甚至更多，实测没有稳定的收益。
+
+编码按以下顺序确定：BOM；全部为 ASCII；文件中声明的编码（Python 的 coding 声明、
+HTML 的 <meta charset>、CSS 的 @charset）；utf-8；LEGACY_ENCODINGS；都不符合时按字节处理。
+文件开头的 BOM 在处理前去掉，写出时原样加回。
+"""
+
+import codecs
+import io
+import os
+import re
+
+# 不是 utf-8 时依次尝试的编码
+LEGACY_ENCODINGS = ('gb18030',)
+
+# 按字节处理时使用的编解码器
+BYTE_VIEW = 'latin-1'
+
+# utf-32-le 的 BOM 以 utf-16-le 的 BOM 开头，需要先检查
+_BOMS = (
+    (codecs.BOM_UTF32_LE, 'utf-32-le'),
+    (codecs.BOM_UTF32_BE, 'utf-32-be'),
+    (codecs.BOM_UTF8, 'utf-8'),
+    (codecs.BOM_UTF16_LE, 'utf-16-le'),
+    (codecs.BOM_UTF16_BE, 'utf-16-be'),
+)
+
+# 多字节字符中不会出现 ASCII 字节的编码（codecs.lookup 规范化后的名称）
+_ASCII_SAFE = frozenset({'ascii', 'utf-8', 'euc_jp', 'euc_jis_2004', 'euc_jisx0213', 'euc_kr', 'gb2312',
+                         'koi8-r', 'koi8-u', 'mac-roman'})
+
+# 文件中的编码声明，只在开头 _DECLARATION_SCAN 个字节中查找
+_DECLARATIONS = {
+    'py': re.compile(rb'\A(?:[^\n]*\n)?[ \t\f]*#[^\n]*?coding[:=][ \t]*([-\w.]+)'),
+    'html': re.compile(rb'<meta[^>]*?charset\s*=\s*["\']?([-\w.:]+)', re.IGNORECASE),
+    'css': re.compile(rb'\A@charset\s+"([-\w.:]+)"'),
+}
+_DECLARATION_SCAN = 1024
+
+# 流式处理时每次验证的字节数
+_CHUNK = 1024 * 1024
+
+
+def is_ascii_safe(name):
+    """
+    判断编码能否按字节处理：ASCII 兼容，且多字节字符中不会出现 ASCII 字节
+    """
+    name = codecs.lookup(name).name
+    return name in _ASCII_SAFE or name.startswith(('iso8859', 'cp125', 'latin'))
+
+
+class SourceEncoding:
+    """
+    源文件的编码方式
+
+    Attributes:
+        name (str): 识别出的编码
+        bom (bytes): 文件开头的 BOM，没有时为空
+        codec (str): 实际使用的编解码器，按字节处理时为 BYTE_VIEW
+    """
+
+    def __init__(self, name, bom=b''):
+        self.name = codecs.lookup(name).name
+        self.bom = bom
+        self.codec = BYTE_VIEW if is_ascii_safe(name) else self.name
+
+    def __repr__(self):
+        return f'SourceEncoding({self.name!r}, bom={self.bom!r})'
+
+    def decode(self, data):
+        """
+        去掉 BOM 并解码，换行统一为 \\n（与以文本模式读取相同）
+        """
+        if self.bom:
+            data = memoryview(data)[len(self.bom):]
+        text = str(data, self.codec)
+        if '\r' in text:
+            text = text.replace('\r\n', '\n').replace('\r', '\n')
+        return text
+
+    def encode(self, text, bom=True):
+        """
+        编码回原编码并加回 BOM（bom 为False时不加，用于分块写出），换行转换与以文本模式写入相同
+        """
+        if os.linesep != '\n':
+            text = text.replace('\n', os.linesep)
+        data = text.encode(self.codec)
+        return self.bom + data if bom and self.bom else data
+
+
+def _declared(data, file_type):
+    pattern = _DECLARATIONS.get(file_type)
+    if pattern is None:
+        return None
+    m = pattern.search(data, 0, _DECLARATION_SCAN)
+    if m is None:
+        return None
+    try:
+        return codecs.lookup(m.group(1).decode('ascii')).name
+    except LookupError:
+        return None
+
+
+def _candidates(head, file_type, encodings):
+    declared = _declared(head, file_type)
+    names = [declared] if declared else []
+    for name in ('utf-8',) + tuple(encodings):
+        if name not in names:
+            names.append(name)
+    return names
+
+
+def decode_source(data, file_type=None, encodings=LEGACY_ENCODINGS):
+    """
+    识别字节内容的编码并解码，能按字节处理的编码不做真正的解码
+
+    Args:
+        data (bytes): 文件内容
+        file_type (str, optional): 文件类型，用于查找文件中的编码声明
+        encodings (tuple): 不是 utf-8 时依次尝试的编码
+
+    Returns:
+        tuple: (文本, SourceEncoding)，用 SourceEncoding.encode 编码回原来的编码
+    """
+    for bom, name in _BOMS:
+        if data.startswith(bom):
+            encoding = SourceEncoding(name, bom)
+            return encoding.decode(data), encoding
+    if data.isascii():
+        encoding = SourceEncoding('ascii')
+        return encoding.decode(data), encoding
+    for name in _candidates(data, file_type, encodings):
+        try:
+            text = data.decode(name)
+        except UnicodeDecodeError:
+            continue
+        encoding = SourceEncoding(name)
+        if encoding.codec != BYTE_VIEW:
+            # 已经解码过了，不必再解码一次
+            if '\r' in text:
+                text = text.replace('\r\n', '\n').replace('\r', '\n')
+            return text, encoding
+        return encoding.decode(data), encoding
+    encoding = SourceEncoding(BYTE_VIEW)
+    return encoding.decode(data), encoding
+
+
+def _validates(path, name):
+    decoder = codecs.getincrementaldecoder(name)()
+    with open(path, 'rb') as f:
+        try:
+            while True:
+                chunk = f.read(_CHUNK)
+                decoder.decode(chunk, final=not chunk)
+                if not chunk:
+                    return True
+        except UnicodeDecodeError:
+            return False
+
+
+def detect_file_encoding(path, file_type=None, encodings=LEGACY_ENCODINGS):
+    """
+    按块识别文件的编码，不把整个文件读入内存，规则与 decode_source 相同
+
+    Returns:
+        SourceEncoding: 编码方式
+    """
+    with open(path, 'rb') as f:
+        head = f.read(_DECLARATION_SCAN)
+    for bom, name in _BOMS:
+        if head.startswith(bom):
+            return SourceEncoding(name, bom)
+    for name in _candidates(head, file_type, encodings):
+        if _validates(path, name):
+            return SourceEncoding(name)
+    return SourceEncoding(BYTE_VIEW)
+
+
+def open_source(path, encoding, chunk_size=_CHUNK):
+    """
+    以文本方式打开源文件，跳过 BOM，换行统一为 \\n
+
+    Returns:
+        io.TextIOWrapper: 可按块读取的文本流
+    """
+    raw = open(path, 'rb', buffering=chunk_size)
+    try:
+        raw.seek(len(encoding.bom))
+        return io.TextIOWrapper(raw, encoding=encoding.codec)
+    except BaseException:
+        raw.close()
+        raise
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+通过本地 git 仓库找出自某个提交以来变化的文件
+
+只调用本地的 git 命令读取 .git 目录，不访问远程仓库：
+- git diff --name-status <提交>：比较该提交与工作区，包括已暂存和未暂存的修改
+- git ls-files --others --exclude-standard：尚未跟踪的新文件（按 .gitignore 排除）
+
+重命名按删除旧路径、新增新路径处理。目录不在 git 工作区中或找不到 git 命令时返回None，
+由调用方退回完整遍历。
+"""
+
+import os
+import subprocess
+
+# 只比较工作区中尚未提交的修改
+WORKING_TREE = 'HEAD'
+
+# git 的空树对象，仓库还没有任何提交时与它比较
+_EMPTY_TREE = '4b825dc642cb6eb9a060e54bf8d69288fbee4904'
+
+
+def _git(dir_path, *args):
+    # 只读操作，不为刷新索引而写 .git/index
+    env = dict(os.environ, GIT_OPTIONAL_LOCKS='0')
+    return subprocess.run(['git', '-C', dir_path, *args], stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                          stderr=subprocess.PIPE, env=env)
+
+
+def _resolve(dir_path, since):
+    result = _git(dir_path, 'rev-parse', '--verify', '--quiet', since + '^{commit}')
+    if result.returncode == 0:
+        return result.stdout.decode('ascii').strip()
+    if since == WORKING_TREE:
+        # 还没有任何提交，工作区中的所有文件都算新增
+        return _EMPTY_TREE
+    raise ValueError(f"在 {dir_path} 的 git 仓库中找不到提交: {since}")
+
+
+def _paths(output):
+    return [os.fsdecode(path).replace('/', os.sep) for path in output.split(b'\0') if path]
+
+
+def changed_files(dir_path, since=WORKING_TREE):
+    """
+    列出自提交 since 以来新增、修改和删除的文件
+
+    Args:
+        dir_path (str): 目录，可以是 git 工作区的子目录，只列出其中的文件
+        since (str): 提交、标签或分支名，默认 HEAD 即只看尚未提交的修改
+
+    Returns:
+        tuple: (新增或修改的文件列表, 已删除的文件列表)，均为相对于 dir_path 的路径；
+               dir_path 不在 git 工作区中或没有 git 命令时返回None
+
+    Raises:
+        ValueError: 找不到提交 since
+    """
+    try:
+        result = _git(dir_path, 'rev-parse', '--is-inside-work-tree')
+    except OSError:
+        return None
+    if result.returncode != 0 or result.stdout.strip() != b'true':
+        return None
+    commit = _resolve(dir_path, since)
+
+    # --relative 使路径相对于 dir_path，并只列出其中的文件
+    result = _git(dir_path, 'diff', '--name-status', '-z', '--no-renames', '--relative', commit, '--')
+    if result.returncode != 0:
+        raise ValueError(f"git diff 失败: {os.fsdecode(result.stderr).strip()}")
+    fields = result.stdout.split(b'\0')
+    changed = []
+    deleted = []
+    for status, path in zip(fields[0::2], fields[1::2]):
+        path = os.fsdecode(path).replace('/', os.sep)
+        if status == b'D':
+            deleted.append(path)
+        else:
+            changed.append(path)
+
+    result = _git(dir_path, 'ls-files', '-z', '--others', '--exclude-standard')
+    if result.returncode != 0:
+        raise ValueError(f"git ls-files 失败: {os.fsdecode(result.stderr).strip()}")
+    changed.extend(_paths(result.stdout))
+    return sorted(set(changed)), sorted(set(deleted))
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+keep_header 的文件头识别
+
+只检查文件开头 HEADER_SCAN 个字符内、第一行代码之前的区域，耗时与文件大小无关：
+
+- shebang（#!）和编码声明（# -*- coding: ... -*-、# coding=、# encoding=）逐行保留
+- 与 header_patterns 中任一正则表达式匹配的注释块整块保留，用于许可证、SPDX 标识、公司横幅等；
+  注释块以空行分隔，LICENSE_PATTERNS 为常用的许可证规则
+- 文件信息文档字符串：含有 Author: 和 Code function: 的三引号字符串，或与 header_patterns 匹配的，
+  区域内只认第一个
+
+区域内其他注释和空行随头部一起去掉；遇到其他文档字符串或代码即结束，其后的内容交给 strip_python。
+"""
+
+import functools
+import re
+
+# 只在文件开头这么多个字符内查找头部
+HEADER_SCAN = 64 * 1024
+
+# 文件信息文档字符串中必须出现的标记
+FILE_INFO_MARKERS = ('Author:', 'Code function:')
+
+# 许可证注释的规则
+LICENSE_PATTERNS = (
+    r'SPDX-License-Identifier:',
+    r'\bCopyright\b|\(c\)|©',
+    r'\bLicen[sc]ed?\b',
+)
+
+_DIRECTIVES = ('#!', '# -*-', '# coding=', '# encoding=')
+
+_QUOTES = ("'''", '"""')
+
+
+@functools.lru_cache(maxsize=32)
+def _compile(patterns):
+    if not patterns:
+        return None
+    return re.compile('|'.join(f'(?:{pattern})' for pattern in patterns))
+
+
+def _flush(block, rule, kept):
+    # 注释块结束：匹配规则时整块保留，否则只保留 shebang 和编码声明
+    if not block:
+        return
+    if rule is not None and any(rule.search(line) for line in block):
+        lines = list(block)
+    else:
+        lines = [line for line in block if line.strip().startswith(_DIRECTIVES)]
+    if lines:
+        kept.append(lines)
+    block.clear()
+
+
+def _header_lines(kept):
+    # 相邻的保留内容来自不同的块时以空行分隔
+    lines = []
+    for block in kept:
+        if lines:
+            lines.append('')
+        lines.extend(block)
+    return lines
+
+
+def split_header(code, header_patterns=(), scan=HEADER_SCAN):
+    """
+    拆分出文件头部（shebang、编码声明、匹配规则的注释块和文件信息文档字符串）
+
+    Args:
+        code (str): 原始Python代码
+        header_patterns (iterable): 需要保留的注释块的正则表达式，如 LICENSE_PATTERNS
+        scan (int): 只在开头这么多个字符内查找
+
+    Returns:
+        tuple: (头部的行列表, 头部区域之后的代码)
+    """
+    rule = _compile(tuple(header_patterns))
+    limit = min(len(code), scan)
+    kept = []
+    block = []
+    docstring = False
+    pos = 0
+    while pos < limit:
+        end = code.find('\n', pos, limit)
+        if end < 0:
+            if limit < len(code):
+                # 行超出了查找范围，不再作为头部
+                break
+            end = limit
+        line = code[pos:end]
+        stripped = line.strip()
+        if not stripped:
+            _flush(block, rule, kept)
+            pos = end + 1
+            continue
+        if stripped.startswith('#'):
+            block.append(line)
+            pos = end + 1
+            continue
+        quote = stripped[:3]
+        if docstring or quote not in _QUOTES:
+            break
+        start = pos + line.index(quote)
+        close = code.find(quote, start + 3, limit)
+        if close < 0:
+            break
+        close += 3
+        # 结束引号之后只能是空白或注释
+        tail_end = code.find('\n', close, limit)
+        if tail_end < 0:
+            if limit < len(code):
+                break
+            tail_end = limit
+        tail = code[close:tail_end].strip()
+        if tail and not tail.startswith('#'):
+            break
+        text = code[start:close]
+        if not (all(marker in text for marker in FILE_INFO_MARKERS) or (rule is not None and rule.search(text))):
+            break
+        _flush(block, rule, kept)
+        kept.append([text])
+        docstring = True
+        pos = tail_end + 1
+    else:
+        pos = min(pos, len(code))
+    _flush(block, rule, kept)
+    if not kept:
+        return [], code
+    return _header_lines(kept), code[pos:]
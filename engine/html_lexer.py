@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+"""
+HTML 的单遍注释移除引擎
+
+一次扫描整个文档：普通内容中移除 <!-- --> 注释；进入 <script> / <style> 后切换模式，
+其内容直接分块送入 js_lexer 的 JavaScript / CSS 扫描器，移除其中的 // 和 /* */ 注释，
+遇到 </script> / </style> 再切换回来，不需要先切出脚本再单独处理。
+
+- script / style 的内容是原始文本，其中的 <!-- 不是 HTML 注释；type 不是 JavaScript / CSS 的
+  （如 text/template、application/ld+json）原样保留
+- keep_preformatted 为True时 <pre> 和 <textarea> 中的内容原样保留
+- keep_conditional_comments 为True时保留 IE 条件注释（<!--[if IE]> ... <![endif]-->）
+- 未闭合的注释与原规则一样，从注释开始到文件结束原样保留
+
+可以分块输入（feed/close），流式处理大文件时输出与一次性处理完全相同。
+"""
+
+import re
+import tempfile
+
+from .js_lexer import CodeCommentFilter
+
+# 普通内容中需要停下来处理的位置
+_EVENTS = re.compile(r'<!--|<(script|style)(?=[\s/>])', re.IGNORECASE)
+_EVENTS_PRE = re.compile(r'<!--|<(script|style|pre|textarea)(?=[\s/>])', re.IGNORECASE)
+
+# 各原始文本区域的结束标记
+_END_TAGS = {name: re.compile(r'</%s(?=[\s/>])' % name, re.IGNORECASE)
+             for name in ('script', 'style', 'pre', 'textarea')}
+
+# 开始标签，属性值中可以出现 >
+_TAG = re.compile(r'''<[a-zA-Z][^\s/>]*(?:[^>"']|"[^"]*"|'[^']*')*>''')
+
+_TYPE_ATTR = re.compile(r'''\stype\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))''', re.IGNORECASE)
+
+# 作为 JavaScript 执行的 script type，不区分大小写；没有 type 或为空时同样是 JavaScript
+_JS_TYPES = frozenset({
+    'module', 'text/javascript', 'application/javascript', 'application/x-javascript',
+    'text/ecmascript', 'application/ecmascript', 'text/jscript',
+})
+_CSS_TYPES = frozenset({'text/css'})
+
+# 条件注释：<!--[if ...]> 以及下层显示形式的 <!--<![endif]-->，判断时需要看到注释开头的字符数
+_CONDITIONAL = re.compile(r'\[if\b|<!\[endif\]', re.IGNORECASE)
+_CONDITIONAL_LOOKAHEAD = 9
+
+# 块末尾保留到下一块再判断的字符数，不小于最长的标记（<textarea 加上其后的一个字符）
+_LOOKAHEAD = 10
+
+# 标签超过该长度仍未结束时按普通文本处理
+_MAX_TAG = 64 * 1024
+
+# 跨块的未闭合注释的缓冲超过该大小后写入临时文件
+_SPOOL_SIZE = 1024 * 1024
+
+
+def _lexer_language(tag, name):
+    """
+    返回 script / style 内容使用的扫描器语言，不是 JavaScript / CSS 时返回None
+    """
+    m = _TYPE_ATTR.search(tag)
+    mime = next((value for value in m.groups() if value is not None), '') if m else ''
+    mime = mime.split(';')[0].strip().lower()
+    if name == 'script':
+        return 'js' if not mime or mime in _JS_TYPES else None
+    if name == 'style':
+        return 'css' if not mime or mime in _CSS_TYPES else None
+    return None
+
+
+class HtmlCommentFilter:
+    """
+    可分块输入的 HTML 注释移除器
+
+    Args:
+        sink (callable): 接收输出文本的函数
+        keep_preformatted (bool): 是否原样保留 <pre> 和 <textarea> 中的内容
+        keep_conditional_comments (bool): 是否保留 IE 条件注释
+    """
+
+    def __init__(self, sink, keep_preformatted=False, keep_conditional_comments=False):
+        self._sink = sink
+        self._events = _EVENTS_PRE if keep_preformatted else _EVENTS
+        self._keep_conditional = keep_conditional_comments
+        self._carry = ''
+        # 当前模式：None 普通内容，'comment' 跨块的注释，'kept' 保留的条件注释，'raw' 原始文本区域
+        self._mode = None
+        # 原始文本区域的结束标记，以及 script / style 内容使用的扫描器
+        self._end = None
+        self._lexer = None
+        # 跨块的注释内容，到文件结束仍未闭合时原样输出
+        self._pending = None
+
+    def feed(self, text, final=False):
+        """
+        输入一块源码，可以在任意位置切分
+        """
+        buf = self._carry + text
+        pos = self._scan(buf, final)
+        self._carry = buf[pos:]
+
+    def close(self):
+        """
+        输入结束，输出剩余内容
+        """
+        self.feed('', final=True)
+
+    # ---- 未闭合注释的缓冲 ----
+
+    def _hold(self, text):
+        if self._pending is None:
+            self._pending = tempfile.SpooledTemporaryFile(_SPOOL_SIZE, 'w+', encoding='utf-8', newline='')
+        self._pending.write(text)
+
+    def _discard(self):
+        if self._pending is not None:
+            self._pending.close()
+            self._pending = None
+
+    def _release(self):
+        # 到文件结束仍未闭合，按原规则原样输出
+        if self._pending is not None:
+            self._pending.seek(0)
+            for chunk in iter(lambda: self._pending.read(_SPOOL_SIZE), ''):
+                self._sink(chunk)
+            self._discard()
+
+    # ---- 原始文本区域 ----
+
+    def _region(self, text):
+        if not text:
+            return
+        if self._lexer is not None:
+            self._lexer.feed(text)
+        else:
+            self._sink(text)
+
+    def _end_region(self):
+        if self._lexer is not None:
+            self._lexer.close()
+            self._lexer = None
+        self._mode = None
+        self._end = None
+
+    # ---- 扫描 ----
+
+    def _scan(self, buf, final):
+        """
+        扫描 buf，返回已处理到的位置；其后的内容需要更多输入才能确定
+        """
+        sink = self._sink
+        n = len(buf)
+        pos = 0
+        # 输入结束时即使没有剩余内容，也要结束跨块的注释或原始文本区域
+        while pos < n or (final and self._mode is not None):
+            mode = self._mode
+            if mode == 'comment' or mode == 'kept':
+                j = buf.find('-->', pos)
+                if j >= 0:
+                    if mode == 'kept':
+                        sink(buf[pos:j + 3])
+                    self._discard()
+                    self._mode = None
+                    pos = j + 3
+                    continue
+                if final:
+                    self._release()
+                    sink(buf[pos:])
+                    self._mode = None
+                    return n
+                # 末尾的 -- 可能与下一块开头组成注释结束
+                end = max(pos, n - 2)
+                if mode == 'kept':
+                    sink(buf[pos:end])
+                else:
+                    self._hold(buf[pos:end])
+                return end
+
+            if mode == 'raw':
+                m = self._end.search(buf, pos)
+                if m is not None:
+                    self._region(buf[pos:m.start()])
+                    self._end_region()
+                    # 结束标签本身作为普通内容输出
+                    pos = m.start()
+                    continue
+                end = n if final else max(pos, n - _LOOKAHEAD)
+                self._region(buf[pos:end])
+                if final:
+                    self._end_region()
+                return end
+
+            m = self._events.search(buf, pos)
+            if m is None:
+                end = n if final else max(pos, n - _LOOKAHEAD)
+                if end > pos:
+                    sink(buf[pos:end])
+                return end
+            start = m.start()
+            if start > pos:
+                sink(buf[pos:start])
+            pos = start
+
+            if m.group(1) is None:
+                # <!--
+                body = m.end()
+                if self._keep_conditional:
+                    if not final and n - body < _CONDITIONAL_LOOKAHEAD:
+                        return pos
+                    if _CONDITIONAL.match(buf, body):
+                        sink('<!--')
+                        self._mode = 'kept'
+                        pos = body
+                        continue
+                j = buf.find('-->', body)
+                if j >= 0:
+                    pos = j + 3
+                elif final:
+                    sink(buf[pos:])
+                    return n
+                else:
+                    self._mode = 'comment'
+                    # 注释开头的 -- 不能作为结束标记的一部分
+                    end = max(body, n - 2)
+                    self._hold(buf[pos:end])
+                    return end
+                continue
+
+            tag = _TAG.match(buf, pos)
+            if tag is None:
+                if not final and n - pos <= _MAX_TAG:
+                    # 标签还没有输入完整
+                    return pos
+                # 没有结束的标签，按普通文本处理
+                sink('<')
+                pos += 1
+                continue
+            name = m.group(1).lower()
+            sink(tag.group())
+            pos = tag.end()
+            language = _lexer_language(tag.group(), name)
+            if language is not None:
+                self._lexer = CodeCommentFilter(language, sink)
+            self._mode = 'raw'
+            self._end = _END_TAGS[name]
+        return pos
+
+
+def strip_html(code, keep_preformatted=False, keep_conditional_comments=False):
+    """
+    从HTML代码中移除 <!-- --> 注释，以及 <script> / <style> 中的 JavaScript / CSS 注释
+
+    Args:
+        code (str): 原始HTML代码
+        keep_preformatted (bool): 是否原样保留 <pre> 和 <textarea> 中的内容
+        keep_conditional_comments (bool): 是否保留 IE 条件注释
+
+    Returns:
+        str: 移除注释后的代码
+    """
+    out = []
+    lexer = HtmlCommentFilter(out.append, keep_preformatted, keep_conditional_comments)
+    lexer.feed(code, final=True)
+    lexer.close()
+    return ''.join(out)
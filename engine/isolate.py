@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+在可以强制结束的独立工作进程中处理文件
+
+个别病态的输入（超大的文件、引号不配对使正则表达式大量回溯等）可能让一个文件处理很久甚至不再结束。
+每个工作进程同时只处理一个文件，超过 timeout 秒仍未完成时强制结束该进程，该文件计为失败，
+再启动一个新的工作进程继续处理其余文件：一个文件不会拖住整个目录，总耗时最多多出 timeout 秒。
+工作进程异常退出（崩溃、被系统因内存不足结束）时同样只有正在处理的文件失败。
+
+ProcessPoolExecutor 无法结束单个任务，因此这里自己管理进程，每个进程通过一个 Pipe 收发任务和结果。
+"""
+
+import multiprocessing
+import time
+from multiprocessing.connection import wait
+
+from .atomic import remove_temp_files
+
+# 通知工作进程退出后等待的时间（秒），超过后强制结束
+_STOP_WAIT = 1.0
+
+
+def _serve(conn, func):
+    # 工作进程：逐个接收 (序号, 任务, 清单条目)，返回 (序号, 结果)，收到None或管道关闭时退出
+    while True:
+        try:
+            item = conn.recv()
+        except EOFError:
+            return
+        if item is None:
+            return
+        index, task, previous = item
+        conn.send((index, func(task, previous)))
+
+
+class _Worker:
+    def __init__(self, context, func):
+        self.conn, child = context.Pipe()
+        self.process = context.Process(target=_serve, args=(child, func), daemon=True)
+        self.process.start()
+        child.close()
+        # 正在处理的 (序号, 任务) 和截止时间
+        self.job = None
+        self.deadline = None
+
+    def submit(self, index, task, previous, timeout):
+        self.conn.send((index, task, previous))
+        self.job = (index, task)
+        self.deadline = time.monotonic() + timeout if timeout else None
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(_STOP_WAIT)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+def _failure(message):
+    # 与 runner._run_task 的返回值格式相同
+    return message, False, None, False, None
+
+
+def run_isolated(func, tasks, previous, workers=1, timeout=None):
+    """
+    在独立的工作进程中逐个执行 func(任务, 清单条目)，超时的任务强制结束
+
+    Args:
+        func (callable): 可以 pickle 的函数，通常是绑定了选项的 runner._run_task
+        tasks (list): 任务列表，见 runner.make_task
+        previous (list): 与 tasks 对应的清单条目
+        workers (int): 工作进程数
+        timeout (float, optional): 每个文件的处理时间上限（秒），None 表示不限制
+
+    Yields:
+        tuple: 按任务顺序返回 func 的结果；超时或工作进程异常退出的任务为失败结果
+    """
+    if not tasks:
+        return
+    context = multiprocessing.get_context()
+    jobs = iter(enumerate(zip(tasks, previous)))
+    pool = [_Worker(context, func) for _ in range(min(max(1, workers), len(tasks)))]
+    # 先完成的结果暂存起来，按任务顺序依次返回
+    completed = {}
+    next_index = 0
+
+    def feed(worker):
+        item = next(jobs, None)
+        if item is None:
+            worker.job = None
+        else:
+            index, (task, entry) = item
+            worker.submit(index, task, entry, timeout)
+
+    def replace(i, message):
+        # 结束出问题的进程，清理它可能留下的临时文件，该任务计为失败，由新进程继续
+        worker = pool[i]
+        index, task = worker.job
+        worker.kill()
+        remove_temp_files(task[1])
+        completed[index] = _failure(message)
+        pool[i] = _Worker(context, func)
+        feed(pool[i])
+
+    try:
+        for worker in pool:
+            feed(worker)
+        while next_index < len(tasks):
+            busy = [worker for worker in pool if worker.job is not None]
+            wait_time = None
+            if timeout:
+                wait_time = max(0.0, min(worker.deadline for worker in busy) - time.monotonic())
+            ready = wait([worker.conn for worker in busy], wait_time)
+            now = time.monotonic()
+            for i, worker in enumerate(pool):
+                if worker.job is None:
+                    continue
+                if worker.conn in ready:
+                    try:
+                        index, result = worker.conn.recv()
+                    except (EOFError, OSError):
+                        worker.process.join()
+                        replace(i, f"工作进程异常退出（退出码 {worker.process.exitcode}）")
+                        continue
+                    completed[index] = result
+                    feed(worker)
+                elif timeout and now >= worker.deadline:
+                    replace(i, f"处理超过 {timeout:g} 秒，已终止")
+            while next_index in completed:
+                yield completed.pop(next_index)
+                next_index += 1
+    finally:
+        for worker in pool:
+            if worker.job is None:
+                worker.stop()
+            else:
+                # 提前结束（取消或出错）时不等待正在处理的文件
+                worker.kill()
+                remove_temp_files(worker.job[1][1])
@@ -0,0 +1,394 @@
+# -*- coding: utf-8 -*-
+"""
+JavaScript / CSS 的单遍注释移除引擎
+
+用一个预编译的正则跳跃式扫描：普通代码和普通字符串整段匹配、按切片拷贝，
+只在注释、斜杠、模板字符串和未闭合的引号处停下来处理。能正确区分：
+
+- 字符串、模板字符串（含 ${...} 中嵌套的代码）中的 // 和 /* */
+- 正则表达式字面量（如 /\\/\\//g）与除法运算符
+
+扫描器可以分块输入（feed/close），状态在块之间延续，流式处理大文件时
+输出与一次性处理完全相同。
+
+JavaScript 行的处理规则与 Python 引擎一致：仅由注释（和空白）组成的行整行删除，
+空行和含代码的行保留；跨行的块注释视为换行，以免破坏 JavaScript 的自动分号插入。
+CSS 与原先的实现相同，只删除注释本身：仅含注释的行留下空行，跨行的块注释连同其中的换行一起删除。
+"""
+
+import re
+
+# 普通代码：不含引号、斜杠和反引号，可以跨行，并直接包含能在本段闭合的字符串
+_RUN = r'''
+    (?P<run>(?:
+        [^'"`/%s]+
+      | '[^'\\\n]*(?:\\[\s\S][^'\\\n]*)*'
+      | "[^"\\\n]*(?:\\[\s\S][^"\\\n]*)*"
+    )*)
+'''
+
+# JavaScript 顶层代码
+_JS_CODE = re.compile(_RUN % '' + r'(?P<stop>//|/\*|/|`|[\'"])?', re.VERBOSE)
+
+# 模板字符串 ${...} 中的代码，需要跟踪花括号以找到表达式的结束位置
+_JS_EXPR = re.compile(_RUN % '{}' + r'(?P<stop>//|/\*|/|`|[\'"{}])?', re.VERBOSE)
+
+# CSS 只有块注释
+_CSS_CODE = re.compile((_RUN % '').replace('`', '') + r'(?P<stop>/\*|/|[\'"])?', re.VERBOSE)
+
+# 从开引号之后匹配字符串主体，未闭合时停在行尾或输入末尾
+_STRING_BODY = {
+    "'": re.compile(r"[^'\\\n]*(?:\\[\s\S][^'\\\n]*)*(?P<close>'?)"),
+    '"': re.compile(r'[^"\\\n]*(?:\\[\s\S][^"\\\n]*)*(?P<close>"?)'),
+}
+
+# 模板字符串的字面部分，停在反引号、${ 或输入末尾
+_TEMPLATE_BODY = re.compile(r'[^`\\$]*(?:(?:\\[\s\S]|\$(?!\{))[^`\\$]*)*')
+
+# 正则表达式字面量，字符类 [...] 中可以出现未转义的 /
+_REGEX_LITERAL = re.compile(r'/(?![*/])(?:[^\\/\[\n]|\\.|\[(?:[^\]\\\n]|\\.)*\])+/[\w$]*')
+
+# 在这些字符之后出现的 / 是正则表达式的开始，否则是除法
+_REGEX_AFTER = frozenset('(,=:[!&|?{};+-*%<>~^/}')
+
+# 在这些关键字之后出现的 / 是正则表达式的开始
+_REGEX_KEYWORDS = frozenset({
+    'return', 'typeof', 'instanceof', 'in', 'of', 'new', 'delete', 'void',
+    'throw', 'case', 'do', 'else', 'yield', 'await',
+})
+
+# 字符串、模板字符串、正则表达式等字面量之后的标记
+_LITERAL = '"'
+
+# 一整块都是标识符字符时，超过该长度就不再留到下一块
+_MAX_CARRY = 64 * 1024
+
+
+def _is_word(ch):
+    # 代码中的非 ASCII 字符视为标识符的一部分，按字节处理时多字节字符的各个字节也是如此
+    return ch.isalnum() or ch == '_' or ch == '$' or ch >= '\x80'
+
+
+class CodeCommentFilter:
+    """
+    可分块输入的 JavaScript / CSS 注释移除器
+
+    Args:
+        language (str): 'js' 或 'css'
+        sink (callable): 接收输出文本的函数
+    """
+
+    def __init__(self, language, sink):
+        self._js = language == 'js'
+        self._sink = sink
+        self._carry = ''
+        # 当前所在的注释：None、'line' 或 'block'
+        self._comment = None
+        self._comment_newline = False
+        # 跨块的字符串的引号
+        self._quote = None
+        # 模板字符串嵌套栈：'T' 表示模板字符串字面部分，整数表示 ${...} 中未闭合的花括号数
+        self._stack = []
+        # 上一个有意义的记号，用于区分正则表达式和除法
+        self._prev = None
+        # 行状态：当前行是否已确定保留、是否含注释、行首尚未输出的空白
+        self._kept = False
+        self._has_comment = False
+        self._pending = []
+        self._emitted = False
+        # 最后输出的一段代码；块注释两侧都是标识符字符时需要补一个空格
+        self._last = ''
+        self._glue = False
+
+    # ---- 行输出 ----
+
+    def _begin_line(self):
+        if self._emitted:
+            self._sink('\n')
+        self._emitted = True
+        self._kept = True
+        if self._pending:
+            self._sink(''.join(self._pending))
+            self._pending = []
+
+    def _end_line(self):
+        # 仅含空白的行保留，仅含注释的行删除
+        if not self._kept and not self._has_comment:
+            self._begin_line()
+        self._kept = False
+        self._has_comment = False
+        self._pending = []
+
+    def _segment(self, text):
+        if not text:
+            return
+        if self._kept:
+            self._sink(text)
+        elif text.strip():
+            self._begin_line()
+            self._sink(text)
+        else:
+            self._pending.append(text)
+
+    def _text(self, text):
+        self._last = text
+        if self._glue:
+            self._glue = False
+            if _is_word(text[0]):
+                self._segment(' ')
+        first = text.find('\n')
+        if first < 0:
+            if self._kept:
+                self._sink(text)
+            else:
+                self._segment(text)
+        else:
+            self._segment(text[:first])
+            self._end_line()
+            last = text.rfind('\n')
+            if last > first:
+                # 中间的完整行不含注释，整体保留
+                self._begin_line()
+                self._sink(text[first + 1:last])
+                self._kept = False
+            self._segment(text[last + 1:])
+
+    def _comment_body(self, buf, start, end):
+        if not self._js:
+            return
+        if not self._comment_newline and buf.find('\n', start, end) >= 0:
+            # 跨行的块注释：注释开始的行结束，结束所在的行也算含注释
+            self._comment_newline = True
+            self._end_line()
+            self._has_comment = True
+
+    # ---- 正则表达式与除法的判断 ----
+
+    def _update_prev(self, chunk):
+        rs = chunk.rstrip()
+        if not rs:
+            return
+        ch = rs[-1]
+        if _is_word(ch):
+            i = len(rs) - 1
+            while i > 0 and _is_word(rs[i - 1]):
+                i -= 1
+            self._prev = rs[i:]
+        elif ch in '\'"':
+            self._prev = _LITERAL
+        elif (ch == '+' or ch == '-') and len(rs) > 1 and rs[-2] == ch:
+            # 后置 ++ / -- 之后是除法
+            self._prev = ')'
+        else:
+            self._prev = ch
+
+    def _regex_allowed(self):
+        prev = self._prev
+        if prev is None:
+            return True
+        if len(prev) == 1 and not _is_word(prev):
+            return prev in _REGEX_AFTER
+        return prev in _REGEX_KEYWORDS
+
+    # ---- 扫描 ----
+
+    def feed(self, text, final=False):
+        """
+        输入一块源码，可以在任意位置切分
+        """
+        buf = self._carry + text
+        tail = ''
+        if not final:
+            # 末尾的标识符字符可能是关键字、正则标志或 ${ 的一部分，留到下一块；
+            # 末尾的 + / - 可能与下一块开头的字符组成后置 ++ / --，同样留到下一块
+            i = len(buf)
+            while i > 0 and _is_word(buf[i - 1]):
+                i -= 1
+            if i == len(buf):
+                while i > 0 and buf[i - 1] in '+-':
+                    i -= 1
+            if i > 0 or len(buf) <= _MAX_CARRY:
+                buf, tail = buf[:i], buf[i:]
+        pos = self._scan(buf, final)
+        self._carry = buf[pos:] + tail
+
+    def close(self):
+        """
+        输入结束，输出剩余内容
+        """
+        self.feed('', final=True)
+        if not self._kept and not self._has_comment:
+            # 最后一行（可能为空）保留
+            self._begin_line()
+
+    def _scan(self, buf, final):
+        """
+        扫描 buf，返回已处理到的位置；其后的内容需要更多输入才能确定
+        """
+        js = self._js
+        stack = self._stack
+        n = len(buf)
+        pos = 0
+        while pos < n:
+            if self._quote:
+                s = _STRING_BODY[self._quote].match(buf, pos)
+                end = s.end()
+                if end > pos:
+                    self._text(buf[pos:end])
+                    pos = end
+                # 停在闭合引号或行尾时字符串结束，停在输入末尾（可能是末尾的转义符）时等待下一块
+                if s.group('close') or buf.startswith('\n', end) or final:
+                    self._quote = None
+                    self._prev = _LITERAL
+                    continue
+                return pos
+
+            if self._comment == 'line':
+                j = buf.find('\n', pos)
+                if j < 0:
+                    return n
+                # 换行符作为普通代码处理
+                self._comment = None
+                pos = j
+                continue
+
+            if self._comment == 'block':
+                j = buf.find('*/', pos)
+                if j < 0:
+                    # 末尾的 * 可能与下一块开头的 / 组成注释结束
+                    end = n - 1 if not final and buf.endswith('*') else n
+                    self._comment_body(buf, pos, end)
+                    return end
+                self._comment_body(buf, pos, j)
+                self._comment = None
+                if self._last and _is_word(self._last[-1]) and not self._comment_newline:
+                    self._glue = True
+                pos = j + 2
+                continue
+
+            top = stack[-1] if stack else None
+            if top == 'T':
+                end = _TEMPLATE_BODY.match(buf, pos).end()
+                if end > pos:
+                    self._text(buf[pos:end])
+                    pos = end
+                if pos == n:
+                    return n
+                if buf[pos] == '`':
+                    self._text('`')
+                    stack.pop()
+                    self._prev = _LITERAL
+                    pos += 1
+                elif buf.startswith('${', pos):
+                    self._text('${')
+                    stack.append(0)
+                    self._prev = '{'
+                    pos += 2
+                elif final:
+                    self._text(buf[pos:])
+                    return n
+                else:
+                    # 末尾的反斜杠或 $，等待下一块
+                    return pos
+                continue
+
+            if not js:
+                m = _CSS_CODE.match(buf, pos)
+            elif top is None:
+                m = _JS_CODE.match(buf, pos)
+            else:
+                m = _JS_EXPR.match(buf, pos)
+            end = m.end('run')
+            if end > pos:
+                chunk = buf[pos:end]
+                self._text(chunk)
+                if js:
+                    self._update_prev(chunk)
+                pos = end
+            stop = m.group('stop')
+            if stop is None:
+                return pos
+
+            if stop == '//':
+                self._comment = 'line'
+                self._has_comment = True
+                self._glue = False
+                pos += 2
+            elif stop == '/*':
+                self._comment = 'block'
+                self._comment_newline = False
+                self._has_comment = js
+                pos += 2
+            elif stop == '/':
+                if pos + 1 == n and not final:
+                    return pos
+                if js and self._regex_allowed():
+                    r = _REGEX_LITERAL.match(buf, pos)
+                    if r is not None:
+                        self._text(r.group())
+                        self._prev = _LITERAL
+                        pos = r.end()
+                        continue
+                    if not final and n - pos <= _MAX_CARRY and buf.find('\n', pos) < 0:
+                        # 正则表达式可能还没有输入完整
+                        return pos
+                self._text('/')
+                self._prev = '/'
+                pos += 1
+            elif stop == '`':
+                self._text('`')
+                stack.append('T')
+                pos += 1
+            elif stop == '{':
+                stack[-1] += 1
+                self._text('{')
+                self._prev = '{'
+                pos += 1
+            elif stop == '}':
+                if stack[-1] == 0:
+                    stack.pop()
+                else:
+                    stack[-1] -= 1
+                self._text('}')
+                self._prev = '}'
+                pos += 1
+            else:
+                # 没能在普通代码中整体匹配的字符串：跨块或未闭合
+                self._text(stop)
+                self._quote = stop
+                pos += 1
+        return pos
+
+
+def _strip(code, language):
+    out = []
+    lexer = CodeCommentFilter(language, out.append)
+    lexer.feed(code, final=True)
+    lexer.close()
+    return ''.join(out)
+
+
+def strip_js(code):
+    """
+    从JavaScript代码中移除 // 和 /* */ 注释
+
+    Args:
+        code (str): 原始JavaScript代码
+
+    Returns:
+        str: 移除注释后的代码
+    """
+    return _strip(code, 'js')
+
+
+def strip_css(code):
+    """
+    从CSS代码中移除 /* */ 注释
+
+    Args:
+        code (str): 原始CSS代码
+
+    Returns:
+        str: 移除注释后的代码
+    """
+    return _strip(code, 'css')
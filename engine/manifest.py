@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+增量处理使用的清单文件
+
+清单以源文件相对路径为键，记录处理时的内容哈希、选项指纹以及输出文件的
+哈希和大小/修改时间。再次处理时内容、选项和输出都没有变化的文件会被跳过。
+"""
+
+import hashlib
+import json
+import os
+
+from .strip import ENGINE_VERSION
+
+# 清单文件名，默认放在输出目录（覆盖原文件时放在源目录）下
+MANIFEST_NAME = '.strip_manifest.json'
+
+# 清单文件格式版本
+_FORMAT_VERSION = 1
+
+
+def hash_bytes(data):
+    """
+    计算文件内容（字节）的哈希
+    """
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(file_path, chunk_size=1024 * 1024):
+    """
+    按块计算文件内容的哈希，结果与 hash_bytes(文件全部内容) 相同
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def options_fingerprint(extensions, options=None):
+    """
+    计算处理选项的指纹，文件类型、选项或引擎版本变化时指纹随之变化
+
+    Args:
+        extensions (dict): 扩展名到处理类型的映射
+        options (dict, optional): 传给 strip_source 的选项
+
+    Returns:
+        str: 指纹字符串
+    """
+    payload = json.dumps({
+        'extensions': extensions,
+        'options': options or {},
+        'version': ENGINE_VERSION,
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def make_entry(fingerprint, source_hash, output_path, output_hash):
+    """
+    根据刚写入的输出文件生成清单条目
+    """
+    st = os.stat(output_path)
+    return {
+        'fingerprint': fingerprint,
+        'source_hash': source_hash,
+        'output_hash': output_hash,
+        'output_size': st.st_size,
+        'output_mtime_ns': st.st_mtime_ns,
+    }
+
+
+def is_up_to_date(entry, fingerprint, source_hash, file_path, output_path):
+    """
+    判断文件是否可以跳过
+
+    覆盖原文件时，源文件内容等于上次的输出即视为最新；输出到新目录时，
+    要求源文件内容未变，且输出文件的大小和修改时间与记录一致。
+    """
+    if not entry or entry.get('fingerprint') != fingerprint:
+        return False
+    if os.path.abspath(output_path) == os.path.abspath(file_path):
+        return source_hash == entry.get('output_hash')
+    if source_hash != entry.get('source_hash'):
+        return False
+    try:
+        st = os.stat(output_path)
+    except OSError:
+        return False
+    return st.st_size == entry.get('output_size') and st.st_mtime_ns == entry.get('output_mtime_ns')
+
+
+class Manifest:
+    """
+    清单文件的读写
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('format') == _FORMAT_VERSION:
+                self.entries = data.get('entries', {})
+        except (OSError, ValueError):
+            # 清单不存在或已损坏时从头开始
+            self.entries = {}
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def update(self, key, entry):
+        if entry is None:
+            self.entries.pop(key, None)
+        else:
+            self.entries[key] = entry
+
+    def save(self):
+        """
+        写入清单，先写临时文件再替换，避免中途中断留下损坏的清单
+        """
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'format': _FORMAT_VERSION, 'entries': self.entries}, f,
+                      ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+镜像不需要处理的文件（图片、JSON、模板等）到输出目录
+
+数据不经过 Python 的缓冲区，依次尝试：
+
+- 硬链接（mirror='link'，同一文件系统时；输出与源文件共享数据，修改输出会影响源文件）
+- reflink（FICLONE，btrfs、XFS 等支持写时复制的文件系统上只复制元数据）
+- os.copy_file_range（在内核中复制，部分文件系统上也会共享数据块）
+- os.sendfile
+- 以上都不可用时按块读写
+
+复制后保留源文件的修改时间和权限。输出已存在且大小和修改时间与源文件相同（或就是同一个文件）时跳过，
+与 rsync 的快速检查相同。写入先到临时文件再原子替换。
+"""
+
+import errno
+import os
+import shutil
+import stat
+import sys
+
+from .atomic import temp_path_for
+
+# 镜像方式，同时作为任务的文件类型
+MIRROR_MODES = ('copy', 'link')
+
+# 这些错误表示该复制方式在当前文件系统上不可用，换下一种
+_UNSUPPORTED = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTTY, errno.EBADF,
+                errno.EPERM, errno.ETXTBSY}
+
+# <linux/fs.h> 中的 FICLONE
+_FICLONE = 0x40049409
+
+_CHUNK = 1024 * 1024
+
+
+def _reflink(src_fd, dst_fd):
+    if not sys.platform.startswith('linux'):
+        return False
+    import fcntl
+    try:
+        fcntl.ioctl(dst_fd, _FICLONE, src_fd)
+        return True
+    except OSError as e:
+        if e.errno in _UNSUPPORTED:
+            return False
+        raise
+
+
+def _copy_loop(copy, size):
+    # 第一次调用就失败时换下一种方式，复制了一部分之后的失败直接抛出
+    copied = 0
+    while copied < size:
+        try:
+            n = copy(copied, size - copied)
+        except OSError as e:
+            if copied == 0 and e.errno in _UNSUPPORTED:
+                return False
+            raise
+        if n == 0:
+            break
+        copied += n
+    return True
+
+
+def copy_data(src_path, dst_path):
+    """
+    复制文件内容，不经过 Python 的缓冲区
+
+    Returns:
+        str: 使用的方式，'reflink'、'copy_file_range'、'sendfile' 或 'read'
+    """
+    with open(src_path, 'rb') as fsrc, open(dst_path, 'wb') as fdst:
+        src_fd, dst_fd = fsrc.fileno(), fdst.fileno()
+        size = os.fstat(src_fd).st_size
+        if size == 0:
+            return 'read'
+        if _reflink(src_fd, dst_fd):
+            return 'reflink'
+        if hasattr(os, 'copy_file_range') and _copy_loop(
+                lambda offset, count: os.copy_file_range(src_fd, dst_fd, count, offset, offset), size):
+            return 'copy_file_range'
+        if sys.platform.startswith('linux') and _copy_loop(
+                lambda offset, count: os.sendfile(dst_fd, src_fd, offset, count), size):
+            return 'sendfile'
+        fsrc.seek(0)
+        fdst.seek(0)
+        fdst.truncate()
+        shutil.copyfileobj(fsrc, fdst, _CHUNK)
+        return 'read'
+
+
+def is_mirrored(src_stat, dst_path):
+    """
+    判断输出是否已经与源文件相同：同一个文件（硬链接），或大小和修改时间都相同
+    """
+    try:
+        dst_stat = os.stat(dst_path)
+    except OSError:
+        return False
+    if os.path.samestat(src_stat, dst_stat):
+        return True
+    return (stat.S_ISREG(dst_stat.st_mode) and dst_stat.st_size == src_stat.st_size
+            and dst_stat.st_mtime_ns == src_stat.st_mtime_ns)
+
+
+def mirror_file(src_path, dst_path, mode='copy'):
+    """
+    把文件镜像到 dst_path，已相同时跳过
+
+    Args:
+        src_path (str): 源文件路径
+        dst_path (str): 输出文件路径
+        mode (str): 'copy' 复制；'link' 优先创建硬链接，不在同一文件系统时复制
+
+    Returns:
+        bool: 是否写入了输出文件，已相同时为False
+    """
+    src_stat = os.stat(src_path)
+    if is_mirrored(src_stat, dst_path):
+        return False
+
+    tmp_path = temp_path_for(dst_path)
+    try:
+        if mode == 'link':
+            os.remove(tmp_path)
+            try:
+                os.link(src_path, tmp_path)
+                os.replace(tmp_path, dst_path)
+                return True
+            except OSError as e:
+                if e.errno not in _UNSUPPORTED and e.errno != errno.EMLINK:
+                    raise
+        copy_data(src_path, tmp_path)
+        os.chmod(tmp_path, stat.S_IMODE(src_stat.st_mode))
+        os.utime(tmp_path, ns=(src_stat.st_atime_ns, src_stat.st_mtime_ns))
+        os.replace(tmp_path, dst_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return True
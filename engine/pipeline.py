@@ -0,0 +1,361 @@
+# -*- coding: utf-8 -*-
+"""
+基于 asyncio 的异步 I/O 流水线
+
+目录遍历、读取、去注释、写入四个阶段通过有界队列连接，慢速 I/O 与 CPU 处理互相重叠，
+适合 NFS 等网络文件系统上每次读写延迟都很高的场景：
+
+- 遍历：在后台线程中逐个产生待处理文件，不必等整个目录遍历完才开始读取
+- 读取：io_concurrency 个读取同时进行（线程池）
+- 去注释：在执行器中进行，workers 大于1时使用进程池
+- 写入：与读取共用线程池，并发写入
+- 编译（指定 compile_levels 时）：写入后在去注释的执行器中校验并生成 .pyc
+
+队列满时上游阶段等待（背压），同时驻留在内存中的文件数有上限。
+每个文件的处理方式与 run_tasks 相同，结果按遍历顺序计入统计信息、增量清单和性能报告，
+输出文件、统计信息和错误列表与串行处理完全一致。
+"""
+
+import asyncio
+import concurrent.futures
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .atomic import write_bytes
+from .bytecode import compile_output
+from .manifest import MANIFEST_NAME, Manifest, hash_bytes, is_up_to_date, make_entry, options_fingerprint
+from .report import Timer
+from .mirror import MIRROR_MODES
+from .runner import RunStats, _run_task, _sniff_task, make_task, record_result
+from .strip import DEFAULT_EXTENSIONS, strip_bytes
+from .stream import should_stream
+from .walk import exclude_output, iter_tree
+
+# 默认的并发读写数
+IO_CONCURRENCY = 16
+
+# 各阶段之间的队列长度
+QUEUE_SIZE = 64
+
+
+def _load(task, previous, options, fingerprint, measure, skip=None):
+    """
+    读取阶段（在线程池中执行）
+
+    Returns:
+        tuple: ('done', _run_task 格式的结果) 表示已处理完（跳过、出错或流式处理），
+               ('strip', (文件内容, 源文件哈希, 耗时和字节数)) 表示需要去注释
+    """
+    file_path, output_path, file_type, _ = task
+    if file_type in MIRROR_MODES or should_stream(file_path, file_type):
+        # 镜像的文件和边读边写的大文件，整个文件在本线程中处理
+        return 'done', _run_task(task, previous, options, fingerprint, measure, skip=skip)
+
+    metrics = {} if measure else None
+    try:
+        if skip is not None:
+            result = _sniff_task(task, skip, metrics)
+            if result is not None:
+                return 'done', result
+        if metrics is not None:
+            metrics['bytes_in'] = os.path.getsize(file_path)
+        timer = Timer(metrics)
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        source_hash = None
+        if fingerprint is not None:
+            source_hash = hash_bytes(data)
+        timer.lap('read')
+        if fingerprint is not None and is_up_to_date(previous, fingerprint, source_hash, file_path, output_path):
+            return 'done', (None, True, previous, False, metrics)
+    except Exception as e:
+        return 'done', (str(e), False, None, False, metrics)
+    return 'strip', (data, source_hash, metrics)
+
+
+def _strip(data, file_type, options, cache=None):
+    """
+    去注释阶段（在执行器中执行）
+
+    Returns:
+        tuple: (去注释后的内容, 耗时秒数, 缓存命中情况)，不使用缓存时第三项为None
+    """
+    start = time.perf_counter()
+    if cache is None:
+        cleaned = strip_bytes(data, file_type, **(options or {}))
+        return cleaned, time.perf_counter() - start, None
+    status = {}
+    cleaned = cache.strip(data, file_type, options, status)
+    return cleaned, time.perf_counter() - start, status['cache']
+
+
+def _compile(task, compile_levels):
+    """
+    编译阶段（在执行器中执行）
+
+    Returns:
+        tuple: (错误信息或None, 耗时秒数)
+    """
+    file_path, output_path, _, _ = task
+    start = time.perf_counter()
+    try:
+        compile_output(output_path, compile_levels, file_path)
+    except Exception as e:
+        return str(e), time.perf_counter() - start
+    return None, time.perf_counter() - start
+
+
+def _store(task, cleaned, source_hash, fingerprint, metrics):
+    """
+    写入阶段（在线程池中执行）
+
+    Returns:
+        tuple: _run_task 格式的结果
+    """
+    _, output_path, _, _ = task
+    try:
+        timer = Timer(metrics)
+        written = write_bytes(output_path, cleaned)
+        entry = None
+        if fingerprint is not None:
+            entry = make_entry(fingerprint, source_hash, output_path, hash_bytes(cleaned))
+        timer.lap('write')
+        if metrics is not None:
+            metrics['bytes_out'] = os.path.getsize(output_path)
+        return None, False, entry, written, metrics
+    except Exception as e:
+        return str(e), False, None, False, metrics
+
+
+async def run_pipeline(dir_path, output_dir=None, recursive=True, extensions=None, options=None,
+                       workers=None, stats=None, manifest=None, fingerprint=None, progress=None,
+                       cancel=None, ignore=None, report=None, io_concurrency=IO_CONCURRENCY,
+                       queue_size=QUEUE_SIZE, mirror=None, compile_levels=None, cache=None, skip=None):
+    """
+    以流水线方式处理目录，参数含义见 process_tree_async
+
+    progress 的总数在遍历结束前为已发现的文件数。
+    """
+    if extensions is None:
+        extensions = DEFAULT_EXTENSIONS
+    if stats is None:
+        stats = RunStats()
+    if manifest is None:
+        fingerprint = None
+    if workers is not None and workers <= 0:
+        workers = os.cpu_count() or 1
+    # 使用缓存时需要通过 metrics 返回命中情况
+    measure = report is not None or cache is not None
+    start = time.perf_counter()
+    loop = asyncio.get_running_loop()
+
+    io_pool = ThreadPoolExecutor(max_workers=io_concurrency)
+    if workers is None or workers == 1:
+        # 单线程去注释，仍可与其他线程中的读写重叠
+        cpu_pool = ThreadPoolExecutor(max_workers=1)
+        strippers = 1
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        cpu_pool = ProcessPoolExecutor(max_workers=workers)
+        strippers = workers * 2
+
+    found = asyncio.Queue(queue_size)
+    loaded = asyncio.Queue(queue_size)
+    stripped = asyncio.Queue(queue_size)
+    discovered = 0
+    # 流水线异常结束时通知遍历线程停止，并取消其正在等待的入队操作
+    abort = threading.Event()
+    put_future = None
+    # 先完成的结果暂存起来，按遍历顺序依次计入
+    completed = {}
+    next_index = 0
+
+    def cancelled():
+        return cancel is not None and cancel.is_set()
+
+    def finish(index, task, result):
+        nonlocal next_index
+        completed[index] = (task, result)
+        while next_index in completed:
+            task, result = completed.pop(next_index)
+            next_index += 1
+            record_result(task, result, stats, manifest, report)
+            if progress is not None:
+                progress(next_index, discovered, task[0])
+
+    async def finish_compiled(index, task, result):
+        # 成功写入（或增量跳过）的 Python 文件编译后再计入，无法编译时改为失败
+        if compile_levels and task[2] == 'py' and result[0] is None and not isinstance(result[1], str):
+            error, seconds = await loop.run_in_executor(cpu_pool, _compile, task, compile_levels)
+            metrics = result[4]
+            if metrics is not None:
+                metrics['compile'] = seconds
+            if error is not None:
+                result = (error, False, None, False, metrics)
+        finish(index, task, result)
+
+    async def put_found(item):
+        nonlocal discovered
+        discovered += 1
+        await found.put(item)
+
+    def discover():
+        nonlocal put_future
+        walker = iter_tree(dir_path, extensions, recursive, ignore, bool(mirror))
+        index = 0
+        while not (abort.is_set() or cancelled()):
+            try:
+                file_path, rel_path, file_type = next(walker)
+            except StopIteration as stop:
+                return stop.value
+            task = make_task(file_path, rel_path, file_type or mirror, output_dir)
+            # 等待队列有空位，遍历不会跑得比读取快太多
+            put_future = asyncio.run_coroutine_threadsafe(put_found((index, task)), loop)
+            if abort.is_set():
+                put_future.cancel()
+            try:
+                put_future.result()
+            except concurrent.futures.CancelledError:
+                break
+            index += 1
+        walker.close()
+        return 0
+
+    async def discovery():
+        stats.pruned_count += await loop.run_in_executor(None, discover)
+        for _ in range(io_concurrency):
+            await found.put(None)
+
+    async def reader():
+        while True:
+            item = await found.get()
+            if item is None:
+                return
+            index, task = item
+            if cancelled():
+                # 取消后丢弃尚未开始的文件
+                continue
+            previous = manifest.get(task[3]) if manifest is not None else None
+            kind, value = await loop.run_in_executor(io_pool, _load, task, previous, options,
+                                                     fingerprint, measure, skip)
+            if kind == 'done':
+                await finish_compiled(index, task, value)
+            else:
+                await loaded.put((index, task, value))
+
+    async def stripper():
+        while True:
+            item = await loaded.get()
+            if item is None:
+                return
+            index, task, (data, source_hash, metrics) = item
+            try:
+                cleaned, seconds, cached = await loop.run_in_executor(cpu_pool, _strip, data, task[2], options,
+                                                                      cache)
+            except Exception as e:
+                finish(index, task, (str(e), False, None, False, metrics))
+                continue
+            if metrics is not None:
+                metrics['strip'] = seconds
+                if cached is not None:
+                    metrics['cache'] = cached
+            await stripped.put((index, task, cleaned, source_hash, metrics))
+
+    async def writer():
+        while True:
+            item = await stripped.get()
+            if item is None:
+                return
+            index, task, cleaned, source_hash, metrics = item
+            result = await loop.run_in_executor(io_pool, _store, task, cleaned, source_hash,
+                                                fingerprint, metrics)
+            await finish_compiled(index, task, result)
+
+    async def stage(workers, count, queue=None, consumers=0):
+        await asyncio.gather(*(workers() for _ in range(count)))
+        # 本阶段全部结束后通知下游的每个消费者
+        for _ in range(consumers):
+            await queue.put(None)
+
+    stages = [
+        asyncio.ensure_future(discovery()),
+        asyncio.ensure_future(stage(reader, io_concurrency, loaded, strippers)),
+        asyncio.ensure_future(stage(stripper, strippers, stripped, io_concurrency)),
+        asyncio.ensure_future(stage(writer, io_concurrency)),
+    ]
+    try:
+        await asyncio.gather(*stages)
+    finally:
+        abort.set()
+        if put_future is not None:
+            put_future.cancel()
+        for future in stages:
+            future.cancel()
+        # 取消后被丢弃的文件留下的空缺之后，已完成的结果仍按顺序计入
+        for index in sorted(completed):
+            record_result(*completed.pop(index), stats, manifest, report)
+        if cancelled():
+            stats.cancelled = True
+        cpu_pool.shutdown(cancel_futures=True)
+        io_pool.shutdown()
+        if report is not None:
+            report.add_stage('process', time.perf_counter() - start)
+
+    return stats.success_count, stats.fail_count
+
+
+async def process_tree_async(dir_path, output_dir=None, recursive=True, extensions=None, options=None,
+                             workers=None, stats=None, incremental=False, manifest_path=None,
+                             progress=None, cancel=None, ignore=None, report=None,
+                             io_concurrency=IO_CONCURRENCY, queue_size=QUEUE_SIZE, mirror=None,
+                             compile_levels=None, cache=None, skip=None):
+    """
+    以异步流水线处理目录中的所有支持的文件，结果与 process_tree 相同
+
+    Args:
+        dir_path (str): 要处理的目录路径
+        output_dir (str, optional): 输出目录
+        recursive (bool): 是否递归处理子目录
+        extensions (dict, optional): 扩展名到处理类型的映射，默认全部类型
+        options (dict, optional): 传给 strip_source 的选项
+        workers (int, optional): 去注释的并行进程数；None或1为单线程，0表示使用全部CPU核心
+        stats (RunStats, optional): 用于收集统计信息和错误列表
+        incremental (bool): 是否增量处理
+        manifest_path (str, optional): 清单文件路径，默认放在输出目录（覆盖原文件时为源目录）下
+        progress (callable, optional): 进度回调 progress(已完成数, 已发现数, 文件路径)
+        cancel (threading.Event, optional): 被设置后不再开始新的文件，正在处理的文件完成后停止
+        ignore (IgnoreRules, optional): 目录遍历的排除规则
+        report (Report, optional): 性能报告
+        io_concurrency (int): 同时进行的读写数
+        queue_size (int): 各阶段之间的队列长度
+        mirror (str, optional): 镜像其他文件的方式，见 process_tree
+        compile_levels (tuple, optional): 校验并生成 .pyc 的优化级别，见 process_tree
+        cache (ResultCache, optional): 结果缓存，在去注释的执行器中查询，见 process_tree
+        skip (SkipRules, optional): 跳过压缩、生成和过大的文件，在读取阶段判断，见 process_tree
+
+    Returns:
+        tuple: (成功处理的文件数, 处理失败的文件数)
+    """
+    if extensions is None:
+        extensions = DEFAULT_EXTENSIONS
+    if not output_dir:
+        mirror = None
+    if mirror:
+        ignore = exclude_output(ignore, dir_path, output_dir)
+    kwargs = dict(workers=workers, stats=stats, progress=progress, cancel=cancel, ignore=ignore,
+                  report=report, io_concurrency=io_concurrency, queue_size=queue_size, mirror=mirror,
+                  compile_levels=compile_levels, cache=cache, skip=skip)
+    if not incremental:
+        return await run_pipeline(dir_path, output_dir, recursive, extensions, options, **kwargs)
+
+    if manifest_path is None:
+        manifest_path = os.path.join(output_dir or dir_path, MANIFEST_NAME)
+    manifest = Manifest(manifest_path)
+    try:
+        return await run_pipeline(dir_path, output_dir, recursive, extensions, options,
+                                  manifest=manifest, fingerprint=options_fingerprint(extensions, options),
+                                  **kwargs)
+    finally:
+        manifest.save()
@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+"""
+Python 源码的单遍注释移除引擎
+
+用一个预编译的正则在源码中跳跃式扫描：普通代码和普通单行字符串整段匹配、
+按切片拷贝，只在注释、三引号字符串、f-string 和续行符处停下来处理，
+整体为线性时间。能正确识别字符串前缀（r/b/u/f 及其组合）、转义引号、
+三引号字符串以及 f-string 中嵌套的表达式和字符串。
+"""
+
+import re
+
+# 一次匹配得到一段普通代码（run）以及紧随其后的一个需要单独处理的位置。
+# 普通代码可以跨越多行，并直接包含非 f-string 的单行字符串；
+# 三引号字符串、f-string、注释和续行符需要单独处理
+_SCAN = re.compile(r'''
+    (?P<run>(?:
+        [^'"\#\\rRbBuUfF]+
+      | [rRbBuUfF](?![rRbBuUfF]?['"])
+      | (?<=\w)[rRbBuUfF]
+      | \\(?!\r?\n)
+      | (?:(?<!\w)[rRbBuU]{1,2})?'(?!'')[^'\\\n]*(?:\\.[^'\\\n]*)*'
+      | (?:(?<!\w)[rRbBuU]{1,2})?"(?!"")[^"\\\n]*(?:\\.[^"\\\n]*)*"
+    )*)
+    (?:
+        (?P<string>(?:(?<!\w)[rRbBuUfF]{1,2})?(?:\'\'\'|"""|'|"))
+      | (?P<comment>\#[^\n]*)
+      | (?P<cont>\\\r?\n)
+    )?
+''', re.VERBOSE)
+
+# 普通代码中的单行字符串，统计括号深度前去掉，字符串中的括号不计入
+_SIMPLE_STRING = re.compile(r'''
+    '[^'\\\n]*(?:\\.[^'\\\n]*)*'
+  | "[^"\\\n]*(?:\\.[^"\\\n]*)*"
+''', re.VERBOSE)
+
+# 只含空白字符的行（用于 drop_blank_lines）
+_BLANK_LINE = re.compile(r'^[^\S\n]*\n', re.MULTILINE)
+
+# 各类引号的字符串主体（从开引号之后匹配到闭引号之后，未闭合时停在行尾或文件尾）
+_STRING_BODY = {
+    "'": re.compile(r"[^'\\\n]*(?:\\[\s\S]?[^'\\\n]*)*'?"),
+    '"': re.compile(r'[^"\\\n]*(?:\\[\s\S]?[^"\\\n]*)*"?'),
+    "'''": re.compile(r"[^'\\]*(?:(?:\\[\s\S]?|'(?!''))[^'\\]*)*(?:'''|\Z)"),
+    '"""': re.compile(r'[^"\\]*(?:(?:\\[\s\S]?|"(?!""))[^"\\]*)*(?:"""|\Z)'),
+}
+
+# f-string 字面部分：遇到花括号、反斜杠、引号或换行时停下
+_FSTRING_LITERAL = {
+    "'": re.compile(r"[^{}\\'\n]*"),
+    '"': re.compile(r'[^{}\\"\n]*'),
+    "'''": re.compile(r"[^{}\\']*"),
+    '"""': re.compile(r'[^{}\\"]*'),
+}
+
+# f-string 替换字段 {...} 内部的记号
+_FIELD_TOKEN = re.compile(r'''
+    (?P<string>(?:(?<!\w)[rRbBuUfF]{1,2})?(?:\'\'\'|"""|'|"))
+  | (?P<open>[(\[{])
+  | (?P<close>[)\]}])
+  | (?P<colon>:(?!=))
+  | (?P<other>\w+|[^\w'"(\[{)\]}:]+|:)
+''', re.VERBOSE)
+
+# 三引号字符串之后只剩空白、注释或行尾时，才视为独立的文档字符串
+_DOCSTRING_TAIL = re.compile(r'[ \t\f\v\r]*(?:#|\n|\Z)')
+
+
+def _scan_string(code, pos, prefix, quote):
+    """
+    返回从 pos（开引号之后）开始的字符串的结束位置
+    """
+    end = _STRING_BODY[quote].match(code, pos).end()
+    if 'f' in prefix or 'F' in prefix:
+        body = code[pos:end]
+        if body.count('{') != body.count('}'):
+            # 替换字段未闭合，字段中可能嵌套了同种引号，需要逐段扫描
+            return _scan_fstring(code, pos, quote)
+    return end
+
+
+def _scan_fstring(code, pos, quote):
+    """
+    扫描 f-string 主体，替换字段中允许出现嵌套的字符串（包括同种引号）
+    """
+    literal = _FSTRING_LITERAL[quote]
+    single_line = len(quote) == 1
+    n = len(code)
+    while True:
+        pos = literal.match(code, pos).end()
+        if pos >= n:
+            return n
+        ch = code[pos]
+        if ch == '\\':
+            pos += 2
+        elif ch == '{':
+            if code.startswith('{{', pos):
+                pos += 2
+            else:
+                pos = _scan_field(code, pos + 1)
+        elif ch == '}':
+            pos += 1
+        elif ch == '\n':
+            # 单引号 f-string 未闭合，停在行尾
+            return pos
+        elif code.startswith(quote, pos):
+            return pos + len(quote)
+        elif single_line:
+            return pos
+        else:
+            # 三引号字符串中的单个引号
+            pos += 1
+
+
+def _scan_field(code, pos):
+    """
+    扫描 f-string 替换字段（左花括号之后），返回右花括号之后的位置
+    """
+    depth = 0
+    n = len(code)
+    while pos < n:
+        m = _FIELD_TOKEN.match(code, pos)
+        kind = m.lastgroup
+        pos = m.end()
+        if kind == 'string':
+            text = m.group()
+            quote = text.lstrip('rRbBuUfF')
+            pos = _scan_string(code, pos, text[:len(text) - len(quote)], quote)
+        elif kind == 'open':
+            depth += 1
+        elif kind == 'close':
+            if depth == 0:
+                return pos
+            depth -= 1
+        elif kind == 'colon' and depth == 0:
+            # 格式说明部分，其中可以再嵌套替换字段
+            return _scan_format_spec(code, pos)
+    return n
+
+
+def _scan_format_spec(code, pos):
+    """
+    扫描替换字段的格式说明，返回右花括号之后的位置
+    """
+    n = len(code)
+    while pos < n:
+        ch = code[pos]
+        if ch == '}':
+            return pos + 1
+        if ch == '{':
+            pos = _scan_field(code, pos + 1)
+        else:
+            pos += 1
+    return n
+
+
+def strip_python(code, drop_blank_lines=False):
+    """
+    从Python代码中移除注释
+
+    移除所有 # 注释；仅由注释组成的行整行删除。处于语句位置的三引号字符串
+    （文档字符串）同样删除，作为表达式一部分的三引号字符串原样保留。
+
+    Args:
+        code (str): 原始Python代码
+        drop_blank_lines (bool): 是否同时删除所有空白行
+
+    Returns:
+        str: 移除注释后的代码
+    """
+    # lines 中的元素以换行符连接得到结果，一个元素可以包含多个完整的行
+    lines = []
+    current = []
+    has_code = False
+    has_comment = False
+    continued = False
+    depth = 0
+    pos = 0
+    n = len(code)
+
+    while pos < n:
+        m = _SCAN.match(code, pos)
+        end = m.end('run')
+        if end > pos:
+            chunk = code[pos:end]
+            if '(' in chunk or '[' in chunk or '{' in chunk or \
+               ')' in chunk or ']' in chunk or '}' in chunk:
+                bare = _SIMPLE_STRING.sub('', chunk) if "'" in chunk or '"' in chunk else chunk
+                depth += bare.count('(') + bare.count('[') + bare.count('{')
+                depth -= bare.count(')') + bare.count(']') + bare.count('}')
+                if depth < 0:
+                    depth = 0
+            first = chunk.find('\n')
+            if first < 0:
+                current.append(chunk)
+                if not has_code and chunk.strip():
+                    has_code = True
+            else:
+                # 结束当前行
+                head = chunk[:first]
+                current.append(head)
+                if not has_code and head.strip():
+                    has_code = True
+                if has_code or not (has_comment or drop_blank_lines):
+                    lines.append(''.join(current))
+                # 中间的完整行不含注释和多行字符串，整体保留
+                last = chunk.rfind('\n')
+                if last > first:
+                    block = chunk[first + 1:last]
+                    if drop_blank_lines:
+                        block = _BLANK_LINE.sub('', block + '\n')[:-1]
+                        if block:
+                            lines.append(block)
+                    else:
+                        lines.append(block)
+                tail = chunk[last + 1:]
+                current = [tail]
+                has_code = bool(tail.strip())
+                has_comment = False
+                continued = False
+
+        kind = m.lastgroup
+        if kind == 'run':
+            break
+        pos = m.end()
+        if kind == 'string':
+            text = m.group(kind)
+            quote = text.lstrip('rRbBuUfF')
+            pos = _scan_string(code, pos, text[:len(text) - len(quote)], quote)
+            if len(quote) == 3 and depth == 0 and not has_code and not continued \
+                    and _DOCSTRING_TAIL.match(code, pos):
+                # 独立的文档字符串，直接丢弃
+                continue
+            current.append(code[end:pos])
+            has_code = True
+        elif kind == 'comment':
+            has_comment = True
+        else:
+            # 续行符：当前物理行结束，下一行属于同一逻辑行
+            current.append(m.group(kind)[:-1])
+            lines.append(''.join(current))
+            current = []
+            has_code = False
+            has_comment = False
+            continued = True
+
+    if has_code or not (has_comment or drop_blank_lines):
+        lines.append(''.join(current))
+    return '\n'.join(lines)
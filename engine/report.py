@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+"""
+性能报告
+
+记录每个文件各阶段（读取、去注释、写入、编译 .pyc）的耗时以及输入、输出和移除的字节数，
+按文件类型汇总，可以导出为 JSON 或 CSV，并生成文字摘要（最慢的文件、总吞吐量）。
+
+profiling() 可以在处理期间开启 cProfile 和 tracemalloc，结果一并记入报告。
+两者只能观察到当前进程的当前线程，并行处理时工作进程中的开销不在其中，需要完整的
+剖析结果时请使用串行处理。
+"""
+
+import contextlib
+import csv
+import json
+import time
+
+# 默认的报告文件名
+REPORT_NAME = 'strip_report.json'
+
+# 每个文件记录的字段，也是 CSV 的列
+FIELDS = ('path', 'file_type', 'status', 'read', 'strip', 'write', 'compile', 'bytes_in', 'bytes_out', 'removed')
+
+_MB = 1024 * 1024
+
+
+def _mb(nbytes):
+    return nbytes / _MB
+
+
+def _seconds(record):
+    return record['read'] + record['strip'] + record['write'] + record['compile']
+
+
+class Report:
+    """
+    一次批量处理的性能报告
+
+    records 中每个文件一条记录，字段见 FIELDS；status 为 'written'、'unchanged'、
+    'skipped'（增量跳过）、'sniffed'（压缩或生成的文件，见 sniff 模块）或 'failed'。
+    流式处理的文件读、处理、写交替进行，耗时全部计入 strip。
+    """
+
+    def __init__(self):
+        self.records = []
+        # 整体阶段的耗时（秒），如 walk: 遍历目录，process: 处理文件
+        self.stages = {}
+        # profiling() 的结果
+        self.profile = {}
+
+    def add_stage(self, name, seconds):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def add(self, path, file_type, status, metrics=None):
+        """
+        添加一个文件的记录
+
+        Args:
+            path (str): 文件路径
+            file_type (str): 文件类型
+            status (str): 处理结果
+            metrics (dict, optional): read / strip / write / compile 耗时和 bytes_in / bytes_out 字节数
+        """
+        metrics = metrics or {}
+        bytes_in = metrics.get('bytes_in', 0)
+        bytes_out = metrics.get('bytes_out', 0)
+        self.records.append({
+            'path': path,
+            'file_type': file_type,
+            'status': status,
+            'read': round(metrics.get('read', 0.0), 6),
+            'strip': round(metrics.get('strip', 0.0), 6),
+            'write': round(metrics.get('write', 0.0), 6),
+            'compile': round(metrics.get('compile', 0.0), 6),
+            'bytes_in': bytes_in,
+            'bytes_out': bytes_out,
+            # 跳过和失败的文件没有输出，不计入移除量
+            'removed': bytes_in - bytes_out if status in ('written', 'unchanged') else 0,
+        })
+
+    @property
+    def elapsed(self):
+        return sum(self.stages.values())
+
+    def by_language(self):
+        """
+        按文件类型汇总
+
+        Returns:
+            dict: {文件类型: {files, read, strip, write, compile, bytes_in, bytes_out, removed}}
+        """
+        groups = {}
+        for record in self.records:
+            group = groups.setdefault(record['file_type'], {
+                'files': 0, 'read': 0.0, 'strip': 0.0, 'write': 0.0, 'compile': 0.0,
+                'bytes_in': 0, 'bytes_out': 0, 'removed': 0,
+            })
+            group['files'] += 1
+            for key in ('read', 'strip', 'write', 'compile', 'bytes_in', 'bytes_out', 'removed'):
+                group[key] += record[key]
+        return groups
+
+    def slowest(self, count=10):
+        """
+        返回总耗时最长的 count 个文件的记录
+        """
+        return sorted(self.records, key=_seconds, reverse=True)[:count]
+
+    def totals(self):
+        bytes_in = sum(r['bytes_in'] for r in self.records)
+        elapsed = self.elapsed
+        return {
+            'files': len(self.records),
+            'elapsed': elapsed,
+            'bytes_in': bytes_in,
+            'bytes_out': sum(r['bytes_out'] for r in self.records),
+            'removed': sum(r['removed'] for r in self.records),
+            'mb_per_s': _mb(bytes_in) / elapsed if elapsed > 0 else None,
+        }
+
+    def summary(self, count=5):
+        """
+        返回适合直接显示给用户的多行摘要
+
+        Args:
+            count (int): 列出的最慢文件数
+        """
+        totals = self.totals()
+        lines = [f"共 {totals['files']} 个文件，耗时 {totals['elapsed']:.2f} 秒，"
+                 f"输入 {_mb(totals['bytes_in']):.2f} MB，移除 {_mb(totals['removed']):.2f} MB"
+                 + (f"，吞吐量 {totals['mb_per_s']:.2f} MB/秒" if totals['mb_per_s'] else "")]
+        for file_type, group in sorted(self.by_language().items()):
+            ratio = group['removed'] / group['bytes_in'] if group['bytes_in'] else 0
+            lines.append(f"  {file_type}: {group['files']} 个文件，读取 {group['read']:.3f} 秒，"
+                         f"去注释 {group['strip']:.3f} 秒，写入 {group['write']:.3f} 秒，"
+                         + (f"编译 {group['compile']:.3f} 秒，" if group['compile'] else "")
+                         + f"移除 {ratio:.1%}")
+        slowest = [r for r in self.slowest(count) if r['status'] != 'failed']
+        if slowest:
+            lines.append("最慢的文件:")
+            for record in slowest:
+                seconds = _seconds(record)
+                lines.append(f"  {seconds:8.3f} 秒  {record['path']}")
+        if 'peak_memory' in self.profile:
+            lines.append(f"峰值内存: {_mb(self.profile['peak_memory']):.2f} MB")
+        if 'cprofile' in self.profile:
+            lines.append(f"cProfile 结果: {self.profile['cprofile']}")
+        return '\n'.join(lines)
+
+    def to_dict(self):
+        return {
+            'totals': self.totals(),
+            'stages': dict(self.stages),
+            'languages': self.by_language(),
+            'files': self.records,
+            'profile': self.profile,
+        }
+
+    def write_json(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=1)
+
+    def write_csv(self, path):
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=FIELDS)
+            writer.writeheader()
+            writer.writerows(self.records)
+
+    def save(self, path):
+        """
+        按扩展名写出报告：.csv 为每个文件一行的 CSV，其他为 JSON
+        """
+        if path.lower().endswith('.csv'):
+            self.write_csv(path)
+        else:
+            self.write_json(path)
+
+
+@contextlib.contextmanager
+def profiling(report, profile_path=None, trace_memory=False, top=10):
+    """
+    在 with 块内开启 cProfile 和/或 tracemalloc，结束后把结果记入 report.profile
+
+    Args:
+        report (Report): 性能报告
+        profile_path (str, optional): cProfile 结果的保存路径，可用 python -m pstats 查看；为None时不开启
+        trace_memory (bool): 是否用 tracemalloc 记录峰值内存和结束时占用内存最多的代码行
+        top (int): 记录的函数和代码行数
+    """
+    profiler = None
+    if profile_path:
+        import cProfile
+        profiler = cProfile.Profile()
+    if trace_memory:
+        import tracemalloc
+        tracemalloc.start()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield report
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(profile_path)
+            report.profile['cprofile'] = profile_path
+            report.profile['functions'] = _top_functions(profiler, top)
+        if trace_memory:
+            _, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            report.profile['peak_memory'] = peak
+            report.profile['allocations'] = [
+                {'line': str(stat.traceback[0]), 'size': stat.size, 'count': stat.count}
+                for stat in snapshot.statistics('lineno')[:top]
+            ]
+
+
+def _top_functions(profiler, top):
+    import pstats
+    stats = pstats.Stats(profiler)
+    rows = []
+    for (filename, lineno, name), (_, calls, tottime, cumtime, _) in stats.stats.items():
+        rows.append({'function': f'{filename}:{lineno}({name})', 'calls': calls,
+                     'tottime': tottime, 'cumtime': cumtime})
+    rows.sort(key=lambda row: row['cumtime'], reverse=True)
+    return rows[:top]
+
+
+class Timer:
+    """
+    依次记录各阶段的耗时：timer.lap('read') 记录自上一次调用（或创建）以来的时间
+
+    metrics 为None时不计时，调用 lap 没有开销
+    """
+
+    def __init__(self, metrics):
+        self.metrics = metrics
+        self._last = time.perf_counter() if metrics is not None else 0.0
+
+    def lap(self, stage):
+        if self.metrics is None:
+            return
+        now = time.perf_counter()
+        self.metrics[stage] = self.metrics.get(stage, 0.0) + now - self._last
+        self._last = now
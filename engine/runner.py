@@ -0,0 +1,595 @@
+# -*- coding: utf-8 -*-
+"""
+目录批量处理：收集待处理文件，串行或通过进程池并行执行
+"""
+
+import hashlib
+import os
+import time
+from functools import partial
+
+from .atomic import write_bytes
+from .mirror import MIRROR_MODES, mirror_file
+from .manifest import (MANIFEST_NAME, Manifest, hash_bytes, hash_file, is_up_to_date, make_entry,
+                       options_fingerprint)
+from .report import Timer
+from .sniff import REASONS
+from .strip import DEFAULT_EXTENSIONS, strip_bytes
+from .stream import should_stream, stream_file
+from .walk import IgnoreRules, exclude_output, scan_tree
+
+
+class RunStats:
+    """
+    一次批量处理的统计信息
+    """
+
+    def __init__(self):
+        # 成功数包含增量处理时因未变化而跳过的文件
+        self.success_count = 0
+        self.fail_count = 0
+        self.skipped_count = 0
+        # 实际处理的文件中，写入了新内容的和输出与原有内容相同而未写入的
+        self.written_count = 0
+        self.unchanged_count = 0
+        # 遍历目录时按排除规则跳过的目录和文件数
+        self.pruned_count = 0
+        # 镜像模式下复制（或链接）到输出目录的其他文件数，以及已相同而跳过的
+        self.mirrored_count = 0
+        self.mirror_unchanged_count = 0
+        # 只处理变化的文件时，因源文件已删除而删除的输出数
+        self.removed_count = 0
+        # 使用结果缓存时命中和未命中的文件数
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # 按文件名和内容判断为压缩、生成或过大而跳过的文件 [(文件路径, 原因)]，原因见 sniff.REASONS
+        self.sniffed = []
+        # 是否因用户取消而提前结束
+        self.cancelled = False
+        # [(文件路径, 错误信息)]
+        self.errors = []
+
+    @property
+    def processed_count(self):
+        return self.success_count - self.skipped_count
+
+    def add_error(self, file_path, message):
+        self.fail_count += 1
+        self.errors.append((file_path, message))
+
+    def summary(self):
+        """
+        返回适合直接显示给用户的统计摘要
+        """
+        text = f"成功: {self.success_count}"
+        if self.unchanged_count or self.skipped_count:
+            details = [f"写入 {self.written_count}", f"输出未变 {self.unchanged_count}"]
+            if self.skipped_count:
+                details.append(f"增量跳过 {self.skipped_count}")
+            text += f"（{'，'.join(details)}）"
+        text += f"，失败: {self.fail_count}"
+        if self.mirrored_count or self.mirror_unchanged_count:
+            text += f"，其他文件: 复制 {self.mirrored_count}，未变 {self.mirror_unchanged_count}"
+        if self.removed_count:
+            text += f"，删除输出: {self.removed_count}"
+        if self.pruned_count:
+            text += f"，排除: {self.pruned_count}"
+        if self.sniffed:
+            text += f"，跳过压缩或生成的文件: {len(self.sniffed)}"
+        if self.cache_hits or self.cache_misses:
+            text += f"，缓存命中: {self.cache_hits}/{self.cache_hits + self.cache_misses}"
+        return text
+
+    def sniffed_list(self, limit=None):
+        """
+        返回按内容跳过的文件列表，每行一个文件及原因，超过 limit 个时省略其余
+        """
+        lines = [f"  {file_path}（{REASONS[reason]}）" for file_path, reason in self.sniffed[:limit]]
+        if limit is not None and len(self.sniffed) > limit:
+            lines.append(f"  ……等共 {len(self.sniffed)} 个文件")
+        return '\n'.join(lines)
+
+
+def strip_file(file_path, output_path, file_type='py', options=None, metrics=None, cache=None):
+    """
+    读取源文件，移除注释后写入 output_path
+
+    按字节读写，输出保持源文件的编码和 BOM，见 encoding 模块。
+    输出与已有文件内容相同时不写入，否则写入临时文件后原子替换。
+    超过 STREAM_THRESHOLD 的 JS/CSS/HTML 文件按块流式处理，内存占用与文件大小无关。
+
+    Args:
+        file_path (str): 源文件路径
+        output_path (str): 输出文件路径，可以与源文件相同
+        file_type (str): 文件类型
+        options (dict, optional): 传给 strip_source 的选项，如 keep_header
+        metrics (dict, optional): 记录各阶段耗时（read / strip / write）和输入、输出字节数
+        cache (ResultCache, optional): 结果缓存，内容、类型和选项都相同的文件直接取出上次的结果；
+                                       流式处理的大文件不使用缓存
+
+    Returns:
+        bool: 是否写入了输出文件，内容未变时为False
+
+    Raises:
+        Exception: 读写或处理失败时抛出
+    """
+    if metrics is not None:
+        # 覆盖原文件时写入后就无法再得到源文件大小，先记录
+        metrics['bytes_in'] = os.path.getsize(file_path)
+    timer = Timer(metrics)
+    if should_stream(file_path, file_type):
+        written = stream_file(file_path, output_path, file_type, options=options)
+        timer.lap('strip')
+    else:
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        timer.lap('read')
+
+        cleaned = _strip_data(data, file_type, options, cache, metrics)
+        timer.lap('strip')
+
+        written = write_bytes(output_path, cleaned)
+        timer.lap('write')
+    if metrics is not None:
+        metrics['bytes_out'] = os.path.getsize(output_path)
+    return written
+
+
+def _strip_data(data, file_type, options, cache, metrics):
+    if cache is None:
+        return strip_bytes(data, file_type, **(options or {}))
+    return cache.strip(data, file_type, options, metrics)
+
+
+def _strip_incremental(file_path, output_path, file_type, options, fingerprint, previous, metrics, cache=None):
+    """
+    增量处理单个文件
+
+    Returns:
+        tuple: (是否跳过, 新的清单条目, 是否写入了输出文件)
+    """
+    if metrics is not None:
+        metrics['bytes_in'] = os.path.getsize(file_path)
+    timer = Timer(metrics)
+    if should_stream(file_path, file_type):
+        source_hash = hash_file(file_path)
+        timer.lap('read')
+        if is_up_to_date(previous, fingerprint, source_hash, file_path, output_path):
+            return True, previous, False
+        digest = hashlib.sha256()
+        written = stream_file(file_path, output_path, file_type, output_digest=digest, options=options)
+        timer.lap('strip')
+        entry = make_entry(fingerprint, source_hash, output_path, digest.hexdigest())
+    else:
+        with open(file_path, 'rb') as f:
+            data = f.read()
+
+        source_hash = hash_bytes(data)
+        timer.lap('read')
+        if is_up_to_date(previous, fingerprint, source_hash, file_path, output_path):
+            return True, previous, False
+
+        cleaned = _strip_data(data, file_type, options, cache, metrics)
+        timer.lap('strip')
+
+        written = write_bytes(output_path, cleaned)
+        entry = make_entry(fingerprint, source_hash, output_path, hash_bytes(cleaned))
+        timer.lap('write')
+    if metrics is not None:
+        metrics['bytes_out'] = os.path.getsize(output_path)
+    return False, entry, written
+
+
+def _sniff_task(task, skip, metrics=None):
+    """
+    按 SkipRules 判断是否跳过任务
+
+    Returns:
+        tuple: 跳过时返回 _run_task 格式的结果，其中“是否跳过”为原因；不跳过时返回None
+    """
+    file_path, output_path, _, _ = task
+    reason = skip.check(file_path)
+    if reason is None:
+        return None
+    # 输出到其他目录时原样复制，输出目录仍是完整的
+    written = output_path != file_path and mirror_file(file_path, output_path)
+    return None, reason, None, written, metrics
+
+
+def _run_task(task, previous=None, options=None, fingerprint=None, measure=False, compile_levels=None,
+              cache=None, skip=None):
+    """
+    在（工作进程中）处理单个任务
+
+    Args:
+        task (tuple): (源文件路径, 输出文件路径, 文件类型, 相对路径)
+        previous (dict, optional): 清单中该文件上一次的条目
+        options (dict, optional): 传给 strip_source 的选项
+        fingerprint (str, optional): 选项指纹，不为None时进行增量处理
+        measure (bool): 是否返回各阶段耗时和字节数
+        compile_levels (tuple, optional): 指定时把 Python 输出编译为这些优化级别的 .pyc，无法编译即失败
+        cache (ResultCache, optional): 结果缓存，使用时总是返回 metrics，其中 cache 为 'hit' 或 'miss'
+        skip (SkipRules, optional): 跳过压缩、生成和过大的文件，见 sniff 模块
+
+    Returns:
+        tuple: (错误信息或None, 是否跳过, 新的清单条目或None, 是否写入了输出文件, 耗时和字节数或None)，
+               增量跳过时“是否跳过”为True，按 skip 跳过时为原因
+    """
+    file_path, output_path, file_type, _ = task
+    metrics = {} if measure or cache is not None else None
+    try:
+        if file_type in MIRROR_MODES:
+            # 镜像模式下的其他文件，文件类型为镜像方式
+            return None, False, None, mirror_file(file_path, output_path, file_type), None
+        if skip is not None:
+            result = _sniff_task(task, skip, metrics)
+            if result is not None:
+                return result
+        if fingerprint is None:
+            skipped, entry = False, None
+            written = strip_file(file_path, output_path, file_type, options, metrics, cache)
+        else:
+            skipped, entry, written = _strip_incremental(file_path, output_path, file_type, options,
+                                                         fingerprint, previous, metrics, cache)
+        if compile_levels and file_type == 'py':
+            # py_compile 及其依赖导入较慢，只在需要编译时才导入
+            from .bytecode import compile_output
+            timer = Timer(metrics)
+            compile_output(output_path, compile_levels, file_path)
+            timer.lap('compile')
+        return None, skipped, entry, written, metrics
+    except Exception as e:
+        return str(e), False, None, False, metrics
+
+
+def collect_tasks(dir_path, output_dir=None, recursive=True, extensions=None, ignore=None, stats=None,
+                  mirror=None):
+    """
+    遍历目录，收集所有需要处理的文件
+
+    Args:
+        dir_path (str): 要处理的目录路径
+        output_dir (str, optional): 输出目录，为None时覆盖原文件
+        recursive (bool): 是否递归处理子目录
+        extensions (dict): 扩展名到处理类型的映射
+        ignore (IgnoreRules, optional): 排除规则，默认跳过 DEFAULT_EXCLUDES 中的目录
+        stats (RunStats, optional): 累加被排除的目录和文件数
+        mirror (str, optional): 'copy' 或 'link' 时同时收集其他文件，镜像到输出目录，见 mirror_file
+
+    Returns:
+        list: [(源文件路径, 输出文件路径, 文件类型, 相对路径)]，顺序与 os.walk 一致
+    """
+    files, pruned = scan_tree(dir_path, extensions, recursive, ignore, bool(mirror))
+    if stats is not None:
+        stats.pruned_count += pruned
+
+    return [make_task(file_path, rel_path, file_type or mirror, output_dir)
+            for file_path, rel_path, file_type in files]
+
+
+def make_task(file_path, rel_path, file_type, output_dir=None):
+    """
+    构建一个任务，需要时创建输出目录
+
+    Returns:
+        tuple: (源文件路径, 输出文件路径, 文件类型, 相对路径)
+    """
+    # 相对路径用于保持目录结构，同时作为增量清单的键
+    if output_dir:
+        os.makedirs(os.path.join(output_dir, os.path.dirname(rel_path)), exist_ok=True)
+        output_path = os.path.join(output_dir, rel_path)
+    else:
+        output_path = file_path
+    return file_path, output_path, file_type, rel_path
+
+
+def collect_changed_tasks(dir_path, since, output_dir=None, recursive=True, extensions=None, ignore=None,
+                          mirror=None, stats=None):
+    """
+    通过本地 git 仓库收集自提交 since 以来新增或修改的文件，并删除已删除文件的输出，见 gitdiff 模块
+
+    排除规则按路径判断，不读取 .gitignore；未跟踪的文件由 git 按 .gitignore 排除。
+    先删除输出再构建任务，删除后变空的目录不会是新任务的输出目录。
+
+    Returns:
+        tuple: (任务列表, 已删除的源文件的相对路径列表)；dir_path 不是 git 工作区时返回None
+    """
+    from .gitdiff import changed_files
+    changes = changed_files(dir_path, since)
+    if changes is None:
+        return None
+    if ignore is None:
+        ignore = IgnoreRules()
+
+    def file_type_of(rel_path):
+        if not recursive and os.sep in rel_path:
+            return None
+        if ignore.is_excluded(rel_path.replace(os.sep, '/')):
+            return None
+        return extensions.get(os.path.splitext(rel_path)[1].lower()) or mirror
+
+    changed, deleted = changes
+    deleted = [rel_path for rel_path in deleted if file_type_of(rel_path) is not None]
+    # 覆盖原文件时没有需要删除的输出
+    if output_dir:
+        for rel_path in deleted:
+            existed = os.path.lexists(os.path.join(output_dir, rel_path))
+            if remove_output(output_dir, rel_path) and existed and stats is not None:
+                stats.removed_count += 1
+    tasks = []
+    for rel_path in changed:
+        file_type = file_type_of(rel_path)
+        file_path = os.path.join(dir_path, rel_path)
+        # 子模块等目录，以及比较之后又被删除的文件
+        if file_type is not None and os.path.isfile(file_path):
+            tasks.append(make_task(file_path, rel_path, file_type, output_dir))
+    return tasks, deleted
+
+
+def _prune_empty_dirs(path, root):
+    # 删除输出后，逐级删除变空的上级目录，直到输出目录为止
+    root = os.path.abspath(root)
+    path = os.path.dirname(os.path.abspath(path))
+    while path != root and path.startswith(root + os.sep):
+        try:
+            os.rmdir(path)
+        except OSError:
+            return
+        path = os.path.dirname(path)
+
+
+def remove_output(output_dir, rel_path, manifest=None):
+    """
+    删除一个源文件的输出和增量清单中的记录
+
+    Returns:
+        bool: 是否删除了输出（输出本来就不存在时也为True），出错时为False
+    """
+    if manifest is not None:
+        manifest.update(rel_path, None)
+    output_path = os.path.join(output_dir, rel_path)
+    try:
+        os.remove(output_path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        print(f"删除输出文件 {output_path} 时出错: {e}")
+        return False
+    _prune_empty_dirs(output_path, output_dir)
+    return True
+
+
+def record_result(task, result, stats, manifest=None, report=None):
+    """
+    把一个任务的结果计入统计信息、增量清单和性能报告
+
+    Args:
+        task (tuple): 任务
+        result (tuple): _run_task 的返回值
+        stats (RunStats): 统计信息
+        manifest (Manifest, optional): 增量清单
+        report (Report, optional): 性能报告
+    """
+    file_path, _, file_type, rel_path = task
+    error, skipped, entry, written, metrics = result
+    if file_type in MIRROR_MODES:
+        if error is not None:
+            print(f"复制文件 {file_path} 时出错: {error}")
+            stats.add_error(file_path, error)
+        elif written:
+            stats.mirrored_count += 1
+        else:
+            stats.mirror_unchanged_count += 1
+        return
+    if metrics and 'cache' in metrics:
+        if metrics['cache'] == 'hit':
+            stats.cache_hits += 1
+        else:
+            stats.cache_misses += 1
+    if error is None and isinstance(skipped, str):
+        # 按内容跳过的文件不计入成功数，也不保留清单条目，下次重新判断
+        stats.sniffed.append((file_path, skipped))
+        status = 'sniffed'
+    elif error is None:
+        stats.success_count += 1
+        if skipped:
+            stats.skipped_count += 1
+            status = 'skipped'
+        elif written:
+            stats.written_count += 1
+            status = 'written'
+        else:
+            stats.unchanged_count += 1
+            status = 'unchanged'
+    else:
+        print(f"处理文件 {file_path} 时出错: {error}")
+        stats.add_error(file_path, error)
+        status = 'failed'
+    if report is not None:
+        report.add(file_path, file_type, status, metrics)
+    if manifest is not None:
+        # 失败的文件从清单中移除，下次一定会重新处理
+        manifest.update(rel_path, entry)
+
+
+def _default_chunksize(task_count, workers):
+    # 每个进程大约分到 8 批，单批不超过 64 个文件，兼顾调度开销和负载均衡
+    return max(1, min(64, task_count // (workers * 8)))
+
+
+def run_tasks(tasks, options=None, workers=None, chunksize=None, stats=None,
+              manifest=None, fingerprint=None, progress=None, cancel=None, report=None, compile_levels=None,
+              cache=None, skip=None, timeout=None, task_func=None, record=None):
+    """
+    执行任务列表
+
+    Args:
+        tasks (list): collect_tasks 返回的任务列表
+        options (dict, optional): 传给 strip_source 的选项
+        workers (int, optional): 并行进程数；None或1为串行，0表示使用全部CPU核心
+        chunksize (int, optional): 每次分发给工作进程的文件数，默认自动计算
+        stats (RunStats, optional): 用于收集统计信息和错误列表
+        manifest (Manifest, optional): 增量清单，提供时跳过未变化的文件并更新清单
+        fingerprint (str, optional): 选项指纹，与 manifest 一起使用
+        progress (callable, optional): 每处理完一个文件调用 progress(已完成数, 总数, 文件路径)
+        cancel (threading.Event, optional): 被设置后处理完当前文件即停止，stats.cancelled 置为True
+        report (Report, optional): 性能报告，记录每个文件各阶段的耗时和字节数
+        compile_levels (tuple, optional): 把 Python 输出编译为这些优化级别的 .pyc，见 bytecode 模块
+        cache (ResultCache, optional): 结果缓存，见 cache 模块；命中数计入 stats.cache_hits
+        skip (SkipRules, optional): 跳过压缩、生成和过大的文件，计入 stats.sniffed，见 sniff 模块
+        timeout (float, optional): 每个文件的处理时间上限（秒）；指定时每个文件在可以强制结束的独立工作进程中处理，
+                                   超时的文件计为失败，见 isolate 模块
+        task_func (callable, optional): 代替去注释执行每个任务，在工作进程中调用 task_func(任务, 清单条目)，
+                                        必须可以被 pickle；与 timeout 一起使用时返回值须与 _run_task 相同
+        record (callable, optional): 在主进程中按任务顺序调用 record(任务, task_func 的返回值)，
+                                     代替计入 stats / manifest / report，与 task_func 一起使用
+
+    Returns:
+        tuple: (成功处理的文件数, 处理失败的文件数)
+    """
+    start = time.perf_counter()
+    if stats is None:
+        stats = RunStats()
+    if workers is not None and workers <= 0:
+        workers = os.cpu_count() or 1
+    if manifest is None:
+        fingerprint = None
+        previous = [None] * len(tasks)
+    else:
+        previous = [manifest.get(task[3]) for task in tasks]
+    func = task_func
+    if func is None:
+        func = partial(_run_task, options=options, fingerprint=fingerprint, measure=report is not None,
+                       compile_levels=compile_levels, cache=cache, skip=skip)
+    if record is None:
+        record = partial(record_result, stats=stats, manifest=manifest, report=report)
+
+    executor = None
+    if timeout:
+        from .isolate import run_isolated
+        results = run_isolated(func, tasks, previous, workers or 1, timeout)
+    elif workers is None or workers == 1 or len(tasks) <= 1:
+        results = map(func, tasks, previous)
+    else:
+        # 进程池相关模块导入较慢，只在真正并行时才导入
+        from concurrent.futures import ProcessPoolExecutor
+        if chunksize is None:
+            chunksize = _default_chunksize(len(tasks), workers)
+        executor = ProcessPoolExecutor(max_workers=workers)
+        results = executor.map(func, tasks, previous, chunksize=chunksize)
+
+    total = len(tasks)
+    try:
+        # map 保证结果顺序与任务顺序一致，因此输出与串行完全相同
+        for done, (task, result) in enumerate(zip(tasks, results), 1):
+            record(task, result)
+            if progress is not None:
+                progress(done, total, task[0])
+            if cancel is not None and cancel.is_set():
+                stats.cancelled = True
+                break
+    finally:
+        if executor is not None:
+            # 取消或出错时丢弃尚未开始的任务
+            executor.shutdown(cancel_futures=True)
+        elif timeout:
+            # 结束独立的工作进程
+            results.close()
+        if report is not None:
+            report.add_stage('process', time.perf_counter() - start)
+
+    return stats.success_count, stats.fail_count
+
+
+def process_tree(dir_path, output_dir=None, recursive=True, extensions=None, options=None,
+                 workers=None, stats=None, incremental=False, manifest_path=None,
+                 progress=None, cancel=None, ignore=None, report=None, io_concurrency=None, mirror=None,
+                 compile_levels=None, cache=None, since=None, skip=None, timeout=None):
+    """
+    处理目录中的所有支持的文件
+
+    Args:
+        dir_path (str): 要处理的目录路径
+        output_dir (str, optional): 输出目录
+        recursive (bool): 是否递归处理子目录
+        extensions (dict, optional): 扩展名到处理类型的映射，默认全部类型
+        options (dict, optional): 传给 strip_source 的选项
+        workers (int, optional): 并行进程数，见 run_tasks
+        stats (RunStats, optional): 用于收集统计信息和错误列表
+        incremental (bool): 是否增量处理，跳过内容、选项和输出都未变化的文件
+        manifest_path (str, optional): 清单文件路径，默认放在输出目录（覆盖原文件时为源目录）下
+        progress (callable, optional): 进度回调，见 run_tasks
+        cancel (threading.Event, optional): 取消标志，见 run_tasks
+        ignore (IgnoreRules, optional): 目录遍历的排除规则，默认跳过 DEFAULT_EXCLUDES 中的目录
+        report (Report, optional): 性能报告，见 run_tasks
+        io_concurrency (int, optional): 指定时使用异步 I/O 流水线，同时进行的读写数，见 pipeline 模块
+        mirror (str, optional): 'copy' 或 'link' 时在同一次遍历中把其他文件镜像到输出目录，
+                                已相同的跳过；不指定输出目录时无效
+        compile_levels (tuple, optional): 指定时在写入后立即用 compile() 校验 Python 输出，并写出这些优化级别
+                                          的 __pycache__/*.pyc（0 普通，1 对应 -O，2 对应 -OO），
+                                          无法编译的文件计为失败；在工作进程中进行
+        cache (ResultCache, optional): 跨项目共享的结果缓存，内容、类型和选项都相同的文件不再重复去注释
+        since (str, optional): 提交、标签或分支名，指定时只处理本地 git 仓库中自该提交以来新增或修改的文件
+                               （'HEAD' 即工作区中尚未提交的修改），并删除已删除文件的输出；
+                               目录不是 git 工作区时退回处理全部文件。文件很少，不使用异步 I/O 流水线
+        skip (SkipRules, optional): 按文件名和开头的内容跳过压缩、生成和过大的文件，不读取整个文件；
+                                    输出到其他目录时原样复制，跳过的文件计入 stats.sniffed
+        timeout (float, optional): 每个文件的处理时间上限（秒），超时的文件强制结束并计为失败，见 run_tasks；
+                                   不使用异步 I/O 流水线，与 skip 的 max_size 一起限制病态的输入
+
+    Returns:
+        tuple: (成功处理的文件数, 处理失败的文件数)
+    """
+    if extensions is None:
+        extensions = DEFAULT_EXTENSIONS
+    if stats is None:
+        stats = RunStats()
+    changes = None
+    if since is not None:
+        start = time.perf_counter()
+        # 输出目录在源目录中时，不把输出当作变化的文件
+        changes = collect_changed_tasks(dir_path, since, output_dir, recursive, extensions,
+                                        exclude_output(ignore, dir_path, output_dir),
+                                        mirror if output_dir else None, stats)
+        if report is not None:
+            report.add_stage('walk', time.perf_counter() - start)
+        if changes is None:
+            print(f"{dir_path} 不是 git 工作区，处理全部文件")
+    if changes is None and io_concurrency and not timeout:
+        import asyncio
+        from .pipeline import process_tree_async
+        return asyncio.run(process_tree_async(dir_path, output_dir, recursive, extensions, options, workers,
+                                              stats, incremental, manifest_path, progress, cancel, ignore,
+                                              report, io_concurrency, mirror=mirror,
+                                              compile_levels=compile_levels, cache=cache, skip=skip))
+    if not output_dir:
+        mirror = None
+    if mirror:
+        # 输出目录在源目录中时不能把输出再镜像进去
+        ignore = exclude_output(ignore, dir_path, output_dir)
+    if changes is not None:
+        tasks, deleted = changes
+    else:
+        start = time.perf_counter()
+        tasks = collect_tasks(dir_path, output_dir, recursive, extensions, ignore, stats, mirror)
+        deleted = []
+        if report is not None:
+            report.add_stage('walk', time.perf_counter() - start)
+    if not incremental:
+        return run_tasks(tasks, options, workers, stats=stats, progress=progress, cancel=cancel,
+                         report=report, compile_levels=compile_levels, cache=cache, skip=skip,
+                         timeout=timeout)
+
+    if manifest_path is None:
+        manifest_path = os.path.join(output_dir or dir_path, MANIFEST_NAME)
+    manifest = Manifest(manifest_path)
+    try:
+        for rel_path in deleted:
+            manifest.update(rel_path, None)
+        return run_tasks(tasks, options, workers, stats=stats, manifest=manifest,
+                         fingerprint=options_fingerprint(extensions, options),
+                         progress=progress, cancel=cancel, report=report, compile_levels=compile_levels,
+                         cache=cache, skip=skip, timeout=timeout)
+    finally:
+        # 即使中途出错也保存已完成部分，下次可以接着跳过
+        manifest.save()
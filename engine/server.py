@@ -0,0 +1,420 @@
+# -*- coding: utf-8 -*-
+"""
+常驻的本地去注释服务
+
+Bazel / Make 规则每个源文件调用一次命令行时，每次都要付出解释器启动和导入引擎的开销。
+服务启动时导入引擎，并用各类型的样例代码预热一遍（词法分析的正则表达式、头部规则的缓存等），
+之后在 Unix 套接字或本机 TCP 端口上接受批量请求，直接用已经就绪的引擎处理：
+
+    python -m engine.server
+    python -m engine.server --address 127.0.0.1:8765 -j 4
+
+协议和客户端见 client 模块。每个连接上的请求依次处理，多个连接的请求同时处理：
+workers 为1时在一个线程中依次去注释，大于1时由进程池处理，一批中的文件分给多个进程。
+服务以启动它的用户的权限读写请求中的路径，因此只接受该用户的请求：Unix 套接字文件的权限为 0600，
+默认放在只有该用户可以访问的目录中，并用 SO_PEERCRED 检查每个连接的用户（不支持的平台依靠文件权限）。
+TCP 连接无法确认对方是哪个用户，本机的其他用户也能连接，因此默认只接受 content 请求项，
+不读写请求中的路径，除非以 --allow-paths 启动；默认只绑定 127.0.0.1，不要绑定到对外的地址。
+"""
+
+import argparse
+import asyncio
+import os
+import signal
+import socket
+import stat
+import struct
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .atomic import write_text
+from .client import (MAX_MESSAGE, PROTOCOL_VERSION, decode_message, default_address, encode_message, parse_address,
+                     socket_dir)
+from .encoding import decode_source
+from .header import LICENSE_PATTERNS
+from .runner import strip_file
+from .strip import DEFAULT_EXTENSIONS, ENGINE_VERSION, strip_source
+
+# 请求中可以使用的 strip_source 选项；keep_license 为 header_patterns 加上 LICENSE_PATTERNS
+OPTION_NAMES = ('keep_header', 'drop_blank_lines', 'keep_preformatted', 'keep_conditional_comments',
+                'header_patterns')
+
+# 预热用的样例代码
+_SAMPLES = {
+    'py': ('#!/usr/bin/env python3\n# -*- coding: utf-8 -*-\n# Copyright (c) example\n'
+           'def f(a):  # 注释\n    """文档"""\n    return "#" + a\n'),
+    'js': "var s = 'a // b'; /* 块注释 */ const t = `${s}`; // 注释\n",
+    'html': '<!-- 注释 --><p>文本</p><script>var a = 1; // 注释\n</script><style>/* 注释 */ p {}</style>\n',
+    'css': '/* 注释 */ a:hover { color: red; /* 行内 */ }\n',
+}
+
+
+def warm_up():
+    """
+    用各类型的样例代码预热引擎；也用作进程池的初始化函数
+    """
+    for file_type, sample in _SAMPLES.items():
+        strip_source(sample, file_type)
+        strip_source(sample, file_type, keep_header=True, drop_blank_lines=True, keep_preformatted=True,
+                     keep_conditional_comments=True, header_patterns=LICENSE_PATTERNS)
+
+
+def _options(options):
+    options = dict(options)
+    keep_license = options.pop('keep_license', False)
+    unknown = sorted(set(options) - set(OPTION_NAMES))
+    if unknown:
+        raise ValueError(f"不支持的选项: {', '.join(unknown)}")
+    patterns = list(options.get('header_patterns') or ())
+    if keep_license:
+        patterns = list(LICENSE_PATTERNS) + patterns
+    if patterns:
+        options['keep_header'] = True
+    options['header_patterns'] = tuple(patterns)
+    return options
+
+
+def _file_type(item, path):
+    file_type = item.get('type')
+    if file_type is None and path is not None:
+        file_type = DEFAULT_EXTENSIONS.get(os.path.splitext(path)[1].lower())
+    if file_type is None:
+        raise ValueError("无法确定文件类型，请在请求中指定 type")
+    if file_type not in DEFAULT_EXTENSIONS.values():
+        raise ValueError(f"不支持的文件类型: {file_type}")
+    return file_type
+
+
+def strip_item(item, options=None):
+    """
+    处理一个请求项
+
+    Args:
+        item (dict): 请求项，含 path（源文件）或 content（代码），可选 output、type、options
+        options (dict, optional): 整批共用的选项，item 中的 options 优先
+
+    Returns:
+        dict: {'ok': True, 'written': 是否写入} 或 {'ok': True, 'content': 处理后的内容}，
+              失败时为 {'ok': False, 'error': 错误信息}
+    """
+    try:
+        if not isinstance(item, dict):
+            raise ValueError("请求项必须是 JSON 对象")
+        options = _options({**(options or {}), **(item.get('options') or {})})
+        path = item.get('path')
+        output = item.get('output')
+        content = item.get('content')
+        for p in (path, output):
+            if p is not None and not os.path.isabs(p):
+                raise ValueError(f"路径必须是绝对路径: {p}")
+        file_type = _file_type(item, path or output)
+        if content is not None:
+            text = strip_source(content, file_type, **options)
+            if output is not None:
+                return {'ok': True, 'written': write_text(output, text)}
+            return {'ok': True, 'content': text}
+        if path is None:
+            raise ValueError("请求项中需要 path 或 content")
+        if output is not None:
+            return {'ok': True, 'written': strip_file(path, output, file_type, options)}
+        with open(path, 'rb') as f:
+            code, encoding = decode_source(f.read(), file_type)
+        text = strip_source(code, file_type, **options)
+        if encoding.codec != encoding.name:
+            # 按字节处理的文本，还原为真正的字符
+            text = text.encode(encoding.codec).decode(encoding.name, 'replace')
+        return {'ok': True, 'content': text, 'encoding': encoding.name}
+    except Exception as e:
+        return {'ok': False, 'error': str(e)}
+
+
+def strip_batch(items, options=None):
+    """
+    依次处理一批请求项
+
+    Returns:
+        list: 与 items 对应的结果，见 strip_item
+    """
+    return [strip_item(item, options) for item in items]
+
+
+def _ensure_private_dir(directory):
+    """
+    创建默认的套接字目录，并确认它属于当前用户且其他用户无法访问
+
+    Raises:
+        OSError: 目录属于其他用户或权限过宽
+    """
+    try:
+        os.mkdir(directory, 0o700)
+    except FileExistsError:
+        pass
+    st = os.lstat(directory)
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o077:
+        raise OSError(f"{directory} 不是只有当前用户可以访问的目录（属主 uid {st.st_uid}，"
+                      f"权限 {stat.S_IMODE(st.st_mode):o}），拒绝在其中监听")
+
+
+def _chunks(items, n):
+    size = -(-len(items) // n)
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+class StripServer:
+    """
+    常驻的去注释服务
+
+    Args:
+        address (str, optional): 监听地址，见 client.parse_address，默认为 client.default_address()
+        workers (int): 去注释的进程数，1 表示在服务进程中处理，0 表示CPU核心数
+        allow_paths (bool, optional): 是否读写请求项中的 path / output，默认只在 Unix 套接字上允许
+
+    Attributes:
+        requests (int): 已处理的请求数
+        files (int): 已处理的请求项数
+        failures (int): 处理失败的请求项数
+    """
+
+    def __init__(self, address=None, workers=1, allow_paths=None):
+        self.address = address or default_address()
+        self.kind, self.target = parse_address(self.address)
+        self.allow_paths = self.kind == 'unix' if allow_paths is None else allow_paths
+        self.workers = (os.cpu_count() or 1) if workers == 0 else max(1, workers)
+        self.requests = 0
+        self.files = 0
+        self.failures = 0
+        self.started = None
+        self._server = None
+        self._executor = None
+        self._stopped = None
+        # 每个连接的 writer 和处理它的任务
+        self._connections = {}
+
+    def _make_executor(self):
+        if self.workers == 1:
+            warm_up()
+            return ThreadPoolExecutor(max_workers=1)
+        from concurrent.futures import ProcessPoolExecutor
+
+        executor = ProcessPoolExecutor(max_workers=self.workers, initializer=warm_up)
+        # 立即启动并预热工作进程，第一个请求不必等待
+        executor.submit(os.getpid).result()
+        return executor
+
+    def _prepare_socket_path(self):
+        # 上次未正常退出留下的套接字文件：没有服务在监听时删除，否则报错
+        path = self.target
+        directory = os.path.dirname(os.path.abspath(path))
+        if os.name == 'posix' and directory == socket_dir():
+            _ensure_private_dir(directory)
+        try:
+            mode = os.lstat(path).st_mode
+        except FileNotFoundError:
+            return
+        if not stat.S_ISSOCK(mode):
+            raise OSError(f"{path} 已存在且不是套接字文件")
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+            try:
+                probe.connect(path)
+            except OSError:
+                os.unlink(path)
+                return
+        raise OSError(f"已有服务在 {path} 上监听")
+
+    async def start(self):
+        """
+        预热引擎并开始监听
+
+        Raises:
+            OSError: 地址已被占用
+        """
+        # 先创建进程池再启动其他线程，避免在多线程的进程中 fork
+        self._executor = self._make_executor()
+        self._stopped = asyncio.Event()
+        try:
+            if self.kind == 'unix':
+                self._prepare_socket_path()
+                self._server = await asyncio.start_unix_server(self._handle, self.target, limit=MAX_MESSAGE)
+                # 进程池的管理线程已经在运行，不能临时修改整个进程的 umask，绑定后再收紧权限
+                os.chmod(self.target, 0o600)
+            else:
+                host, port = self.target
+                self._server = await asyncio.start_server(self._handle, host, port, limit=MAX_MESSAGE)
+        except BaseException:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        if self.kind == 'tcp' and self.target[1] == 0:
+            # 由系统分配的端口
+            host, port = self._server.sockets[0].getsockname()[:2]
+            self.target = (host, port)
+            self.address = f'{host}:{port}'
+        self.started = time.time()
+
+    def stop(self):
+        """
+        停止接受新请求并退出 serve_forever
+        """
+        if self._stopped is not None:
+            self._stopped.set()
+
+    async def serve_forever(self):
+        """
+        处理请求，直到 stop() 或收到 shutdown 请求
+        """
+        try:
+            await self._stopped.wait()
+        finally:
+            self._server.close()
+            # 关闭仍然空闲的连接，等待正在处理的请求回复后再退出
+            for writer in list(self._connections):
+                writer.close()
+            await asyncio.gather(*self._connections.values(), return_exceptions=True)
+            await self._server.wait_closed()
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            if self.kind == 'unix':
+                try:
+                    os.unlink(self.target)
+                except FileNotFoundError:
+                    pass
+
+    def _peer_allowed(self, writer):
+        # Unix 套接字上只接受同一用户的连接；没有 SO_PEERCRED 的平台依靠套接字文件的权限
+        if self.kind != 'unix' or not hasattr(socket, 'SO_PEERCRED'):
+            return True
+        creds = writer.get_extra_info('socket').getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED,
+                                                           struct.calcsize('3i'))
+        _, uid, _ = struct.unpack('3i', creds)
+        return uid == os.getuid()
+
+    async def _handle(self, reader, writer):
+        self._connections[writer] = asyncio.current_task()
+        try:
+            if not self._peer_allowed(writer):
+                writer.write(encode_message({'error': "只接受启动服务的用户的连接"}))
+                await writer.drain()
+                return
+            while not self._stopped.is_set():
+                try:
+                    line = await reader.readline()
+                except (ValueError, asyncio.LimitOverrunError):
+                    writer.write(encode_message({'error': f"消息超过 {MAX_MESSAGE // (1024 * 1024)} MB"}))
+                    break
+                if not line:
+                    break
+                writer.write(encode_message(await self._dispatch(line)))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            del self._connections[writer]
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _dispatch(self, line):
+        try:
+            message = decode_message(line)
+        except ValueError as e:
+            return {'error': f"无效的请求: {e}"}
+        op = message.get('op')
+        if op == 'ping':
+            return self.status()
+        if op == 'shutdown':
+            self.stop()
+            return {'ok': True}
+        if op != 'strip':
+            return {'error': f"不支持的操作: {op}"}
+        items = message.get('items')
+        options = message.get('options') or {}
+        if not isinstance(items, list) or not isinstance(options, dict):
+            return {'error': "无效的请求: items 必须是列表，options 必须是对象"}
+        if not self.allow_paths and any(isinstance(item, dict) and ('path' in item or 'output' in item)
+                                        for item in items):
+            return {'error': "该服务不读写请求中的路径（TCP 连接无法确认对方用户），"
+                             "请发送 content，或以 --allow-paths 启动服务"}
+        results = await self._strip(items, options)
+        self.requests += 1
+        self.files += len(items)
+        self.failures += sum(not result['ok'] for result in results)
+        return {'results': results}
+
+    async def _strip(self, items, options):
+        loop = asyncio.get_running_loop()
+        if self.workers == 1 or len(items) < 2:
+            return await loop.run_in_executor(self._executor, strip_batch, items, options)
+        parts = await asyncio.gather(*(loop.run_in_executor(self._executor, strip_batch, chunk, options)
+                                       for chunk in _chunks(items, self.workers)))
+        return [result for part in parts for result in part]
+
+    def status(self):
+        """
+        Returns:
+            dict: 版本、进程号、工作进程数、运行时间和累计处理量
+        """
+        return {'protocol': PROTOCOL_VERSION, 'engine_version': ENGINE_VERSION, 'pid': os.getpid(),
+                'address': self.address, 'workers': self.workers,
+                'uptime': time.time() - self.started if self.started else 0.0,
+                'requests': self.requests, 'files': self.files, 'failures': self.failures}
+
+
+def serve(address=None, workers=1, on_ready=None, allow_paths=None):
+    """
+    启动服务并一直运行，直到收到 shutdown 请求、SIGTERM 或 Ctrl+C
+
+    Args:
+        address (str, optional): 监听地址，见 client.parse_address
+        workers (int): 去注释的进程数，0 表示CPU核心数
+        on_ready (callable, optional): 开始监听后以 StripServer 为参数调用
+        allow_paths (bool, optional): 是否读写请求项中的路径，见 StripServer
+    """
+    async def main():
+        server = StripServer(address, workers, allow_paths)
+        await server.start()
+        loop = asyncio.get_running_loop()
+        if hasattr(signal, 'SIGTERM') and sys.platform != 'win32':
+            loop.add_signal_handler(signal.SIGTERM, server.stop)
+        if on_ready is not None:
+            on_ready(server)
+        await server.serve_forever()
+
+    asyncio.run(main())
+
+
+def main(argv=None, prog=None):
+    """
+    服务的命令行主函数
+
+    Returns:
+        int: 退出码
+    """
+    parser = argparse.ArgumentParser(prog=prog, description="常驻的本地去注释服务，客户端见 engine/client.py")
+    parser.add_argument('-a', '--address', default=None,
+                        help=f"监听地址，unix:路径、主机:端口 或 端口 (默认: {default_address()})")
+    parser.add_argument('-j', '--workers', type=int, default=1,
+                        help="去注释的进程数，0 表示CPU核心数 (默认: %(default)s)")
+    parser.add_argument('--allow-paths', action='store_true', default=None,
+                        help="监听 TCP 端口时也读写请求中的文件路径；本机的其他用户也能借此以当前用户的权限读写文件")
+    args = parser.parse_args(argv)
+
+    def on_ready(server):
+        print(f"正在监听 {server.address}（引擎版本 {ENGINE_VERSION}，工作进程 {server.workers}），"
+              f"按 Ctrl+C 停止", flush=True)
+
+    try:
+        serve(args.address, args.workers, on_ready, args.allow_paths)
+    except ValueError as e:
+        parser.error(str(e))
+    except OSError as e:
+        print(f"无法启动服务: {e}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        pass
+    print("服务已停止")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(prog='python -m engine.server'))
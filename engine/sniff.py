@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+按文件名和开头几 KB 的内容识别压缩、生成和过大的文件，跳过去注释
+
+*.min.js、打包产物、vendored 的大文件中几乎没有有意义的注释，却占去大部分处理时间。
+判断只需要文件大小、文件名、开头 SNIFF_BYTES 字节和末尾 TAIL_BYTES 字节，不读取整个文件：
+
+- size：超过 max_size
+- name：文件名匹配 *.min.js、*_pb2.py 等模式
+- source-map：末尾（或开头）有 sourceMappingURL 标记，是构建工具的输出
+- generated：开头有 @generated、DO NOT EDIT 等生成文件标记
+- minified：开头部分的平均行长超过 max_line_length（压缩后的代码通常只有一行或几行）
+
+跳过的文件在输出到其他目录时原样复制，见 mirror 模块。
+"""
+
+import fnmatch
+import os
+import re
+
+# 读取开头和末尾的字节数
+SNIFF_BYTES = 8 * 1024
+TAIL_BYTES = 512
+
+# 开头部分的平均行长超过该值时视为压缩文件
+MAX_LINE_LENGTH = 300
+
+DEFAULT_NAME_PATTERNS = (
+    '*.min.js', '*-min.js', '*.min.css', '*-min.css', '*.bundle.js', '*.chunk.js',
+    '*_pb2.py', '*_pb2_grpc.py',
+)
+
+# 生成文件标记：只在文件开头、从行首开始的注释中查找，避免误判正文中提到这些词的注释和字符串
+_BANNER = re.compile(rb'^(?:#|//|/\*| ?\*|<!--)[^\n]*?'
+                     rb'(?:@generated\b|\bDO NOT EDIT\b|\b(?:[Aa]uto-?generated|[Aa]utomatically generated'
+                     rb'|[Gg]enerated by)\b)', re.MULTILINE)
+_BANNER_SCAN = 1024
+
+_SOURCE_MAP = re.compile(rb'[#@]\s*sourceMappingURL=')
+
+# 样本不足该字节数时不按行长判断
+_MIN_SAMPLE = 1024
+
+# 跳过原因的说明
+REASONS = {
+    'size': "超过大小上限",
+    'name': "压缩或生成文件的文件名",
+    'source-map': "含有 sourceMappingURL",
+    'generated': "含有生成文件标记",
+    'minified': "行过长，为压缩后的代码",
+}
+
+
+class SkipRules:
+    """
+    跳过文件的规则
+
+    Args:
+        max_size (int, optional): 超过该字节数的文件跳过，None 表示不限制
+        generated (bool): 是否按名称和内容识别压缩和生成的文件
+        max_line_length (int): 开头部分的平均行长超过该值时视为压缩文件
+        name_patterns (iterable): 视为压缩或生成文件的文件名模式（fnmatch，不区分大小写）
+    """
+
+    def __init__(self, max_size=None, generated=True, max_line_length=MAX_LINE_LENGTH,
+                 name_patterns=DEFAULT_NAME_PATTERNS):
+        self.max_size = max_size
+        self.generated = generated
+        self.max_line_length = max_line_length
+        self.name_patterns = tuple(pattern.lower() for pattern in name_patterns)
+
+    def check(self, file_path):
+        """
+        判断是否跳过文件
+
+        Returns:
+            str: 跳过的原因（REASONS 的键），不跳过时为None
+        """
+        size = os.path.getsize(file_path)
+        if self.max_size is not None and size > self.max_size:
+            return 'size'
+        if not self.generated:
+            return None
+        name = os.path.basename(file_path).lower()
+        if any(fnmatch.fnmatchcase(name, pattern) for pattern in self.name_patterns):
+            return 'name'
+        with open(file_path, 'rb') as f:
+            head = f.read(SNIFF_BYTES)
+            tail = b''
+            if size > SNIFF_BYTES:
+                f.seek(max(SNIFF_BYTES, size - TAIL_BYTES))
+                tail = f.read()
+        return sniff(head, tail, size, self.max_line_length)
+
+
+def sniff(head, tail=b'', size=None, max_line_length=MAX_LINE_LENGTH):
+    """
+    按文件开头和末尾的内容判断是否为压缩或生成的文件
+
+    Args:
+        head (bytes): 文件开头的内容
+        tail (bytes): head 之后、文件末尾的内容
+        size (int, optional): 文件大小，默认为 head 和 tail 的总长
+        max_line_length (int): 平均行长的上限
+
+    Returns:
+        str: 'source-map'、'generated' 或 'minified'，都不是时为None
+    """
+    if size is None:
+        size = len(head) + len(tail)
+    if _SOURCE_MAP.search(tail) or _SOURCE_MAP.search(head):
+        return 'source-map'
+    if _BANNER.search(head, 0, _BANNER_SCAN):
+        return 'generated'
+    if len(head) < _MIN_SAMPLE:
+        return None
+    lines = head.count(b'\n')
+    if size > len(head):
+        # 最后一行没有读完，只统计完整的行
+        end = head.rfind(b'\n') + 1
+        if not lines:
+            return 'minified'
+    else:
+        end = len(head)
+        lines += not head.endswith(b'\n')
+    return 'minified' if end / lines > max_line_length else None
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+流式注释移除（JS / CSS / HTML）
+
+按块读取源文件，把“是否在字符串内”“是否在块注释内”等状态带到下一块，
+边处理边写出，内存占用与文件大小无关。输出与 strip_bytes 完全一致：
+处理前先按块识别编码（见 encoding 模块），按原编码和 BOM 写出。
+
+JS、CSS 和 HTML 直接使用 js_lexer / html_lexer 的可分块扫描器。
+"""
+
+import os
+
+from .atomic import commit_temp, temp_path_for
+from .encoding import detect_file_encoding, open_source
+from .html_lexer import HtmlCommentFilter
+from .js_lexer import CodeCommentFilter
+
+# 支持流式处理的文件类型
+STREAMABLE_TYPES = ('js', 'css', 'html')
+
+# 大于该大小（字节）的文件自动使用流式处理
+STREAM_THRESHOLD = 16 * 1024 * 1024
+
+# 每次读取的字符数
+CHUNK_SIZE = 1024 * 1024
+
+
+def build_pipeline(file_type, sink, options=None):
+    """
+    构建指定文件类型的流式处理管道
+
+    Args:
+        file_type (str): 文件类型，支持 'js', 'css', 'html'
+        sink (callable): 接收输出文本的函数
+        options (dict, optional): 传给 strip_source 的选项，HTML 使用其中的
+                                  keep_preformatted 和 keep_conditional_comments
+
+    Returns:
+        object: 具有 feed(text) 和 close() 方法的处理器
+    """
+    if file_type in ('js', 'css'):
+        return CodeCommentFilter(file_type, sink)
+    elif file_type == 'html':
+        options = options or {}
+        return HtmlCommentFilter(sink, options.get('keep_preformatted', False),
+                                 options.get('keep_conditional_comments', False))
+    raise ValueError(f"不支持流式处理的文件类型: {file_type}")
+
+
+def should_stream(file_path, file_type):
+    """
+    判断文件是否应使用流式处理
+    """
+    return file_type in STREAMABLE_TYPES and os.path.getsize(file_path) >= STREAM_THRESHOLD
+
+
+def stream_file(file_path, output_path, file_type, chunk_size=CHUNK_SIZE, output_digest=None, options=None):
+    """
+    以流式方式移除注释，读写都按块进行
+
+    先写入输出文件所在目录下的临时文件，完成后与已有的输出比较，
+    内容相同时保留原文件，否则原子地替换。输出路径可以与源文件相同。
+
+    Args:
+        file_path (str): 源文件路径
+        output_path (str): 输出文件路径，可以与源文件相同
+        file_type (str): 文件类型，支持 'js', 'css', 'html'
+        chunk_size (int): 每次读取的字符数
+        output_digest (hashlib object, optional): 用写出的字节更新该哈希对象
+        options (dict, optional): 传给 strip_source 的选项，见 build_pipeline
+
+    Returns:
+        bool: 是否写入了输出文件，内容未变时为False
+
+    Raises:
+        Exception: 读写或处理失败时抛出
+    """
+    output_path = os.path.realpath(output_path)
+    encoding = detect_file_encoding(file_path, file_type)
+    write_path = temp_path_for(output_path)
+    try:
+        with open_source(file_path, encoding) as src, open(write_path, 'wb') as dst:
+            # 处理器输出的小片段先收集起来，每处理完一块再合并写出
+            pieces = []
+
+            def write(data):
+                dst.write(data)
+                if output_digest is not None:
+                    output_digest.update(data)
+
+            def flush():
+                text = ''.join(pieces)
+                pieces.clear()
+                write(encoding.encode(text, bom=False))
+
+            write(encoding.bom)
+
+            pipeline = build_pipeline(file_type, pieces.append, options)
+            while True:
+                chunk = src.read(chunk_size)
+                if not chunk:
+                    break
+                pipeline.feed(chunk)
+                flush()
+            pipeline.close()
+            flush()
+    except BaseException:
+        os.remove(write_path)
+        raise
+    return commit_temp(write_path, output_path)
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+按文件类型分派的注释移除入口
+
+pro.py 和 pro+.py 的 remove_comments_from_code 都委托到这里，
+这样多进程的工作进程只需导入 engine，而不必导入带界面的脚本。
+"""
+
+from .encoding import decode_source
+from .header import split_header
+from .html_lexer import strip_html
+from .js_lexer import strip_css, strip_js
+from .py_lexer import strip_python
+
+# 去注释规则的版本号，规则变化导致输出不同时需要递增，以使增量清单失效
+ENGINE_VERSION = '1.6.1'
+
+# 默认支持的文件扩展名及其对应的处理类型
+DEFAULT_EXTENSIONS = {
+    '.py': 'py',
+    '.js': 'js',
+    '.html': 'html',
+    '.htm': 'html',
+    '.css': 'css'
+}
+
+
+def extensions_for(file_types=None):
+    """
+    根据文件类型列表构建支持的扩展名字典
+
+    Args:
+        file_types (list, optional): 文件类型列表，如 ['py', 'js']；为None时返回全部类型
+
+    Returns:
+        dict: 扩展名到处理类型的映射
+    """
+    if file_types is None:
+        return dict(DEFAULT_EXTENSIONS)
+    return {ext: file_type for ext, file_type in DEFAULT_EXTENSIONS.items() if file_type in file_types}
+
+
+def strip_source(code, file_type='py', keep_header=False, drop_blank_lines=False, keep_preformatted=False,
+                 keep_conditional_comments=False, header_patterns=()):
+    """
+    从代码中移除注释
+
+    Args:
+        code (str): 原始代码
+        file_type (str): 文件类型，支持 'py', 'js', 'html', 'css'
+        keep_header (bool): 是否保留Python头部注释，见 header 模块
+        drop_blank_lines (bool): 是否删除Python代码中的所有空白行
+        keep_preformatted (bool): 是否原样保留HTML中 <pre> 和 <textarea> 的内容
+        keep_conditional_comments (bool): 是否保留HTML中的 IE 条件注释
+        header_patterns (iterable): keep_header 时额外保留的注释块的正则表达式，如许可证、公司横幅
+
+    Returns:
+        str: 移除注释后的代码
+    """
+    if file_type == 'py':
+        header_comments = []
+        if keep_header:
+            header_comments, code = split_header(code, header_patterns)
+
+        cleaned_code = strip_python(code, drop_blank_lines=drop_blank_lines)
+
+        if header_comments:
+            parts = header_comments + ['']
+            if cleaned_code:
+                parts.append(cleaned_code)
+            return '\n'.join(parts)
+        return cleaned_code
+
+    elif file_type == 'js':
+        return strip_js(code)
+
+    elif file_type == 'html':
+        # <!-- --> 注释，以及 <script> / <style> 中的 JavaScript / CSS 注释
+        return strip_html(code, keep_preformatted, keep_conditional_comments)
+
+    elif file_type == 'css':
+        return strip_css(code)
+
+    else:
+        # 默认情况下不做处理
+        return code
+
+
+def strip_bytes(data, file_type='py', **options):
+    """
+    从文件内容（字节）中移除注释，输出保持原来的编码和 BOM
+
+    编码的识别和按字节处理见 encoding 模块；不是 utf-8 的文件（如 GBK）同样可以处理。
+    GBK / GB18030 文件仍然解码后处理再编码回去，原因见 encoding 模块的说明。
+
+    Args:
+        data (bytes): 原始文件内容
+        file_type (str): 文件类型
+        **options: 传给 strip_source 的选项
+
+    Returns:
+        bytes: 移除注释后的内容
+    """
+    code, encoding = decode_source(data, file_type)
+    return encoding.encode(strip_source(code, file_type, **options))
@@ -0,0 +1,279 @@
+# -*- coding: utf-8 -*-
+"""
+基于 os.scandir 的目录遍历
+
+在进入子目录之前就按排除规则剪枝，不会遍历 node_modules、.git、venv 等目录的内容。
+排除规则由两部分组成：按目录名匹配的默认排除列表，以及 .gitignore 风格的模式
+（支持 *、?、[...]、**、行首 / 锚定、行尾 / 只匹配目录和 ! 取反）。
+"""
+
+import copy
+import os
+import re
+
+# 默认排除的目录名
+DEFAULT_EXCLUDES = frozenset({
+    '.git', '.hg', '.svn',
+    'node_modules', 'bower_components',
+    'venv', '.venv', 'site-packages', '__pycache__',
+    '.tox', '.nox', '.mypy_cache', '.pytest_cache',
+    'dist',
+})
+
+GITIGNORE_NAME = '.gitignore'
+
+
+def _translate(pattern):
+    """
+    把 .gitignore 风格的模式转换为正则表达式（匹配以 / 分隔的相对路径）
+    """
+    out = []
+    i = 0
+    n = len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == '*':
+            if pattern.startswith('**', i):
+                at_start = i == 0 or pattern[i - 1] == '/'
+                if at_start and pattern.startswith('**/', i):
+                    # 开头或中间的 **/ 匹配零个或多个目录
+                    out.append('(?:.*/)?')
+                    i += 3
+                    continue
+                if at_start and i + 2 == n:
+                    # 末尾的 /** 匹配目录下的所有内容
+                    out.append('.*')
+                    i += 2
+                    continue
+                out.append('[^/]*')
+                i += 2
+                continue
+            out.append('[^/]*')
+        elif c == '?':
+            out.append('[^/]')
+        elif c == '[':
+            # [! 表示取反，紧跟在 [ 或 [! 之后的 ] 是普通字符
+            j = i + 1
+            if j < n and pattern[j] == '!':
+                j += 1
+            if j < n and pattern[j] == ']':
+                j += 1
+            j = pattern.find(']', j)
+            if j < 0:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1:j]
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                out.append('[' + body.replace('\\', '\\\\') + ']')
+                i = j
+        elif c == '\\' and i + 1 < n:
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return ''.join(out)
+
+
+class _Pattern:
+    def __init__(self, line):
+        self.negate = line.startswith('!')
+        if self.negate:
+            line = line[1:]
+        self.dir_only = line.endswith('/')
+        line = line.rstrip('/')
+        # 含有 / 的模式相对于规则所在目录锚定，否则匹配任意层级的名称
+        anchored = '/' in line
+        regex = _translate(line.lstrip('/'))
+        if not anchored:
+            regex = '(?:.*/)?' + regex
+        self.regex = re.compile(regex + r'\Z', re.DOTALL)
+
+    def match(self, rel_path, is_dir):
+        if self.dir_only and not is_dir:
+            return False
+        return self.regex.match(rel_path) is not None
+
+
+def parse_patterns(lines):
+    """
+    解析 .gitignore 风格的模式行，忽略空行和 # 开头的注释行
+
+    Args:
+        lines (iterable): 模式行
+
+    Returns:
+        list: 解析后的模式列表
+    """
+    patterns = []
+    for line in lines:
+        line = line.rstrip('\r\n')
+        # 末尾未转义的空格被忽略
+        stripped = line.rstrip(' ')
+        if stripped.endswith('\\') and len(stripped) < len(line):
+            stripped += ' '
+        line = stripped
+        # 以 \# 或 \! 开头的行按普通字符处理，由 _translate 去掉转义
+        if not line or line.startswith('#'):
+            continue
+        patterns.append(_Pattern(line))
+    return patterns
+
+
+def read_patterns(path):
+    """
+    读取 .gitignore 风格的规则文件
+    """
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        return parse_patterns(f)
+
+
+def _match(rule_sets, rel_path, is_dir):
+    """
+    按顺序检查各组规则，最后一条匹配的规则决定结果
+
+    Returns:
+        bool: 是否被排除
+    """
+    excluded = False
+    for base, patterns in rule_sets:
+        if base:
+            if not rel_path.startswith(base + '/'):
+                continue
+            path = rel_path[len(base) + 1:]
+        else:
+            path = rel_path
+        for pattern in patterns:
+            if pattern.match(path, is_dir):
+                excluded = not pattern.negate
+    return excluded
+
+
+class IgnoreRules:
+    """
+    目录遍历的排除规则
+
+    Args:
+        patterns (iterable, optional): .gitignore 风格的模式，相对于遍历的根目录
+        excludes (iterable, optional): 按名称排除的目录，默认为 DEFAULT_EXCLUDES，传入空列表表示不使用
+        use_gitignore (bool): 是否读取各级目录中的 .gitignore 文件
+    """
+
+    def __init__(self, patterns=(), excludes=DEFAULT_EXCLUDES, use_gitignore=False):
+        self.patterns = parse_patterns(patterns)
+        self.excludes = frozenset(excludes)
+        self.use_gitignore = use_gitignore
+
+    def is_excluded(self, rel_path, is_dir=False):
+        """
+        判断以 / 分隔的相对路径是否被排除，任一上级目录被排除时也算排除
+
+        用于归档文件中的成员和监视模式中的事件，不读取 .gitignore 文件。
+        """
+        rules = [('', self.patterns)] if self.patterns else []
+        parts = [part for part in rel_path.split('/') if part and part != '.']
+        for i in range(len(parts) if is_dir else len(parts) - 1):
+            if parts[i] in self.excludes or (rules and _match(rules, '/'.join(parts[:i + 1]), True)):
+                return True
+        return not is_dir and bool(rules) and _match(rules, '/'.join(parts), False)
+
+
+def exclude_output(ignore, dir_path, output_dir):
+    """
+    输出目录位于源目录中时，返回额外排除了输出目录的规则，避免处理或镜像自己的输出
+
+    Returns:
+        IgnoreRules: 排除规则，不需要排除时原样返回
+    """
+    if not output_dir:
+        return ignore
+    rel_path = os.path.relpath(os.path.abspath(output_dir), os.path.abspath(dir_path))
+    if rel_path == os.curdir or rel_path == os.pardir or rel_path.startswith(os.pardir + os.sep):
+        return ignore
+    ignore = copy.copy(ignore) if ignore is not None else IgnoreRules()
+    ignore.patterns = ignore.patterns + parse_patterns(['/' + rel_path.replace(os.sep, '/') + '/'])
+    return ignore
+
+
+def iter_tree(dir_path, extensions, recursive=True, ignore=None, mirror=False):
+    """
+    逐个产生扩展名受支持且未被排除的文件，遍历顺序见 scan_tree
+
+    mirror 为True时同时产生其他未被排除的文件，其文件类型为None。
+    生成器结束时的返回值（StopIteration.value）为被排除的目录和文件数。
+
+    Yields:
+        tuple: (文件路径, 相对路径, 文件类型)
+    """
+    if ignore is None:
+        ignore = IgnoreRules()
+    user_rules = [('', ignore.patterns)] if ignore.patterns else []
+    pruned = 0
+    # (目录路径, 相对路径(以 / 分隔), 生效的 .gitignore 规则)
+    stack = [(dir_path, '', ())]
+    while stack:
+        current, rel_dir, inherited = stack.pop()
+        rule_sets = inherited
+        if ignore.use_gitignore:
+            gitignore = os.path.join(current, GITIGNORE_NAME)
+            if os.path.isfile(gitignore):
+                rule_sets = inherited + ((rel_dir, read_patterns(gitignore)),)
+        active = list(rule_sets) + user_rules
+
+        subdirs = []
+        try:
+            entries = list(os.scandir(current))
+        except OSError:
+            continue
+        for entry in entries:
+            rel_path = rel_dir + '/' + entry.name if rel_dir else entry.name
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                continue
+            if is_dir:
+                if not recursive or entry.is_symlink():
+                    continue
+                if entry.name in ignore.excludes or (active and _match(active, rel_path, True)):
+                    pruned += 1
+                    continue
+                subdirs.append((entry.path, rel_path, rule_sets))
+            else:
+                _, ext = os.path.splitext(entry.name)
+                file_type = extensions.get(ext.lower())
+                if file_type is None and not mirror:
+                    continue
+                if active and _match(active, rel_path, False):
+                    pruned += 1
+                    continue
+                yield entry.path, os.path.normpath(rel_path), file_type
+        # 逆序压栈，使出栈顺序与目录列出顺序一致
+        stack.extend(reversed(subdirs))
+    return pruned
+
+
+def scan_tree(dir_path, extensions, recursive=True, ignore=None, mirror=False):
+    """
+    遍历目录，收集扩展名受支持且未被排除的文件
+
+    遍历顺序与 os.walk 相同：先当前目录的文件，再依次进入各子目录。
+    符号链接指向的目录不会进入。
+
+    Args:
+        dir_path (str): 要遍历的目录
+        extensions (dict): 扩展名到处理类型的映射
+        recursive (bool): 是否递归处理子目录
+        ignore (IgnoreRules, optional): 排除规则，默认只使用 DEFAULT_EXCLUDES
+        mirror (bool): 是否同时收集其他文件（文件类型为None）
+
+    Returns:
+        tuple: ([(文件路径, 相对路径, 文件类型)], 被排除的目录和文件数)
+    """
+    files = []
+    walker = iter_tree(dir_path, extensions, recursive, ignore, mirror)
+    while True:
+        try:
+            files.append(next(walker))
+        except StopIteration as stop:
+            return files, stop.value
@@ -0,0 +1,384 @@
+# -*- coding: utf-8 -*-
+"""
+监视模式
+
+先按增量方式同步一次输出目录，之后持续监视源目录：新建或修改的文件重新处理，
+删除（或移出）的文件同时删除其输出。Linux 上通过 ctypes 调用 inotify，事件几乎即时到达；
+其他平台或 inotify 不可用（如监视数达到上限）时退回定时轮询。
+
+连续的事件合并为一批处理：最后一个事件之后安静 debounce 秒再处理，持续有事件时最多
+等待 max_delay 秒，保存文件到输出更新的延迟在一秒以内。每批通过增量清单跳过内容未变的文件。
+
+inotify 事件使用 IgnoreRules.is_excluded 判断排除规则，不读取 .gitignore；
+.gitignore 只在开始时的完整同步和轮询中生效。
+"""
+
+import os
+import select
+import struct
+import sys
+import time
+
+from .manifest import MANIFEST_NAME, Manifest, options_fingerprint
+from .runner import RunStats, collect_tasks, make_task, remove_output, run_tasks
+from .strip import DEFAULT_EXTENSIONS
+from .walk import IgnoreRules, exclude_output, iter_tree
+
+# 最后一个事件之后等待的时间（秒）
+DEBOUNCE = 0.1
+
+# 持续有事件时，一批最多等待的时间（秒）
+MAX_DELAY = 0.5
+
+# 轮询的间隔（秒）
+POLL_INTERVAL = 1.0
+
+# 没有事件时检查取消标志的间隔（秒）
+_IDLE_WAIT = 0.5
+
+# inotify 事件，见 <sys/inotify.h>
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ONLYDIR = 0x01000000
+_IN_ISDIR = 0x40000000
+
+_WATCH_MASK = (_IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE | _IN_ONLYDIR)
+
+# struct inotify_event 的固定部分：wd, mask, cookie, len
+_EVENT = struct.Struct('iIII')
+
+
+def _posix(rel_path):
+    return rel_path.replace(os.sep, '/')
+
+
+class InotifyWatcher:
+    """
+    基于 inotify 的监视器，为每个未被排除的目录添加一个监视
+
+    Raises:
+        OSError: 当前系统不支持 inotify，或监视数达到上限
+    """
+
+    def __init__(self, dir_path, extensions, recursive=True, ignore=None):
+        import ctypes
+        if not sys.platform.startswith('linux'):
+            raise OSError("inotify 仅在 Linux 上可用")
+        self._libc = ctypes.CDLL(None, use_errno=True)
+        self._ctypes = ctypes
+        self.dir_path = dir_path
+        self.extensions = extensions
+        self.recursive = recursive
+        self.ignore = ignore or IgnoreRules()
+        # 监视描述符 -> 相对目录路径
+        self._dirs = {}
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 失败")
+        try:
+            self._add_tree('')
+        except OSError:
+            self.close()
+            raise
+
+    def _add_watch(self, rel_dir):
+        path = os.path.join(self.dir_path, rel_dir) if rel_dir else self.dir_path
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), _WATCH_MASK)
+        if wd < 0:
+            errno = self._ctypes.get_errno()
+            if errno == 28:
+                raise OSError(errno, "inotify 监视数达到上限 (fs.inotify.max_user_watches)")
+            # 目录在添加监视前已被删除
+            return
+        self._dirs[wd] = rel_dir
+
+    def _add_tree(self, rel_dir):
+        stack = [rel_dir]
+        while stack:
+            current = stack.pop()
+            self._add_watch(current)
+            if not self.recursive:
+                return
+            try:
+                entries = list(os.scandir(os.path.join(self.dir_path, current) if current else self.dir_path))
+            except OSError:
+                continue
+            for entry in entries:
+                rel_path = os.path.join(current, entry.name) if current else entry.name
+                try:
+                    if not entry.is_dir(follow_symlinks=False):
+                        continue
+                except OSError:
+                    continue
+                if not self.ignore.is_excluded(_posix(rel_path), is_dir=True):
+                    stack.append(rel_path)
+
+    def _remove_tree(self, rel_dir):
+        # 目录被移走后，其中的监视仍然有效但路径已经不对，全部移除
+        prefix = rel_dir + os.sep
+        for wd, path in list(self._dirs.items()):
+            if path == rel_dir or path.startswith(prefix):
+                self._libc.inotify_rm_watch(self._fd, wd)
+                del self._dirs[wd]
+
+    def read(self, timeout):
+        """
+        等待最多 timeout 秒，返回期间发生变化的路径
+
+        Returns:
+            tuple: (可能发生变化的文件或目录的相对路径集合, 是否需要完整同步)
+        """
+        paths = set()
+        rescan = False
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return paths, rescan
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = _EVENT.unpack_from(data, offset)
+                name = data[offset + _EVENT.size:offset + _EVENT.size + length].rstrip(b'\0')
+                offset += _EVENT.size + length
+                if mask & _IN_Q_OVERFLOW:
+                    rescan = True
+                    continue
+                if mask & _IN_IGNORED:
+                    self._dirs.pop(wd, None)
+                    continue
+                rel_dir = self._dirs.get(wd)
+                if rel_dir is None or not name:
+                    continue
+                name = os.fsdecode(name)
+                rel_path = os.path.join(rel_dir, name) if rel_dir else name
+                if mask & _IN_ISDIR:
+                    if not self.recursive or self.ignore.is_excluded(_posix(rel_path), is_dir=True):
+                        continue
+                    if mask & _IN_MOVED_FROM:
+                        self._remove_tree(rel_path)
+                    elif mask & (_IN_CREATE | _IN_MOVED_TO):
+                        # 立即添加监视，之后在其中新建的文件不会漏掉；已有的文件在处理这一批时遍历
+                        try:
+                            self._add_tree(rel_path)
+                        except OSError as e:
+                            print(f"无法监视目录 {rel_path}: {e}")
+                    paths.add(rel_path)
+                elif os.path.splitext(name)[1].lower() in self.extensions:
+                    paths.add(rel_path)
+        return paths, rescan
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class PollingWatcher:
+    """
+    定时遍历目录、比较修改时间和大小的监视器，任何平台都可用
+    """
+
+    def __init__(self, dir_path, extensions, recursive=True, ignore=None, interval=POLL_INTERVAL):
+        self.dir_path = dir_path
+        self.extensions = extensions
+        self.recursive = recursive
+        self.ignore = ignore
+        self.interval = interval
+        self._snapshot = self._scan()
+        self._next = time.monotonic() + interval
+
+    def _scan(self):
+        snapshot = {}
+        for file_path, rel_path, _ in iter_tree(self.dir_path, self.extensions, self.recursive, self.ignore):
+            try:
+                st = os.stat(file_path)
+            except OSError:
+                continue
+            snapshot[rel_path] = (st.st_mtime_ns, st.st_size)
+        return snapshot
+
+    def read(self, timeout):
+        """
+        与 InotifyWatcher.read 相同，到下一次轮询时间时才会遍历目录
+        """
+        wait = self._next - time.monotonic()
+        if wait > timeout:
+            time.sleep(timeout)
+            return set(), False
+        if wait > 0:
+            time.sleep(wait)
+        self._next = time.monotonic() + self.interval
+        snapshot = self._scan()
+        old = self._snapshot
+        self._snapshot = snapshot
+        changed = {rel for rel, state in snapshot.items() if old.get(rel) != state}
+        changed.update(old.keys() - snapshot.keys())
+        return changed, False
+
+    def close(self):
+        pass
+
+
+def open_watcher(dir_path, extensions, recursive=True, ignore=None, use_inotify=None,
+                 poll_interval=POLL_INTERVAL):
+    """
+    创建监视器：优先使用 inotify，不可用时退回轮询
+
+    Args:
+        use_inotify (bool, optional): True 表示必须使用 inotify，False 表示只轮询，None 为自动选择
+    """
+    if use_inotify is not False:
+        try:
+            return InotifyWatcher(dir_path, extensions, recursive, ignore)
+        except (OSError, AttributeError) as e:
+            if use_inotify:
+                raise
+            print(f"无法使用 inotify（{e}），改为每 {poll_interval} 秒轮询一次")
+    return PollingWatcher(dir_path, extensions, recursive, ignore, poll_interval)
+
+
+class _Session:
+    def __init__(self, dir_path, output_dir, recursive, extensions, options, ignore, manifest):
+        self.dir_path = dir_path
+        self.output_dir = output_dir
+        self.recursive = recursive
+        self.extensions = extensions
+        self.options = options
+        self.ignore = ignore
+        self.manifest = manifest
+        self.fingerprint = options_fingerprint(extensions, options)
+
+    def remove_outputs(self, rel_path):
+        """
+        删除一个源文件（或源目录下所有文件）的输出，返回被删除的相对路径列表
+        """
+        prefix = rel_path + os.sep
+        keys = [key for key in self.manifest.entries if key == rel_path or key.startswith(prefix)]
+        return [key for key in keys if remove_output(self.output_dir, key, self.manifest)]
+
+    def sync(self):
+        """
+        完整同步：增量处理所有文件，并删除源文件已不存在的输出
+
+        Returns:
+            tuple: (RunStats, 被删除输出的相对路径列表)
+        """
+        stats = RunStats()
+        tasks = collect_tasks(self.dir_path, self.output_dir, self.recursive, self.extensions, self.ignore, stats)
+        self._run(tasks, stats)
+        seen = {task[3] for task in tasks}
+        removed = []
+        for key in list(self.manifest.entries):
+            if key not in seen and not os.path.exists(os.path.join(self.dir_path, key)):
+                removed.extend(self.remove_outputs(key))
+        return stats, removed
+
+    def update(self, paths):
+        """
+        处理一批发生变化的路径：存在的文件重新处理，目录展开为其中的文件，不存在的删除输出
+
+        Returns:
+            tuple: (RunStats, 被删除输出的相对路径列表)
+        """
+        stats = RunStats()
+        tasks = {}
+        removed = []
+        # 展开新目录时只按名称和模式排除，模式相对于源目录匹配
+        rules = IgnoreRules(excludes=self.ignore.excludes)
+        for rel_path in sorted(paths):
+            path = os.path.join(self.dir_path, rel_path)
+            if os.path.isdir(path):
+                for file_path, sub_path, file_type in iter_tree(path, self.extensions, self.recursive, rules):
+                    rel = os.path.join(rel_path, sub_path)
+                    if not self.ignore.is_excluded(_posix(rel)):
+                        tasks[rel] = make_task(file_path, rel, file_type, self.output_dir)
+            elif os.path.isfile(path):
+                file_type = self.extensions.get(os.path.splitext(path)[1].lower())
+                if file_type is not None and not self.ignore.is_excluded(_posix(rel_path)):
+                    tasks[rel_path] = make_task(path, rel_path, file_type, self.output_dir)
+            else:
+                removed.extend(self.remove_outputs(rel_path))
+        self._run(list(tasks.values()), stats)
+        return stats, removed
+
+    def _run(self, tasks, stats):
+        try:
+            run_tasks(tasks, self.options, stats=stats, manifest=self.manifest, fingerprint=self.fingerprint)
+        finally:
+            self.manifest.save()
+
+
+def watch_tree(dir_path, output_dir, recursive=True, extensions=None, options=None, ignore=None,
+               manifest_path=None, on_batch=None, cancel=None, debounce=DEBOUNCE, max_delay=MAX_DELAY,
+               use_inotify=None, poll_interval=POLL_INTERVAL):
+    """
+    监视目录，持续把变化同步到输出目录，直到 cancel 被设置（或 KeyboardInterrupt）
+
+    Args:
+        dir_path (str): 要监视的源目录
+        output_dir (str): 输出目录，必须指定，监视模式不会覆盖源文件
+        recursive (bool): 是否递归处理子目录
+        extensions (dict, optional): 扩展名到处理类型的映射，默认全部类型
+        options (dict, optional): 传给 strip_source 的选项
+        ignore (IgnoreRules, optional): 排除规则
+        manifest_path (str, optional): 增量清单文件路径，默认放在输出目录下
+        on_batch (callable, optional): 每处理完一批调用 on_batch(RunStats, 被删除输出的相对路径列表)，
+                                       第一批为开始时的完整同步
+        cancel (threading.Event, optional): 被设置后停止监视
+        debounce (float): 最后一个事件之后等待的秒数
+        max_delay (float): 持续有事件时一批最多等待的秒数
+        use_inotify (bool, optional): 见 open_watcher
+        poll_interval (float): 轮询间隔（秒）
+    """
+    if not output_dir:
+        raise ValueError("监视模式需要指定输出目录")
+    if extensions is None:
+        extensions = DEFAULT_EXTENSIONS
+    # 输出目录在源目录中时排除它，写入输出不会再触发事件
+    ignore = exclude_output(ignore or IgnoreRules(), dir_path, output_dir)
+    if manifest_path is None:
+        manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    session = _Session(dir_path, output_dir, recursive, extensions, options, ignore, Manifest(manifest_path))
+
+    def cancelled():
+        return cancel is not None and cancel.is_set()
+
+    def report(result):
+        if on_batch is not None:
+            on_batch(*result)
+
+    # 先开始监视再同步，同步期间的修改不会漏掉
+    watcher = open_watcher(dir_path, extensions, recursive, ignore, use_inotify, poll_interval)
+    try:
+        report(session.sync())
+        pending = set()
+        rescan = False
+        first = last = 0.0
+        while not cancelled():
+            if pending or rescan:
+                timeout = max(0.0, min(last + debounce, first + max_delay) - time.monotonic())
+            else:
+                timeout = _IDLE_WAIT
+            paths, overflow = watcher.read(timeout)
+            now = time.monotonic()
+            if paths or overflow:
+                if not pending and not rescan:
+                    first = now
+                last = now
+                pending |= paths
+                rescan = rescan or overflow
+            if (pending or rescan) and (now - last >= debounce or now - first >= max_delay):
+                # 事件队列溢出时可能丢失了事件，完整同步一次
+                report(session.sync() if rescan else session.update(pending))
+                pending = set()
+                rescan = False
+    finally:
+        watcher.close()
@@ -2,11 +2,26 @@
 # -*- coding: utf-8 -*-
 
 import os
-import re
-import tkinter as tk
-from tkinter import filedialog, messagebox, ttk
+import queue
+import sys
+import threading
+import time
 from pathlib import Path
-from tkinterdnd2 import DND_FILES, TkinterDnD
+
+from engine import (DEFAULT_EXCLUDES, REPORT_NAME, IgnoreRules, Report, RunStats, SkipRules,
+                    extensions_for, make_task, process_tree, run_tasks, strip_source)
+
+# 图形界面依赖在 load_gui() 中按需导入，命令行模式或作为库导入时不加载 tkinter
+tk = filedialog = messagebox = ttk = None
+DND_FILES = TkinterDnD = None
+
+
+def load_gui():
+    """导入图形界面依赖（tkinter 和 tkinterdnd2）"""
+    global tk, filedialog, messagebox, ttk, DND_FILES, TkinterDnD
+    import tkinter as tk
+    from tkinter import filedialog, messagebox, ttk
+    from tkinterdnd2 import DND_FILES, TkinterDnD
 
 
 def remove_comments_from_code(code, file_type='py'):
@@ -20,97 +35,11 @@ def remove_comments_from_code(code, file_type='py'):
     Returns:
         str: 移除注释后的代码
     """
-    if file_type == 'py':
-        # 处理Python多行注释 (''' 或 """)
-        pattern = r'("""|\'\'\').*?\1'
-        # re.DOTALL 使 . 匹配包括换行符在内的所有字符
-        code = re.sub(pattern, '', code, flags=re.DOTALL)
-        
-        # 处理Python单行注释 (#)
-        result = []
-        lines = code.split('\n')
-        in_string = False
-        string_char = None
-        
-        for line in lines:
-            new_line = ''
-            i = 0
-            while i < len(line):
-                # 检查是否在字符串内
-                if not in_string and (line[i] == '"' or line[i] == "'"):
-                    in_string = True
-                    string_char = line[i]
-                    new_line += line[i]
-                elif in_string and line[i] == string_char and (i == 0 or line[i-1] != '\\'):
-                    in_string = False
-                    new_line += line[i]
-                elif not in_string and line[i] == '#':
-                    # 遇到注释符号且不在字符串内，忽略后面的内容
-                    break
-                else:
-                    new_line += line[i]
-                i += 1
-            
-            # 添加非空行或包含代码的行
-            if new_line.strip() or not line.lstrip().startswith('#'):
-                result.append(new_line)
-        
-        return '\n'.join(result)
-    
-    elif file_type == 'js':
-        # 处理JS多行注释 /* */
-        pattern_multiline = r'/\*[\s\S]*?\*/'
-        code = re.sub(pattern_multiline, '', code)
-        
-        # 处理JS单行注释 //
-        result = []
-        lines = code.split('\n')
-        in_string = False
-        string_char = None
-        
-        for line in lines:
-            new_line = ''
-            i = 0
-            while i < len(line):
-                # 检查是否在字符串内
-                if not in_string and (line[i] == '"' or line[i] == "'" or line[i] == '`'):
-                    in_string = True
-                    string_char = line[i]
-                    new_line += line[i]
-                elif in_string and line[i] == string_char and (i == 0 or line[i-1] != '\\'):
-                    in_string = False
-                    new_line += line[i]
-                elif not in_string and i < len(line) - 1 and line[i] == '/' and line[i+1] == '/':
-                    # 遇到注释符号且不在字符串内，忽略后面的内容
-                    break
-                else:
-                    new_line += line[i]
-                i += 1
-            
-            # 添加非空行或包含代码的行
-            if new_line.strip() or not (line.lstrip().startswith('//') or line.lstrip().startswith('/*')):
-                result.append(new_line)
-        
-        return '\n'.join(result)
-    
-    elif file_type == 'html':
-        # 处理HTML注释 <!-- -->
-        pattern = r'<!--[\s\S]*?-->'
-        code = re.sub(pattern, '', code)
-        return code
-    
-    elif file_type == 'css':
-        # 处理CSS注释 /* */
-        pattern = r'/\*[\s\S]*?\*/'
-        code = re.sub(pattern, '', code)
-        return code
-    
-    else:
-        # 默认情况下不做处理
-        return code
+    return strip_source(code, file_type)
 
 
-def process_file(file_path, output_dir=None, supported_extensions=None):
+def process_file(file_path, output_dir=None, supported_extensions=None, cache=None, skip=None, stats=None,
+                 timeout=None):
     """
     处理单个文件，移除注释
     
@@ -118,9 +47,13 @@ def process_file(file_path, output_dir=None, supported_extensions=None):
         file_path (str): 要处理的文件路径
         output_dir (str, optional): 输出目录，如果为None则覆盖原文件
         supported_extensions (dict, optional): 支持的文件扩展名及其对应的处理类型
+        cache (ResultCache, optional): 结果缓存，内容和选项相同的文件直接取出上次去注释的结果
+        skip (SkipRules, optional): 跳过压缩、生成和过大的文件，输出到其他目录时原样复制，列在 stats.sniffed 中
+        stats (RunStats, optional): 用于收集统计信息和跳过的原因
+        timeout (float, optional): 处理时间上限（秒），指定时在独立的工作进程中处理，超时的强制结束并计为失败
         
     Returns:
-        bool: 处理是否成功
+        bool: 处理是否成功，按 skip 跳过也算成功
     """
     if supported_extensions is None:
         supported_extensions = {
@@ -141,32 +74,23 @@ def process_file(file_path, output_dir=None, supported_extensions=None):
             print(f"不支持的文件类型: {ext}")
             return False
         
-        # 获取文件类型
-        file_type = supported_extensions[ext]
+        # 与目录中的文件相同，由 run_tasks 按内容跳过、处理并计入统计
+        if stats is None:
+            stats = RunStats()
+        fail_count = stats.fail_count
+        task = make_task(file_path, os.path.basename(file_path), supported_extensions[ext], output_dir)
+        run_tasks([task], stats=stats, cache=cache, skip=skip, timeout=timeout)
         
-        with open(file_path, 'r', encoding='utf-8') as f:
-            code = f.read()
-        
-        cleaned_code = remove_comments_from_code(code, file_type)
-        
-        if output_dir:
-            # 创建与原始文件相同的目录结构
-            rel_path = os.path.basename(file_path)
-            output_path = os.path.join(output_dir, rel_path)
-            os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        else:
-            output_path = file_path
-        
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(cleaned_code)
-        
-        return True
+        return stats.fail_count == fail_count
     except Exception as e:
         print(f"处理文件 {file_path} 时出错: {e}")
         return False
 
 
-def process_directory(dir_path, output_dir=None, recursive=True, file_types=None):
+def process_directory(dir_path, output_dir=None, recursive=True, file_types=None, workers=None, stats=None,
+                      incremental=False, progress=None, cancel=None, ignore=None, report=None,
+                      io_concurrency=None, mirror=None, compile_levels=None, cache=None, since=None,
+                      skip=None, timeout=None):
     """
     处理目录中的所有支持的文件
     
@@ -175,70 +99,82 @@ def process_directory(dir_path, output_dir=None, recursive=True, file_types=None
         output_dir (str, optional): 输出目录
         recursive (bool): 是否递归处理子目录
         file_types (list, optional): 要处理的文件类型列表
+        workers (int, optional): 并行进程数，None或1为串行，0表示使用全部CPU核心
+        stats (RunStats, optional): 用于收集统计信息和每个文件的错误
+        incremental (bool): 是否增量处理，跳过上次处理后未变化的文件
+        progress (callable, optional): 每处理完一个文件调用 progress(已完成数, 总数, 文件路径)
+        cancel (threading.Event, optional): 被设置后处理完当前文件即停止
+        ignore (IgnoreRules, optional): 目录遍历的排除规则，默认跳过 node_modules、.git、venv 等目录
+        report (Report, optional): 性能报告，记录每个文件读取、去注释、写入的耗时和字节数
+        io_concurrency (int, optional): 指定时使用异步 I/O 流水线，同时进行的读写数
+        mirror (str, optional): 'copy' 或 'link' 时把其他文件一并镜像到输出目录，已相同的跳过
+        compile_levels (tuple, optional): 校验去注释后的Python文件并生成这些优化级别的 .pyc，无法编译的计为失败
+        cache (ResultCache, optional): 跨项目共享的结果缓存，内容和选项相同的文件不再重复去注释
+        since (str, optional): 只处理本地 git 仓库中自该提交（或标签）以来新增或修改的文件，
+                               'HEAD' 即工作区中尚未提交的修改；同时删除已删除文件的输出，
+                               目录不是 git 工作区时处理全部文件
+        skip (SkipRules, optional): 跳过压缩、生成和过大的文件，输出到其他目录时原样复制，列在 stats.sniffed 中
+        timeout (float, optional): 单个文件的处理时间上限（秒），每个文件在独立的工作进程中处理，超时的强制结束并计为失败
         
     Returns:
         tuple: (成功处理的文件数, 处理失败的文件数)
     """
-    if file_types is None:
-        # 默认支持的文件类型
-        supported_extensions = {
-            '.py': 'py',
-            '.js': 'js',
-            '.html': 'html',
-            '.htm': 'html',
-            '.css': 'css'
-        }
-    else:
-        # 根据用户选择的文件类型构建支持的扩展名字典
-        supported_extensions = {}
-        if 'py' in file_types:
-            supported_extensions['.py'] = 'py'
-        if 'js' in file_types:
-            supported_extensions['.js'] = 'js'
-        if 'html' in file_types:
-            supported_extensions['.html'] = 'html'
-            supported_extensions['.htm'] = 'html'
-        if 'css' in file_types:
-            supported_extensions['.css'] = 'css'
+    # 根据用户选择的文件类型构建支持的扩展名字典
+    supported_extensions = extensions_for(file_types)
     
-    success_count = 0
-    fail_count = 0
+    return process_tree(dir_path, output_dir, recursive, supported_extensions,
+                        workers=workers, stats=stats, incremental=incremental,
+                        progress=progress, cancel=cancel, ignore=ignore, report=report,
+                        io_concurrency=io_concurrency, mirror=mirror, compile_levels=compile_levels,
+                        cache=cache, since=since, skip=skip, timeout=timeout)
+
+
+def watch_directory(dir_path, output_dir, recursive=True, file_types=None, on_batch=None, cancel=None,
+                    ignore=None):
+    """
+    监视目录，把新建或修改的文件持续同步到输出目录，删除已删除文件的输出
     
-    for root, dirs, files in os.walk(dir_path):
-        for file in files:
-            # 获取文件扩展名
-            _, ext = os.path.splitext(file)
-            ext = ext.lower()
-            
-            # 检查是否是支持的文件类型
-            if ext in supported_extensions:
-                file_path = os.path.join(root, file)
-                
-                if output_dir:
-                    # 创建相对路径以保持目录结构
-                    rel_path = os.path.relpath(file_path, dir_path)
-                    new_output_dir = os.path.join(output_dir, os.path.dirname(rel_path))
-                    os.makedirs(new_output_dir, exist_ok=True)
-                    output_path = os.path.join(output_dir, rel_path)
-                else:
-                    output_path = file_path
-                
-                if process_file(file_path, output_path if output_dir else None, supported_extensions):
-                    success_count += 1
-                else:
-                    fail_count += 1
-        
-        if not recursive:
-            break  # 如果不递归，则只处理顶层目录
+    Args:
+        dir_path (str): 要监视的目录路径
+        output_dir (str): 输出目录
+        recursive (bool): 是否递归处理子目录
+        file_types (list, optional): 要处理的文件类型列表
+        on_batch (callable, optional): 每处理完一批调用 on_batch(RunStats, 被删除输出的相对路径列表)
+        cancel (threading.Event, optional): 被设置后停止监视
+        ignore (IgnoreRules, optional): 排除规则
+    """
+    from engine import watch_tree
+    watch_tree(dir_path, output_dir, recursive, extensions_for(file_types), ignore=ignore,
+               on_batch=on_batch, cancel=cancel)
+
+
+def analyze_directory(dir_path, recursive=True, file_types=None, workers=None, progress=None, cancel=None,
+                      ignore=None):
+    """
+    分析目录：统计将删除的注释并找出可疑的文件，不写入任何文件
     
-    return success_count, fail_count
+    Args:
+        dir_path (str): 要分析的目录路径
+        recursive (bool): 是否递归处理子目录
+        file_types (list, optional): 要处理的文件类型列表
+        workers (int, optional): 并行进程数，None或1为串行，0表示使用全部CPU核心
+        progress (callable, optional): 每分析完一个文件调用 progress(已完成数, 总数, 文件路径)
+        cancel (threading.Event, optional): 被设置后分析完当前文件即停止
+        ignore (IgnoreRules, optional): 排除规则
+        
+    Returns:
+        Analysis: 分析结果
+    """
+    from engine import analyze_tree
+    return analyze_tree(dir_path, recursive, extensions_for(file_types), workers=workers, ignore=ignore,
+                        progress=progress, cancel=cancel)
 
 
 class CommentRemoverApp:
     def __init__(self, root):
         self.root = root
         self.root.title("交付壁垒制造工具(bz:择安网络)")
-        self.root.geometry("600x500")
+        self.root.geometry("600x843")
         
         # 设置样式
         self.style = ttk.Style()
@@ -280,6 +216,55 @@ class CommentRemoverApp:
         self.recursive_var = tk.BooleanVar(value=True)
         ttk.Checkbutton(options_frame, text="递归处理子目录", variable=self.recursive_var).pack(anchor=tk.W)
         
+        workers_frame = ttk.Frame(options_frame)
+        workers_frame.pack(fill=tk.X, anchor=tk.W)
+        ttk.Label(workers_frame, text="并行进程数(0为全部核心):").pack(side=tk.LEFT)
+        self.workers_var = tk.IntVar(value=1)
+        ttk.Spinbox(workers_frame, from_=0, to=os.cpu_count() or 1, textvariable=self.workers_var, width=5).pack(side=tk.LEFT, padx=5)
+        ttk.Label(workers_frame, text="单个文件时间上限(秒，0为不限):").pack(side=tk.LEFT, padx=(10, 0))
+        self.timeout_var = tk.IntVar(value=0)
+        ttk.Spinbox(workers_frame, from_=0, to=3600, textvariable=self.timeout_var, width=5).pack(side=tk.LEFT, padx=5)
+        
+        self.incremental_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(options_frame, text="增量处理(跳过未变化的文件)", variable=self.incremental_var).pack(anchor=tk.W)
+        
+        self.watch_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(options_frame, text="监视模式(持续同步修改到输出目录，点击取消停止)", variable=self.watch_var).pack(anchor=tk.W)
+        
+        self.report_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(options_frame, text=f"生成性能报告({REPORT_NAME})", variable=self.report_var).pack(anchor=tk.W)
+        
+        self.compile_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(options_frame, text="校验语法并编译为 .pyc(__pycache__)", variable=self.compile_var).pack(anchor=tk.W)
+        
+        self.analyze_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(options_frame, text="仅分析(统计注释、找出可疑文件，不写入任何文件)", variable=self.analyze_var).pack(anchor=tk.W)
+        
+        self.cache_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(options_frame, text="使用结果缓存(跨项目共享，相同内容的文件不再重复处理)", variable=self.cache_var).pack(anchor=tk.W)
+        
+        skip_frame = ttk.Frame(options_frame)
+        skip_frame.pack(fill=tk.X, anchor=tk.W)
+        self.skip_generated_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(skip_frame, text="跳过压缩和生成的文件", variable=self.skip_generated_var).pack(side=tk.LEFT)
+        ttk.Label(skip_frame, text="大小上限(MB，0为不限):").pack(side=tk.LEFT, padx=(10, 0))
+        self.max_size_var = tk.IntVar(value=0)
+        ttk.Spinbox(skip_frame, from_=0, to=1024, textvariable=self.max_size_var, width=5).pack(side=tk.LEFT, padx=5)
+        
+        since_frame = ttk.Frame(options_frame)
+        since_frame.pack(fill=tk.X, anchor=tk.W)
+        self.since_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(since_frame, text="只处理 git 中自此提交以来变化的文件:", variable=self.since_var).pack(side=tk.LEFT)
+        self.since_ref_var = tk.StringVar(value="HEAD")
+        ttk.Entry(since_frame, textvariable=self.since_ref_var, width=16).pack(side=tk.LEFT, padx=5)
+        
+        exclude_frame = ttk.Frame(options_frame)
+        exclude_frame.pack(fill=tk.X, anchor=tk.W)
+        self.default_excludes_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(exclude_frame, text="跳过 node_modules、.git、venv 等目录", variable=self.default_excludes_var).pack(side=tk.LEFT)
+        self.gitignore_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(exclude_frame, text="遵循 .gitignore", variable=self.gitignore_var).pack(side=tk.LEFT, padx=5)
+        
         # 文件类型选择区域
         file_types_frame = ttk.LabelFrame(options_frame, text="文件类型", padding="5")
         file_types_frame.pack(fill=tk.X, pady=5, anchor=tk.W)
@@ -300,6 +285,10 @@ class CommentRemoverApp:
         ttk.Radiobutton(options_frame, text="覆盖原文件", variable=self.output_mode_var, value="overwrite").pack(anchor=tk.W)
         ttk.Radiobutton(options_frame, text="输出到新目录", variable=self.output_mode_var, value="new_dir").pack(anchor=tk.W)
         
+        self.mirror_var = tk.BooleanVar(value=False)
+        self.mirror_check = ttk.Checkbutton(options_frame, text="同时复制其他文件(图片、JSON 等，已相同的跳过)", variable=self.mirror_var)
+        self.mirror_check.pack(anchor=tk.W)
+        
         self.output_dir_frame = ttk.Frame(options_frame)
         self.output_dir_frame.pack(fill=tk.X, pady=5)
         
@@ -317,11 +306,24 @@ class CommentRemoverApp:
         self.status_var = tk.StringVar(value="准备就绪")
         ttk.Label(status_frame, textvariable=self.status_var).pack(anchor=tk.W)
         
+        self.progress_bar = ttk.Progressbar(status_frame, mode="determinate")
+        self.progress_bar.pack(fill=tk.X, pady=5)
+        
+        self.rate_var = tk.StringVar()
+        ttk.Label(status_frame, textvariable=self.rate_var).pack(anchor=tk.W)
+        
         # 操作按钮区域
         button_frame = ttk.Frame(main_frame)
         button_frame.pack(fill=tk.X, pady=10)
         
-        ttk.Button(button_frame, text="开始处理", command=self.start_processing).pack(side=tk.RIGHT, padx=5)
+        self.start_button = ttk.Button(button_frame, text="开始处理", command=self.start_processing)
+        self.start_button.pack(side=tk.RIGHT, padx=5)
+        self.cancel_button = ttk.Button(button_frame, text="取消", command=self.cancel_processing, state="disabled")
+        self.cancel_button.pack(side=tk.RIGHT, padx=5)
+        
+        # 后台处理线程通过该队列向界面线程发送进度和结果
+        self.events = queue.Queue()
+        self.cancel_event = None
         
         # 绑定输出模式变更事件
         self.output_mode_var.trace_add("write", self.update_output_dir_state)
@@ -331,7 +333,9 @@ class CommentRemoverApp:
         if self.output_mode_var.get() == "new_dir":
             for child in self.output_dir_frame.winfo_children():
                 child.configure(state="normal")
+            self.mirror_check.configure(state="normal")
         else:
+            self.mirror_check.configure(state="disabled")
             for child in self.output_dir_frame.winfo_children():
                 if isinstance(child, ttk.Entry) or isinstance(child, ttk.Button):
                     child.configure(state="disabled")
@@ -398,41 +402,189 @@ class CommentRemoverApp:
         if 'css' in file_types:
             supported_extensions['.css'] = 'css'
         
-        self.status_var.set("处理中...")
-        self.root.update()
-        
         try:
-            if os.path.isfile(path):
-                # 获取文件扩展名
-                _, ext = os.path.splitext(path)
-                ext = ext.lower()
-                
-                # 检查是否支持该文件类型
-                if ext not in supported_extensions:
-                    messagebox.showwarning("警告", f"不支持的文件类型: {ext}")
-                    self.status_var.set("准备就绪")
-                    return
-                
-                success = process_file(path, output_dir, supported_extensions)
+            max_size = self.max_size_var.get() * 1024 * 1024 or None
+            timeout = self.timeout_var.get() or None
+        except tk.TclError:
+            messagebox.showerror("错误", "大小上限和时间上限必须是整数")
+            return
+        skip = None
+        if self.skip_generated_var.get() or max_size:
+            skip = SkipRules(max_size, generated=self.skip_generated_var.get())
+        cache = None
+        if self.cache_var.get():
+            from engine import ResultCache
+            cache = ResultCache()
+        if os.path.isfile(path):
+            # 获取文件扩展名
+            _, ext = os.path.splitext(path)
+            ext = ext.lower()
+            
+            # 检查是否支持该文件类型
+            if ext not in supported_extensions:
+                messagebox.showwarning("警告", f"不支持的文件类型: {ext}")
+                self.status_var.set("准备就绪")
+                return
+            
+            def job(progress, cancel):
+                stats = RunStats()
+                success = process_file(path, output_dir, supported_extensions, cache, skip, stats, timeout)
+                progress(1, 1, path)
+                if stats.sniffed:
+                    return 'warning', f"文件已跳过:\n{stats.sniffed_list()}", "已跳过"
                 if success:
-                    messagebox.showinfo("成功", "文件处理完成")
-                    self.status_var.set("处理完成")
-                else:
-                    messagebox.showerror("错误", "文件处理失败")
-                    self.status_var.set("处理失败")
-            else:  # 目录
-                recursive = self.recursive_var.get()
-                success_count, fail_count = process_directory(path, output_dir, recursive, file_types)
+                    return 'info', "文件处理完成", "处理完成"
+                return 'error', "文件处理失败", "处理失败"
+        else:  # 目录
+            recursive = self.recursive_var.get()
+            try:
+                workers = self.workers_var.get()
+            except tk.TclError:
+                messagebox.showerror("错误", "并行进程数必须是整数")
+                return
+            incremental = self.incremental_var.get()
+            with_report = self.report_var.get()
+            mirror = 'copy' if self.mirror_var.get() else None
+            compile_levels = (0,) if self.compile_var.get() else None
+            since = (self.since_ref_var.get().strip() or "HEAD") if self.since_var.get() else None
+            ignore = IgnoreRules(excludes=DEFAULT_EXCLUDES if self.default_excludes_var.get() else (),
+                                 use_gitignore=self.gitignore_var.get())
+            if self.analyze_var.get():
+                def job(progress, cancel):
+                    analysis = analyze_directory(path, recursive, file_types, workers, progress, cancel, ignore)
+                    flagged = len(analysis.flagged())
+                    level = 'info' if not flagged and not analysis.failed() and not analysis.cancelled else 'warning'
+                    return level, analysis.summary(workers or os.cpu_count() or 1), f"分析完成，可疑文件 {flagged} 个"
                 
-                if fail_count == 0:
-                    messagebox.showinfo("成功", f"处理完成，成功处理 {success_count} 个文件")
-                    self.status_var.set(f"处理完成，成功: {success_count}")
+                self.run_in_background(job)
+                return
+            if self.watch_var.get():
+                if not output_dir:
+                    messagebox.showerror("错误", "监视模式需要选择“输出到新目录”")
+                    return
+                self.run_in_background(lambda progress, cancel: self.watch_job(
+                    path, output_dir, recursive, file_types, ignore, progress, cancel))
+                return
+            
+            def job(progress, cancel):
+                stats = RunStats()
+                report = Report() if with_report else None
+                process_directory(path, output_dir, recursive, file_types, workers, stats, incremental,
+                                  progress, cancel, ignore, report, mirror=mirror,
+                                  compile_levels=compile_levels, cache=cache, since=since, skip=skip,
+                                  timeout=timeout)
+                if stats.cancelled:
+                    message = f"已取消，{stats.summary()}"
                 else:
-                    messagebox.showwarning("警告", f"处理完成，成功: {success_count}，失败: {fail_count}")
-                    self.status_var.set(f"处理完成，成功: {success_count}，失败: {fail_count}")
-        except Exception as e:
-            messagebox.showerror("错误", f"处理过程中发生错误: {e}")
+                    message = f"处理完成，{stats.summary()}"
+                level = 'info' if stats.fail_count == 0 and not stats.cancelled else 'warning'
+                status = message
+                if stats.sniffed:
+                    message += f"\n\n跳过的压缩或生成的文件:\n{stats.sniffed_list(20)}"
+                if report is not None:
+                    report_path = os.path.join(output_dir or path, REPORT_NAME)
+                    report.save(report_path)
+                    message += f"\n\n{report.summary()}\n\n性能报告已写入 {report_path}"
+                return level, message, status
+        
+        self.run_in_background(job)
+
+    def watch_job(self, path, output_dir, recursive, file_types, ignore, progress, cancel):
+        """监视目录直到取消，返回值与 run_in_background 的 job 相同"""
+        counts = {'updated': 0, 'removed': 0, 'failed': 0}
+        
+        def on_batch(stats, removed):
+            counts['updated'] += stats.written_count
+            counts['removed'] += len(removed)
+            counts['failed'] += stats.fail_count
+            if counts['updated']:
+                progress(counts['updated'], counts['updated'], path)
+        
+        watch_directory(path, output_dir, recursive, file_types, on_batch, cancel, ignore)
+        message = (f"已停止监视，共更新 {counts['updated']} 个文件，"
+                   f"删除 {counts['removed']} 个输出，失败 {counts['failed']} 个")
+        return ('info' if counts['failed'] == 0 else 'warning'), message, message
+
+    def run_in_background(self, job):
+        """
+        在后台线程中执行 job(progress, cancel)，进度和结果通过事件队列交回界面线程
+
+        job 返回 (消息级别, 提示信息, 状态栏文字)，消息级别为 'info'、'warning' 或 'error'
+        """
+        self.cancel_event = threading.Event()
+        self.start_time = time.perf_counter()
+        self.progress_bar.configure(value=0, maximum=1)
+        self.rate_var.set("")
+        self.status_var.set("处理中...")
+        self.start_button.configure(state="disabled")
+        self.cancel_button.configure(state="normal")
+        
+        def progress(done, total, file_path):
+            self.events.put(('progress', done, total, file_path))
+        
+        def target():
+            try:
+                self.events.put(('done', job(progress, self.cancel_event)))
+            except Exception as e:
+                self.events.put(('error', e))
+        
+        threading.Thread(target=target, daemon=True).start()
+        self.root.after(100, self.poll_events)
+    
+    def poll_events(self):
+        """在界面线程中处理后台线程发来的事件，进度只显示最新的一条"""
+        latest = None
+        finished = None
+        while finished is None:
+            try:
+                event = self.events.get_nowait()
+            except queue.Empty:
+                break
+            if event[0] == 'progress':
+                latest = event
+            else:
+                finished = event
+        if latest is not None:
+            self.update_progress(*latest[1:])
+        if finished is None:
+            self.root.after(100, self.poll_events)
+        else:
+            self.finish_processing(finished)
+    
+    def update_progress(self, done, total, file_path):
+        elapsed = time.perf_counter() - self.start_time
+        rate = done / elapsed if elapsed > 0 else 0
+        self.progress_bar.configure(maximum=total, value=done)
+        text = f"{done}/{total}，{rate:.1f} 文件/秒"
+        if rate > 0 and done < total:
+            remaining = int((total - done) / rate)
+            text += f"，预计剩余 {remaining // 60}分{remaining % 60}秒"
+        self.rate_var.set(text)
+        if not self.cancel_event.is_set():
+            self.status_var.set(f"处理中: {os.path.basename(file_path)}")
+    
+    def finish_processing(self, event):
+        self.start_button.configure(state="normal")
+        self.cancel_button.configure(state="disabled")
+        if event[0] == 'error':
+            messagebox.showerror("错误", f"处理过程中发生错误: {event[1]}")
             self.status_var.set("处理失败")
+            return
+        level, message, status = event[1]
+        self.status_var.set(status)
+        if level == 'info':
+            messagebox.showinfo("成功", message)
+        elif level == 'warning':
+            messagebox.showwarning("警告", message)
+        else:
+            messagebox.showerror("错误", message)
+    
+    def cancel_processing(self):
+        """请求取消，当前文件处理完后停止"""
+        if self.cancel_event is not None:
+            self.cancel_event.set()
+            self.cancel_button.configure(state="disabled")
+            self.status_var.set("正在取消，当前文件处理完后停止...")
 
     def setup_drop_target(self, widget):
         """配置拖放目标"""
@@ -483,11 +635,25 @@ class CommentRemoverApp:
                 self.status_var.set("目录已添加，可以开始处理")
 
 
-def main():
+def main(argv=None):
+    """
+    程序入口：带路径参数时以命令行模式运行，否则（或指定 --gui 时）启动图形界面
+    """
+    import multiprocessing
+    multiprocessing.freeze_support()
+    
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv and '--gui' not in argv:
+        from engine.cli import main as cli_main
+        return cli_main(argv, profile='pro', prog='pro.py')
+    
+    load_gui()
     root = TkinterDnD.Tk()  # 使用TkinterDnD.Tk替代tk.Tk
     app = CommentRemoverApp(root)
     root.mainloop()
+    return 0
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
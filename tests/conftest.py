@@ -0,0 +1,6 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+
+# 不安装也可以直接在仓库根目录运行 pytest
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
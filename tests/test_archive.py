@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+归档文件处理的回归测试：输出可以重现，源文件去掉注释，其他成员和元数据原样保留
+"""
+
+import io
+import tarfile
+import zipfile
+
+import pytest
+
+from engine.archive import process_archive
+from engine.runner import RunStats
+
+MEMBERS = [
+    ('z.txt', b'# not a comment\n'),
+    ('pkg/b.py', b'x = 1  # c\n'),
+    ('a.js', b'/* c */ var a;\n'),
+    ('pkg/style.css', b'p { } /* c */\n'),
+]
+MTIME = 1600000000
+
+
+def _write_tar(path, mode):
+    with tarfile.open(path, mode) as tar:
+        info = tarfile.TarInfo('pkg')
+        info.type = tarfile.DIRTYPE
+        info.mode = 0o755
+        info.mtime = MTIME
+        tar.addfile(info)
+        for name, data in MEMBERS:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mode = 0o640
+            info.mtime = MTIME
+            tar.addfile(info, io.BytesIO(data))
+        info = tarfile.TarInfo('link.js')
+        info.type = tarfile.SYMTYPE
+        info.linkname = 'a.js'
+        tar.addfile(info)
+
+
+def _write_zip(path):
+    with zipfile.ZipFile(path, 'w') as zf:
+        for name, data in MEMBERS:
+            zf.writestr(zipfile.ZipInfo(name, (2020, 9, 13, 12, 26, 40)), data)
+
+
+def _tar_contents(path):
+    with tarfile.open(path) as tar:
+        return {info.name: (tar.extractfile(info).read() if info.isfile() else None, info.mode, info.mtime)
+                for info in tar}
+
+
+@pytest.mark.parametrize('suffix, mode', [('.tar', 'w'), ('.tar.gz', 'w:gz'), ('.tar.bz2', 'w:bz2'),
+                                          ('.tar.xz', 'w:xz')])
+def test_tar_round_trip_is_deterministic(tmp_path, suffix, mode):
+    src = tmp_path / f'in{suffix}'
+    _write_tar(src, mode)
+    outputs = []
+    for i in range(2):
+        dst = tmp_path / f'out{i}{suffix}'
+        stats = RunStats()
+        process_archive(str(src), str(dst), stats=stats)
+        assert stats.success_count == 3 and stats.fail_count == 0
+        outputs.append(dst.read_bytes())
+    assert outputs[0] == outputs[1]
+
+    contents = _tar_contents(tmp_path / f'out0{suffix}')
+    # 按输入中的存储顺序写出
+    assert list(contents) == ['pkg', 'z.txt', 'pkg/b.py', 'a.js', 'pkg/style.css', 'link.js']
+    assert contents['z.txt'] == (b'# not a comment\n', 0o640, MTIME)
+    assert contents['pkg/b.py'] == (b'x = 1  \n', 0o640, MTIME)
+    assert contents['a.js'][0] == b' var a;\n'
+    assert contents['pkg/style.css'][0] == b'p { } \n'
+    assert contents['pkg'][1:] == (0o755, MTIME)
+
+
+def test_zip_round_trip_is_deterministic(tmp_path):
+    src = tmp_path / 'in.zip'
+    _write_zip(src)
+    process_archive(str(src), str(tmp_path / 'out0.zip'))
+    process_archive(str(src), str(tmp_path / 'out1.zip'))
+    assert (tmp_path / 'out0.zip').read_bytes() == (tmp_path / 'out1.zip').read_bytes()
+    with zipfile.ZipFile(tmp_path / 'out0.zip') as zf:
+        # zip 的成员按名称排序写出
+        assert zf.namelist() == sorted(name for name, _ in MEMBERS)
+        assert zf.read('pkg/b.py') == b'x = 1  \n'
+        assert zf.read('z.txt') == b'# not a comment\n'
+        assert zf.getinfo('a.js').date_time == (2020, 9, 13, 12, 26, 40)
+
+
+def test_tar_to_zip_conversion(tmp_path):
+    src = tmp_path / 'in.tar.gz'
+    _write_tar(src, 'w:gz')
+    process_archive(str(src), str(tmp_path / 'out.zip'))
+    with zipfile.ZipFile(tmp_path / 'out.zip') as zf:
+        assert zf.read('a.js') == b' var a;\n'
+        assert zf.read('link.js') == b'a.js'
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+JS / CSS 词法分析引擎的回归测试：正则字面量与注释、除号的区分，以及分块输入
+"""
+
+import pytest
+
+from engine import strip_css, strip_js
+from engine.stream import build_pipeline
+from engine.strip import strip_source
+
+
+@pytest.mark.parametrize('code, expected', [
+    # 正则字面量中的 // 和 /* 不是注释
+    ('var r = /\\/\\/不是注释/g; // 注释\n', 'var r = /\\/\\/不是注释/g; \n'),
+    ('return /[/*]/.test(s); /* 注释 */\n', 'return /[/*]/.test(s); \n'),
+    ('s.split(/\\/\\//); // 注释\n', 's.split(/\\/\\//); \n'),
+    ('let re = x => /a/; // 注释\n', 'let re = x => /a/; \n'),
+    ('y = typeof /a/ // 注释\n', 'y = typeof /a/ \n'),
+    # 除号
+    ('x = 4 / 2 / 1; // 注释\n', 'x = 4 / 2 / 1; \n'),
+    ('a = [1] / 2 // 注释\n', 'a = [1] / 2 \n'),
+    ('x = y++ / 2 // 注释\n', 'x = y++ / 2 \n'),
+    ('x = ++y /2/ 1 // 注释\n', 'x = ++y /2/ 1 \n'),
+    ('x = a\n/ b /* 注释 */ / d\n', 'x = a\n/ b  / d\n'),
+    # 字符串和模板字符串中的注释标记
+    ('a = "//s" + \'/*t*/\' + `//${u}`; // 注释\n', 'a = "//s" + \'/*t*/\' + `//${u}`; \n'),
+])
+def test_regex_literals_and_division(code, expected):
+    assert strip_js(code) == expected
+
+
+def test_ambiguous_slash_never_removes_code():
+    # ) 之后的 / 无法区分正则和除号，按除号处理；宁可保留注释，也不能删掉代码
+    code = 'if (x) /re*/.test(s) // 注释\n'
+    assert strip_js(code).startswith('if (x) /re*/.test(s)')
+
+
+def test_css_keeps_strings_and_line_structure():
+    code = "a { color: red; /* 注释 */ }\n/* 注释 */\nb::after { content: '/*'; }\n"
+    assert strip_css(code) == "a { color: red;  }\n\nb::after { content: '/*'; }\n"
+
+
+@pytest.mark.parametrize('file_type, code', [
+    ('js', "x = a++ / 2; // c\ny = b-- / 3 /* d */;\nr = s.replace(/\\/\\//g, '`'); t = `${u /* e */}`;\n"),
+    ('css', "a { color: red; /* c */ }\n/* d */\nb::after { content: '/*'; }\n"),
+    ('html', "<p>x<!-- c --></p><script>var a = b++ / 2; // d\n</script><style>/* e */ p {}</style>\n"),
+])
+def test_split_at_every_offset(file_type, code):
+    # 流式处理时输入可能在任意位置分块，输出必须与一次性处理相同
+    expected = strip_source(code, file_type)
+    for i in range(len(code) + 1):
+        out = []
+        pipeline = build_pipeline(file_type, out.append)
+        pipeline.feed(code[:i])
+        pipeline.feed(code[i:])
+        pipeline.close()
+        assert ''.join(out) == expected, i
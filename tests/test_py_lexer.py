@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+Python 词法分析引擎的回归测试
+"""
+
+import pytest
+
+from engine import strip_python
+
+
+def test_removes_docstrings_at_statement_position():
+    code = 'def f():\n    """文档"""\n    return 1\n'
+    assert strip_python(code) == 'def f():\n    \n    return 1\n'
+
+
+@pytest.mark.parametrize('code', [
+    'x = """保留\n# 不是注释\n"""\n',
+    "f('''a''', 1)\n",
+    'y = (\n    """保留"""\n)\n',
+    'z = [\n    """a""",\n    """b""",\n]\n',
+])
+def test_keeps_triple_quoted_strings_in_expressions(code):
+    assert strip_python(code) == code
+
+
+def test_docstring_after_string_with_brackets():
+    # 普通字符串中的括号不计入括号深度，其后的文档字符串仍然删除
+    code = 'p = "(" + \'{{\' + "[x"\n"""文档"""\n'
+    assert strip_python(code) == 'p = "(" + \'{{\' + "[x"\n\n'
+
+
+@pytest.mark.parametrize('code, expected', [
+    ("s = 'a\\\\'  # 注释\n", "s = 'a\\\\'  \n"),
+    ('s = "a\\\\" + "b"  # 注释\n', 's = "a\\\\" + "b"  \n'),
+    ("s = 'it\\'s # 不是注释'  # 注释\n", "s = 'it\\'s # 不是注释'  \n"),
+    ('s = """a\\"""  # 不是注释"""  # 注释\n', 's = """a\\"""  # 不是注释"""  \n'),
+])
+def test_escaped_backslashes_and_quotes(code, expected):
+    assert strip_python(code) == expected
+
+
+def test_raw_string_backslash_does_not_escape_quote_for_prefix():
+    # r"\" 不是合法的字符串，闭引号在后面，中间的 # 属于字符串
+    code = 'r = r"\\"  # 字符串"\n'
+    assert strip_python(code) == code
+
+
+def test_fstring_nested_strings_and_comment():
+    code = 'x = f"{d[\'#\']} {y!r:>{w}}"  # 注释\n'
+    assert strip_python(code) == 'x = f"{d[\'#\']} {y!r:>{w}}"  \n'
+
+
+def test_comment_only_lines_removed():
+    code = '# 注释\nx = 1\n    # 缩进的注释\ny = 2\n'
+    assert strip_python(code) == 'x = 1\ny = 2\n'